@@ -0,0 +1,328 @@
+"""Benchmarks the S3 paths (listing, small and large transfers, batch delete, list view population).
+
+Runs against the in-process stand-in in s3_stub.py by default, with optional per-call latency,
+per-stream bandwidth and throttling, or against any S3-compatible endpoint such as moto server or
+MinIO with --endpoint-url. Results are written as JSON so two runs can be compared:
+
+    python benchmarks/bench_s3.py --output before.json
+    python benchmarks/bench_s3.py --output after.json --compare before.json
+    python benchmarks/bench_s3.py --latency 0.02 --throttle-rate 0.01 --only list,small
+    python benchmarks/bench_s3.py --endpoint-url http://localhost:5000 --bucket bench --list-sizes 10000
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from s3_delete import delete_keys  # noqa: E402
+from s3_listing import iter_pages  # noqa: E402
+from s3_listview import ObjectListModel  # noqa: E402
+from s3_stub import StubS3, StubTransferSettings  # noqa: E402
+from s3_transfer import MB, TransferScheduler, TransferSettings, download_task, upload_task  # noqa: E402
+
+BENCHMARKS = ('list', 'small', 'large', 'delete', 'treeview')
+REGRESSION_THRESHOLD = 0.10  # Slower than the baseline by more than this fraction counts as a regression
+
+
+class Bench:
+    """Shared state for one benchmark run: the client, transfer settings and collected results."""
+
+    def __init__(self, args):
+        self.args = args
+        self.results = []
+        if args.endpoint_url:
+            from s3_clients import get_client
+            self.s3 = get_client(args.profile, args.region, args.endpoint_url, max_pool_connections=256)
+            self.stub = None
+            self.settings = TransferSettings(chunk_size=args.chunk_size * MB, max_concurrency=args.part_concurrency)
+            try:
+                self.s3.create_bucket(Bucket=args.bucket)
+            except Exception:
+                pass  # Already exists, or the endpoint does not let us create it
+        else:
+            self.s3 = self.stub = StubS3(latency=args.latency, bandwidth=args.bandwidth * MB if args.bandwidth else None,
+                                         throttle_rate=args.throttle_rate)
+            self.settings = StubTransferSettings(chunk_size=args.chunk_size * MB, max_concurrency=args.part_concurrency)
+        self.bucket = args.bucket
+
+    def record(self, name, params, seconds, items=None, nbytes=None):
+        result = {'name': name, 'params': params, 'seconds': round(seconds, 4)}
+        if items is not None:
+            result['items_per_second'] = round(items / seconds, 1) if seconds else None
+        if nbytes is not None:
+            result['mb_per_second'] = round(nbytes / MB / seconds, 2) if seconds else None
+        self.results.append(result)
+        rates = ''.join(f", {result[field]} {unit}" for field, unit in (('items_per_second', 'items/s'), ('mb_per_second', 'MB/s'))
+                        if result.get(field) is not None)
+        print(f"{_key(result):44s} {seconds:9.3f} s{rates}")
+
+    def timed(self, func):
+        """Best of --repeat runs of func(), which returns (seconds, result); setup stays outside the timing."""
+        best = None
+        for _ in range(self.args.repeat):
+            seconds, value = func()
+            if best is None or seconds < best[0]:
+                best = (seconds, value)
+        return best
+
+    def populate(self, prefix, count, size=0):
+        keys = [f"{prefix}{i // 1000:05d}/{i:08d}.dat" for i in range(count)]
+        if self.stub:
+            self.stub.populate(self.bucket, keys, size)
+            return keys
+        tasks = [(key, key, lambda s3, key=key: s3.put_object(Bucket=self.bucket, Key=key, Body=b'\0' * size)) for key in keys]
+        _, failed = TransferScheduler(self.s3, self.args.concurrency).run(tasks)
+        if failed:
+            raise RuntimeError(f"{len(failed)} objects could not be created, e.g. {next(iter(failed.items()))}")
+        return keys
+
+    def clear_prefix(self, prefix):
+        keys = [obj['Key'] for page in iter_pages(self.s3, self.bucket, prefix) for obj in page]
+        if keys:
+            delete_keys(self.s3, self.bucket, keys, self.args.concurrency)
+
+
+def _key(result):
+    params = ','.join(f"{name}={value}" for name, value in sorted(result['params'].items()))
+    return f"{result['name']}[{params}]"
+
+
+def bench_list(bench):
+    for count in bench.args.list_sizes:
+        prefix = f"bench-list-{count}/"
+        if bench.stub or not any(True for _ in iter_pages(bench.s3, bench.bucket, prefix, max_keys=1)):
+            bench.populate(prefix, count)
+
+        for workers in bench.args.list_workers:
+            def run():
+                model = ObjectListModel()
+                start = time.perf_counter()
+                for page in iter_pages(bench.s3, bench.bucket, prefix, list_workers=workers):
+                    model.append_page(page, prefix)
+                return time.perf_counter() - start, len(model)
+
+            seconds, listed = bench.timed(run)
+            # Sequential runs keep their old name, so existing baselines still compare
+            bench.record('list', {'keys': count, **({'workers': workers} if workers > 1 else {})}, seconds, items=listed)
+
+
+def _write_files(directory, count, size):
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    block = os.urandom(min(size, MB)) if size else b''
+    for i in range(count):
+        path = os.path.join(directory, f"file-{i:06d}.bin")
+        with open(path, 'wb') as f:
+            remaining = size
+            while remaining:
+                f.write(block[:remaining])
+                remaining -= min(remaining, len(block))
+        paths.append(path)
+    return paths
+
+
+def _transfer(bench, name, params, paths, prefix, workdir, concurrency):
+    total = sum(os.path.getsize(path) for path in paths)
+    keys = [f"{prefix}{os.path.basename(path)}" for path in paths]
+
+    def upload():
+        tasks = [upload_task(path, bench.bucket, key, settings=bench.settings) for path, key in zip(paths, keys)]
+        start = time.perf_counter()
+        _, failed = TransferScheduler(bench.s3, concurrency).run(tasks)
+        return time.perf_counter() - start, failed
+
+    def download():
+        target = os.path.join(workdir, 'download')
+        shutil.rmtree(target, ignore_errors=True)
+        os.makedirs(target)
+        tasks = [download_task(bench.bucket, key, os.path.join(target, os.path.basename(key)), settings=bench.settings) for key in keys]
+        start = time.perf_counter()
+        _, failed = TransferScheduler(bench.s3, concurrency).run(tasks)
+        return time.perf_counter() - start, failed
+
+    for direction, func in (('upload', upload), ('download', download)):
+        seconds, failed = bench.timed(func)
+        if failed:
+            print(f"  {len(failed)} {direction}s failed, e.g. {next(iter(failed.items()))}")
+        bench.record(f"{name}-{direction}", params, seconds, items=len(paths), nbytes=total)
+
+
+def bench_small(bench, workdir):
+    count, size = bench.args.small_count, bench.args.small_size
+    paths = _write_files(os.path.join(workdir, 'small'), count, size)
+    _transfer(bench, 'small', {'files': count, 'bytes': size}, paths, 'bench-small/', workdir, bench.args.concurrency)
+    bench.clear_prefix('bench-small/')
+
+
+def bench_large(bench, workdir):
+    size = bench.args.large_size * MB
+    paths = _write_files(os.path.join(workdir, 'large'), 1, size)
+    params = {'mb': bench.args.large_size, 'chunk_mb': bench.args.chunk_size, 'parts': bench.args.part_concurrency}
+    _transfer(bench, 'large', params, paths, 'bench-large/', workdir, 1)
+    bench.clear_prefix('bench-large/')
+
+
+def bench_delete(bench):
+    count = bench.args.delete_count
+
+    def run():
+        keys = bench.populate('bench-delete/', count)
+        start = time.perf_counter()
+        deleted, _ = delete_keys(bench.s3, bench.bucket, keys, bench.args.concurrency)
+        return time.perf_counter() - start, len(deleted)
+
+    seconds, deleted = bench.timed(run)
+    bench.record('delete', {'keys': count}, seconds, items=deleted)
+
+
+def bench_treeview(bench):
+    """Time to feed listing pages into the model and virtualized Treeview and get the first screen drawn."""
+    try:
+        import tkinter as tk
+        from s3_listview import VirtualTreeview
+        root = tk.Tk()
+    except Exception as e:
+        print(f"treeview: skipped, no display ({e})")
+        return
+    root.geometry("1280x600")
+    now = datetime.datetime.now(datetime.timezone.utc)
+    try:
+        for count in bench.args.list_sizes:
+            pages = [[{'Key': f"{i:08d}/{j:04d}.dat", 'Size': j, 'LastModified': now} for j in range(1000)]
+                     for i in range(-(-count // 1000))]
+
+            def run():
+                model = ObjectListModel()
+                view = VirtualTreeview(root, model, columns=("Name", "Size (Bytes)", "Last Modified"))
+                view.grid(row=0, column=0, sticky="nsew")
+                root.update()
+                start = time.perf_counter()
+                for page in pages:
+                    model.append_page(page)
+                    view.rows_added()
+                    root.update_idletasks()
+                seconds = time.perf_counter() - start
+                view.frame.destroy()
+                return seconds, len(model)
+
+            seconds, rows = bench.timed(run)
+            bench.record('treeview', {'rows': count}, seconds, items=rows)
+    finally:
+        root.destroy()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """Prints each benchmark's change against the baseline file and returns the keys that regressed."""
+    with open(baseline_path) as f:
+        old_report = json.load(f)
+    baseline = {_key(result): result for result in old_report['results']}
+    regressions = []
+    print(f"\nCompared with {baseline_path}:")
+    for field in ('backend', 'latency', 'bandwidth_mb', 'throttle_rate'):
+        if old_report['meta'].get(field) != report['meta'].get(field):
+            print(f"  warning: {field} differs ({old_report['meta'].get(field)} -> {report['meta'].get(field)}), timings are not comparable")
+    results = report['results']
+    for result in results:
+        key = _key(result)
+        old = baseline.get(key)
+        if not old or not old['seconds']:
+            print(f"{key:44s}   (new)")
+            continue
+        change = result['seconds'] / old['seconds'] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{key:44s} {old['seconds']:9.3f} s -> {result['seconds']:9.3f} s ({change:+.1%}){flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the S3 listing, transfer and delete paths.")
+    parser.add_argument("--only", help=f"Comma-separated subset of {','.join(BENCHMARKS)}")
+    parser.add_argument("--endpoint-url", help="Run against this S3-compatible endpoint (e.g. moto server) instead of the in-process stub")
+    parser.add_argument("--profile", help="AWS profile for --endpoint-url")
+    parser.add_argument("--region", help="AWS region for --endpoint-url")
+    parser.add_argument("--bucket", default="bench", help="Bucket to use; created if missing")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub only: seconds added to every request")
+    parser.add_argument("--bandwidth", type=float, default=0, help="Stub only: MB/s per stream (0 for unlimited)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Stub only: fraction of requests answered with 503 SlowDown")
+    parser.add_argument("--list-sizes", type=lambda text: [int(size) for size in text.split(',')], default=[10_000, 100_000, 1_000_000],
+                        help="Comma-separated key counts for the listing and treeview benchmarks")
+    parser.add_argument("--list-workers", type=lambda text: [int(workers) for workers in text.split(',')], default=[1, 16],
+                        help="Comma-separated listing worker counts to time, 1 being the sequential listing")
+    parser.add_argument("--small-count", type=int, default=1000, help="Number of files in the small-file benchmark")
+    parser.add_argument("--small-size", type=int, default=4096, help="Bytes per file in the small-file benchmark")
+    parser.add_argument("--large-size", type=int, default=256, help="MB in the multipart benchmark")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Part size in MB")
+    parser.add_argument("--part-concurrency", type=int, default=8, help="Parallel parts per file")
+    parser.add_argument("--delete-count", type=int, default=10_000, help="Keys in the batch delete benchmark")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Files transferred in parallel")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the fastest is kept")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Results file to compare against; exits 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Slowdown fraction reported as a regression")
+    args = parser.parse_args()
+    selected = args.only.split(',') if args.only else BENCHMARKS
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    bench = Bench(args)
+    workdir = tempfile.mkdtemp(prefix="s3-bench-")
+    try:
+        if 'list' in selected:
+            bench_list(bench)
+        if 'small' in selected:
+            bench_small(bench, workdir)
+        if 'large' in selected:
+            bench_large(bench, workdir)
+        if 'delete' in selected:
+            bench_delete(bench)
+        if 'treeview' in selected:
+            bench_treeview(bench)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': args.endpoint_url or 'stub',
+            'latency': args.latency, 'bandwidth_mb': args.bandwidth, 'throttle_rate': args.throttle_rate,
+            'repeat': args.repeat,
+        },
+        'results': bench.results,
+    }
+    if bench.stub:
+        report['meta']['stub_calls'] = bench.stub.calls
+        report['meta']['stub_throttled'] = bench.stub.throttled
+    output = args.output or os.path.join(REPO_DIR, 'benchmarks', 'results', f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare and compare(report, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Measures how long s3_explorer.py takes to show its window and to show the first page of a listing.
+
+Every run starts a fresh interpreter so module imports are paid again, as they are when a user
+launches the app. Pass --cold to also give each run an empty cache directory, so the listing comes
+from S3 rather than the on-disk listing cache.
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --bucket my-bucket --profile dev --cold
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child. START is the parent's wall clock just before it spawned the child.
+CHILD = r"""
+import json, sys, time
+START, BUCKET, PROFILE, TIMEOUT = float(sys.argv[1]), sys.argv[2], sys.argv[3], float(sys.argv[4])
+import tkinter as tk
+import s3_explorer
+for name in ('showinfo', 'showerror', 'showwarning'):
+    setattr(s3_explorer.messagebox, name, lambda *args, **kwargs: None)
+
+root = tk.Tk()
+app = s3_explorer.S3ClientGUI(root)
+root.geometry("1280x600")
+root.update()
+root.wait_visibility()
+result = {'window': time.time() - START}
+
+if BUCKET:
+    deadline = time.time() + TIMEOUT
+    while not app.available_profiles and time.time() < deadline and PROFILE:
+        root.update()
+        time.sleep(0.005)
+    if PROFILE:
+        app.current_profile.set(PROFILE)
+    app.bucket_name.set(BUCKET)
+    app._connect_s3()
+    while len(app.object_list) == 0 and (app.list_job or app.job_runner.jobs) and time.time() < deadline:
+        root.update()
+        time.sleep(0.005)
+    if len(app.object_list):
+        result['listing'] = time.time() - START
+print(json.dumps(result))
+app._on_close()
+root.destroy()
+"""
+
+
+def run_once(args):
+    env = dict(os.environ)
+    if args.endpoint_url:
+        env['AWS_ENDPOINT_URL_S3'] = args.endpoint_url
+    with tempfile.TemporaryDirectory() as cache_home:
+        if args.cold:
+            env['XDG_CACHE_HOME'] = cache_home
+        start = time.time()
+        output = subprocess.run([sys.executable, '-c', CHILD, str(start), args.bucket or '', args.profile or '', str(args.timeout)],
+                                cwd=REPO_DIR, env=env, capture_output=True, text=True, timeout=args.timeout + 30)
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr.strip())
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-to-window and time-to-first-listing for the S3 explorer GUI.")
+    parser.add_argument("--bucket", help="Bucket to list; without it only time-to-window is measured.")
+    parser.add_argument("--profile", help="AWS profile to connect with.")
+    parser.add_argument("--endpoint-url", help="S3 endpoint, e.g. a local MinIO (passed as AWS_ENDPOINT_URL_S3).")
+    parser.add_argument("--runs", type=int, default=5, help="Number of launches; the median is reported.")
+    parser.add_argument("--cold", action="store_true", help="Start every run with an empty listing and profile cache.")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for the first listing.")
+    args = parser.parse_args()
+
+    results = []
+    for i in range(args.runs):
+        result = run_once(args)
+        results.append(result)
+        listing = f", first listing {result['listing'] * 1000:.0f} ms" if 'listing' in result else ''
+        print(f"run {i + 1}: window {result['window'] * 1000:.0f} ms{listing}")
+
+    print(f"median time-to-window: {statistics.median(r['window'] for r in results) * 1000:.0f} ms")
+    listings = [r['listing'] for r in results if 'listing' in r]
+    if listings:
+        print(f"median time-to-first-listing: {statistics.median(listings) * 1000:.0f} ms")
+    elif args.bucket:
+        print("no run listed any objects before the timeout")
+
+
+if __name__ == "__main__":
+    main()
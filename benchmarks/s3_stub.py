@@ -0,0 +1,334 @@
+"""In-process stand-in for the parts of the boto3 S3 client the explorer uses, with injectable latency and throttling.
+
+Objects live in memory. Every call sleeps for the configured latency, request bodies and responses
+are paced to the configured per-stream bandwidth, and a configurable fraction of calls fail with a
+503 SlowDown, so the transfer code's concurrency and throttle handling see realistic conditions
+without a network or AWS account.
+"""
+import bisect
+import datetime
+import hashlib
+import io
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from s3_transfer import TransferSettings
+
+
+class StubError(Exception):
+    """Shaped like botocore's ClientError: the error code and HTTP status are in .response."""
+
+    def __init__(self, code, status, message=''):
+        super().__init__(f"An error occurred ({code}) when calling the operation: {message or code}")
+        self.response = {'Error': {'Code': code, 'Message': message or code}, 'ResponseMetadata': {'HTTPStatusCode': status}}
+
+
+class StubTransferSettings(TransferSettings):
+    """TransferSettings whose upload config does not need boto3, for driving StubS3.upload_file."""
+
+    def config(self):
+        return SimpleNamespace(multipart_threshold=self.multipart_threshold, multipart_chunksize=self.chunk_size,
+                               max_concurrency=self.max_concurrency)
+
+
+class _Object:
+    __slots__ = ('data', 'size', 'etag', 'mtime', 'encoding')
+
+    def __init__(self, data, size, etag, mtime, encoding=None):
+        self.data = data  # None for objects created by populate(), which read back as zeros
+        self.size = size
+        self.etag = etag
+        self.mtime = mtime
+        self.encoding = encoding
+
+
+class _Body(io.BytesIO):
+    """A StreamingBody look-alike that paces reads to the stub's bandwidth."""
+
+    def __init__(self, data, stub):
+        super().__init__(data)
+        self.stub = stub
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.stub._pace(len(chunk))
+        return chunk
+
+
+class StubS3:
+    """An S3 client stand-in holding any number of buckets in memory. Buckets are created on first use."""
+
+    def __init__(self, latency=0.0, bandwidth=None, throttle_rate=0.0, seed=0):
+        self.latency = latency  # Seconds added to every call
+        self.bandwidth = bandwidth  # Bytes per second per stream, None for unlimited
+        self.throttle_rate = throttle_rate  # Fraction of calls answered with 503 SlowDown
+        self.calls = 0
+        self.throttled = 0
+        self._buckets = {}
+        self._sorted = {}  # bucket -> sorted key list, rebuilt lazily after writes
+        self._uploads = {}
+        self._upload_ids = itertools.count(1)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    # --- Plumbing ---
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+            throttled = self.throttle_rate and self._random.random() < self.throttle_rate
+            if throttled:
+                self.throttled += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if throttled:
+            raise StubError('SlowDown', 503, 'Please reduce your request rate.')
+
+    def _pace(self, amount):
+        if self.bandwidth and amount:
+            time.sleep(amount / self.bandwidth)
+
+    def _bucket(self, bucket):
+        return self._buckets.setdefault(bucket, {})
+
+    def _keys(self, bucket):
+        keys = self._sorted.get(bucket)
+        if keys is None:
+            keys = self._sorted[bucket] = sorted(self._bucket(bucket))
+        return keys
+
+    def _store(self, bucket, key, data, etag=None, encoding=None):
+        self._pace(len(data))
+        etag = etag or hashlib.md5(data).hexdigest()
+        with self._lock:
+            objects = self._bucket(bucket)
+            if key not in objects:
+                self._sorted.pop(bucket, None)
+            objects[key] = _Object(data, len(data), etag, time.time(), encoding)
+        return {'ETag': f'"{etag}"'}
+
+    def populate(self, bucket, keys, size=0):
+        """Adds metadata-only objects without going through the API, for listing and delete benchmarks."""
+        etag = hashlib.md5(b'\0' * size).hexdigest()
+        now = time.time()
+        with self._lock:
+            objects = self._bucket(bucket)
+            for key in keys:
+                objects[key] = _Object(None, size, etag, now)
+            self._sorted.pop(bucket, None)
+
+    def _get(self, bucket, key):
+        obj = self._bucket(bucket).get(key)
+        if obj is None:
+            raise StubError('NoSuchKey', 404, f"{key} does not exist")
+        return obj
+
+    # --- Listing ---
+
+    def list_objects_v2(self, Bucket, Prefix='', MaxKeys=1000, ContinuationToken=None, StartAfter=None, Delimiter=None, **kwargs):
+        self._call()
+        with self._lock:
+            keys = self._keys(Bucket)
+            objects = self._bucket(Bucket)
+            start = ContinuationToken or StartAfter or ''
+            position = bisect.bisect_right(keys, start) if start >= Prefix else bisect.bisect_left(keys, Prefix)
+            contents, prefixes, last = [], [], None
+            while position < len(keys) and len(contents) + len(prefixes) < MaxKeys:
+                key = keys[position]
+                if not key.startswith(Prefix):
+                    break
+                folder_end = key.find(Delimiter, len(Prefix)) if Delimiter else -1
+                if folder_end != -1:
+                    folder = key[:folder_end + len(Delimiter)]
+                    prefixes.append({'Prefix': folder})
+                    # Skip the rest of the folder: the next key after it sorts after folder + a maximal character
+                    position = bisect.bisect_left(keys, folder + '\U0010ffff', position)
+                    last = keys[position - 1]
+                    continue
+                obj = objects[key]
+                contents.append({'Key': key, 'Size': obj.size, 'ETag': f'"{obj.etag}"',
+                                 'LastModified': datetime.datetime.fromtimestamp(obj.mtime, datetime.timezone.utc)})
+                last = key
+                position += 1
+            truncated = position < len(keys) and keys[position].startswith(Prefix)
+        response = {'Contents': contents, 'CommonPrefixes': prefixes, 'IsTruncated': truncated, 'KeyCount': len(contents) + len(prefixes)}
+        if truncated:
+            response['NextContinuationToken'] = last
+        return response
+
+    def list_objects(self, Bucket, Prefix='', MaxKeys=1000, Marker=None, **kwargs):
+        response = self.list_objects_v2(Bucket=Bucket, Prefix=Prefix, MaxKeys=MaxKeys, StartAfter=Marker)
+        if response['IsTruncated']:
+            response['NextMarker'] = response.pop('NextContinuationToken')
+        return response
+
+    # --- Objects ---
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self._call()
+        obj = self._get(Bucket, Key)
+        head = {'ContentLength': obj.size, 'ETag': f'"{obj.etag}"',
+                'LastModified': datetime.datetime.fromtimestamp(obj.mtime, datetime.timezone.utc)}
+        if obj.encoding:
+            head['ContentEncoding'] = obj.encoding
+        return head
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None, **kwargs):
+        self._call()
+        obj = self._get(Bucket, Key)
+        if IfMatch and IfMatch.strip('"') != obj.etag:
+            raise StubError('PreconditionFailed', 412)
+        start, end = 0, obj.size - 1
+        if Range:
+            first, _, last = Range[len('bytes='):].partition('-')
+            start, end = int(first), min(int(last), obj.size - 1) if last else obj.size - 1
+        data = obj.data[start:end + 1] if obj.data is not None else bytes(end + 1 - start)
+        return {'Body': _Body(data, self), 'ContentLength': len(data), 'ETag': f'"{obj.etag}"'}
+
+    def put_object(self, Bucket, Key, Body=b'', **kwargs):
+        self._call()
+        data = Body.read() if hasattr(Body, 'read') else bytes(Body)
+        return self._store(Bucket, Key, data, encoding=kwargs.get('ContentEncoding'))
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self._call()
+        with self._lock:
+            if self._bucket(Bucket).pop(Key, None) is not None:
+                self._sorted.pop(Bucket, None)
+        return {}
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        self._call()
+        with self._lock:
+            objects = self._bucket(Bucket)
+            for item in Delete['Objects']:
+                objects.pop(item['Key'], None)
+            self._sorted.pop(Bucket, None)
+        return {'Errors': []}
+
+    def copy_object(self, Bucket, Key, CopySource, **kwargs):
+        self._call()
+        source = self._get(CopySource['Bucket'], CopySource['Key'])
+        data = source.data if source.data is not None else bytes(source.size)
+        return {'CopyObjectResult': self._store(Bucket, Key, data, etag=source.etag, encoding=source.encoding)}
+
+    # --- Multipart ---
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self._call()
+        with self._lock:
+            upload_id = f"upload-{next(self._upload_ids)}"
+            self._uploads[upload_id] = {'Bucket': Bucket, 'Key': Key, 'Parts': {}, 'ContentEncoding': kwargs.get('ContentEncoding'),
+                                        'Initiated': datetime.datetime.now(datetime.timezone.utc)}
+        return {'UploadId': upload_id}
+
+    def _upload(self, upload_id):
+        upload = self._uploads.get(upload_id)
+        if upload is None:
+            raise StubError('NoSuchUpload', 404)
+        return upload
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        self._call()
+        data = Body.read() if hasattr(Body, 'read') else bytes(Body)
+        self._pace(len(data))
+        etag = hashlib.md5(data).hexdigest()
+        with self._lock:
+            self._upload(UploadId)['Parts'][PartNumber] = (data, etag)
+        return {'ETag': f'"{etag}"'}
+
+    def upload_part_copy(self, Bucket, Key, UploadId, PartNumber, CopySource, CopySourceRange, **kwargs):
+        self._call()
+        source = self._get(CopySource['Bucket'], CopySource['Key'])
+        if 'CopySourceIfMatch' in kwargs and kwargs['CopySourceIfMatch'].strip('"') != source.etag:
+            raise StubError('PreconditionFailed', 412)
+        start, end = (int(n) for n in CopySourceRange.split('=')[1].split('-'))
+        data = source.data[start:end + 1] if source.data is not None else bytes(end + 1 - start)
+        etag = hashlib.md5(data).hexdigest()
+        with self._lock:
+            self._upload(UploadId)['Parts'][PartNumber] = (data, etag)
+        return {'CopyPartResult': {'ETag': f'"{etag}"'}}
+
+    def list_parts(self, Bucket, Key, UploadId, **kwargs):
+        self._call()
+        with self._lock:
+            parts = self._upload(UploadId)['Parts']
+            return {'Parts': [{'PartNumber': number, 'ETag': f'"{etag}"', 'Size': len(data)}
+                              for number, (data, etag) in sorted(parts.items())], 'IsTruncated': False}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self._call()
+        with self._lock:
+            parts = self._uploads.pop(UploadId, None)
+        if parts is None:
+            raise StubError('NoSuchUpload', 404)
+        chunks, digests = [], []
+        for part in MultipartUpload['Parts']:
+            data, etag = parts['Parts'][part['PartNumber']]
+            if part['ETag'].strip('"') != etag:
+                raise StubError('InvalidPart', 400)
+            chunks.append(data)
+            digests.append(bytes.fromhex(etag))
+        etag = f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+        self._store(Bucket, Key, b''.join(chunks), etag=etag, encoding=parts['ContentEncoding'])
+        return {'ETag': f'"{etag}"'}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self._call()
+        with self._lock:
+            if self._uploads.pop(UploadId, None) is None:
+                raise StubError('NoSuchUpload', 404)
+        return {}
+
+    def list_multipart_uploads(self, Bucket, Prefix='', **kwargs):
+        self._call()
+        with self._lock:
+            uploads = [{'Key': upload['Key'], 'UploadId': upload_id, 'Initiated': upload['Initiated']}
+                       for upload_id, upload in self._uploads.items() if upload['Bucket'] == Bucket and upload['Key'].startswith(Prefix)]
+        return {'Uploads': uploads, 'IsTruncated': False}
+
+    # --- Managed transfers (the boto3 injected methods) ---
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Callback=None, Config=None):
+        """Mirrors boto3's managed upload: one PUT below the threshold, parallel parts above it."""
+        size = os.path.getsize(Filename)
+        threshold = Config.multipart_threshold if Config else 8 * 1024 * 1024
+        if size < threshold:
+            with open(Filename, 'rb') as f:
+                data = f.read()
+            self.put_object(Bucket=Bucket, Key=Key, Body=data)
+            if Callback:
+                Callback(len(data))
+            return
+        chunk_size = Config.multipart_chunksize
+        upload_id = self.create_multipart_upload(Bucket=Bucket, Key=Key)['UploadId']
+
+        def send(part_number):
+            with open(Filename, 'rb') as f:
+                f.seek((part_number - 1) * chunk_size)
+                data = f.read(chunk_size)
+            etag = self.upload_part(Bucket=Bucket, Key=Key, UploadId=upload_id, PartNumber=part_number, Body=data)['ETag']
+            if Callback:
+                Callback(len(data))
+            return {'PartNumber': part_number, 'ETag': etag}
+
+        try:
+            with ThreadPoolExecutor(max_workers=Config.max_concurrency) as executor:
+                parts = list(executor.map(send, range(1, -(-size // chunk_size) + 1)))
+        except BaseException:
+            self.abort_multipart_upload(Bucket=Bucket, Key=Key, UploadId=upload_id)
+            raise
+        self.complete_multipart_upload(Bucket=Bucket, Key=Key, UploadId=upload_id, MultipartUpload={'Parts': parts})
+
+    def download_file(self, Bucket, Key, Filename, ExtraArgs=None, Callback=None, Config=None):
+        body = self.get_object(Bucket=Bucket, Key=Key)['Body']
+        with open(Filename, 'wb') as f:
+            for chunk in iter(lambda: body.read(1024 * 1024), b''):
+                f.write(chunk)
+                if Callback:
+                    Callback(len(chunk))
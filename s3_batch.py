@@ -0,0 +1,599 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from glob import glob
+from itertools import chain
+
+from s3_clients import get_client
+from s3_compress import CODECS
+from s3_copy import copy_keys
+from s3_delete import delete_keys
+from s3_journal import TransferJournal
+from s3_listing import DEFAULT_LIST_WORKERS, iter_level_pages, iter_pages
+from s3_search import glob_literal_prefix, glob_to_regex, is_glob
+from s3_sync import HashCache, SyncEngine, mirror_task, walk_files
+from s3_transfer import (DEFAULT_CHUNK_SIZE, DEFAULT_CONCURRENCY, DEFAULT_MULTIPART_THRESHOLD, DEFAULT_PART_CONCURRENCY, MB,
+                         TransferScheduler, TransferSettings, download_task, stream_download, stream_upload, upload_task)
+from s3_usage import SORT_KEYS, read_inventory, scan_prefix
+
+COMMANDS = ('ls', 'du', 'get', 'put', 'rm', 'cp', 'mv', 'sync')
+EXIT_OK = 0
+EXIT_FATAL = 1  # Nothing could be done: bad credentials, missing bucket, unreadable manifest
+EXIT_PARTIAL = 3  # Some items failed; every other item was still processed
+NAME_FIELDS = ('key', 'path', 'source', 'name')
+DEST_FIELDS = ('dest', 'destination', 'target')
+
+
+class JsonLines:
+    """Writes one JSON object per line and keeps the ok/failed tally behind the exit code."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.ok = 0
+        self.failed = 0
+
+    def write(self, record, flush=True):
+        self.stream.write(json.dumps(record, default=str) + '\n')
+        if flush:
+            self.stream.flush()
+
+    def result(self, record, error=None):
+        if error is None:
+            self.ok += 1
+            record['status'] = 'ok'
+        else:
+            self.failed += 1
+            record['status'] = 'error'
+            record['error'] = str(error)
+        self.write(record)
+
+
+# --- Inputs ---
+
+def _manifest_format(source, first_line):
+    extension = os.path.splitext(source)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson', '.json') or first_line.lstrip().startswith(('{', '"')):
+        return 'jsonl'
+    return 'lines'
+
+
+def read_manifest(source, fmt='auto'):
+    """Yields {'name', 'dest'} entries from a CSV, JSON lines or one-name-per-line manifest; '-' reads stdin.
+
+    CSV files with a header row naming a key, path or dest column are read by column name; without
+    one the first column is the name and the second the destination. JSON lines may be objects with
+    those fields or bare strings. Entries are read lazily, so a manifest of any size streams through.
+    """
+    stream = sys.stdin if source == '-' else open(source, newline='')
+    try:
+        lines = iter(stream)
+        first = next((line for line in lines if line.strip()), None)
+        if first is None:
+            return
+        fmt = _manifest_format(source, first) if fmt == 'auto' else fmt
+        lines = chain([first], lines)
+        if fmt == 'jsonl':
+            for line in lines:
+                if line.strip():
+                    value = json.loads(line)
+                    yield _entry(value) if isinstance(value, dict) else {'name': str(value), 'dest': None}
+        elif fmt == 'csv':
+            rows = csv.reader(lines)
+            header = next(rows)
+            fields = [field.strip().lower() for field in header]
+            if not any(field in NAME_FIELDS for field in fields):
+                rows, fields = chain([header], rows), None
+            for row in rows:
+                if not row:
+                    continue
+                if fields:
+                    yield _entry(dict(zip(fields, row)))
+                else:
+                    yield {'name': row[0], 'dest': row[1] if len(row) > 1 and row[1] else None}
+        else:
+            for line in lines:
+                name = line.rstrip('\r\n')
+                if name.strip():
+                    yield {'name': name, 'dest': None}
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _entry(fields):
+    name = next((fields[field] for field in NAME_FIELDS if fields.get(field)), None)
+    if name is None:
+        raise ValueError(f"Manifest entry has none of the fields {', '.join(NAME_FIELDS)}: {fields}")
+    return {'name': str(name), 'dest': next((fields[field] for field in DEST_FIELDS if fields.get(field)), None)}
+
+
+def _strip_uri(name, bucket):
+    uri = f"s3://{bucket}/"
+    return name[len(uri):] if name.startswith(uri) else name
+
+
+def expand_keys(s3_client, bucket, patterns, recursive=False, list_workers=DEFAULT_LIST_WORKERS):
+    """Yields (key, size, base) for remote patterns. size is None when the key was not listed.
+
+    Globs (matched case-sensitively, '*' crossing '/') list from their literal prefix. With
+    recursive, other patterns are folders whose contents are listed; without it they are exact keys.
+    base is the leading part of the key a download leaves out of the local path.
+    """
+    for pattern in patterns:
+        pattern = _strip_uri(pattern, bucket)
+        if is_glob(pattern):
+            literal = glob_literal_prefix(pattern)
+            regex = glob_to_regex(pattern, ignore_case=False)
+            base = literal[:literal.rfind('/') + 1]
+            for page in iter_pages(s3_client, bucket, literal, list_workers=list_workers):
+                for obj in page:
+                    if regex.fullmatch(obj['Key']):
+                        yield obj['Key'], obj['Size'], base
+        elif recursive:
+            prefix = pattern if not pattern or pattern.endswith('/') else pattern + '/'
+            for page in iter_pages(s3_client, bucket, prefix, list_workers=list_workers):
+                for obj in page:
+                    yield obj['Key'], obj['Size'], prefix
+        else:
+            yield pattern, None, pattern[:pattern.rfind('/') + 1]
+
+
+def expand_paths(sources, recursive=False):
+    """Yields (path, relative name, error) for local files, globs and, with recursive, folders."""
+    for source in sources:
+        matches = sorted(glob(source, recursive=True)) if is_glob(source) else [source]
+        if not matches:
+            yield source, None, "No local files match"
+        for match in matches:
+            if os.path.isdir(match):
+                if not recursive:
+                    yield match, None, "Is a folder; pass -r to upload its contents"
+                    continue
+                # Like the GUI's folder upload, the folder's own name becomes part of the key
+                folder_name = os.path.basename(os.path.normpath(os.path.abspath(match)))
+                for path, rel, _, _ in walk_files(match):
+                    yield path, f"{folder_name}/{rel}", None
+            elif os.path.isfile(match):
+                yield match, os.path.basename(match), None
+            else:
+                yield match, None, "Local file not found"
+
+
+def _local_path(root, relative):
+    """relative joined under root, or None when it would escape root (keys such as '../x')."""
+    path = os.path.abspath(os.path.join(root, *relative.split('/')))
+    return path if path.startswith(root + os.sep) else None
+
+
+# --- Commands ---
+
+def _run_tasks(s3_client, items, args, out):
+    """Runs (record, func) pairs through one scheduler, writing each record with its outcome as it completes."""
+    pending = {}
+
+    def tasks():
+        for item_id, (record, func) in enumerate(items):
+            pending[item_id] = record
+            yield item_id, None, func
+
+    def on_complete(item_id, error, succeeded, failed):
+        out.result(pending.pop(item_id), error)
+
+    TransferScheduler(s3_client, args.concurrency, on_complete=on_complete, keep_results=False).run(tasks())
+
+
+def cmd_ls(args, s3_client, settings, out):
+    def write_object(obj):
+        out.write({'key': obj['Key'], 'size': obj['Size'], 'last_modified': obj['LastModified'].isoformat(),
+                   'etag': obj.get('ETag', '').strip('"')}, flush=False)
+        out.ok += 1
+
+    for pattern in args.patterns or ['']:
+        pattern = _strip_uri(pattern, args.bucket)
+        if is_glob(pattern) or args.recursive:
+            regex = glob_to_regex(pattern, ignore_case=False) if is_glob(pattern) else None
+            prefix = glob_literal_prefix(pattern) if regex else pattern
+            for page in iter_pages(s3_client, args.bucket, prefix, list_workers=args.list_workers):
+                for obj in page:
+                    if regex is None or regex.fullmatch(obj['Key']):
+                        write_object(obj)
+                out.stream.flush()
+        else:
+            for folders, contents in iter_level_pages(s3_client, args.bucket, pattern):
+                for folder in folders:
+                    out.write({'prefix': folder}, flush=False)
+                for obj in contents:
+                    write_object(obj)
+                out.stream.flush()
+
+
+def cmd_du(args, s3_client, settings, out):
+    """Object count, bytes and oldest/newest modification per folder, each level sorted, from a listing or an inventory."""
+    prefix = _strip_uri(args.prefix, args.bucket)
+    if args.inventory:
+        usage = read_inventory(args.inventory, args.bucket, prefix, args.depth, args.inventory_schema)
+    else:
+        usage = scan_prefix(s3_client, args.bucket, prefix, args.depth, args.list_workers)
+    for folder, depth, folder_usage in usage.walk(sort=args.sort):
+        out.write(dict({'prefix': folder, 'depth': depth}, **folder_usage.as_dict()), flush=False)
+        out.ok += 1
+        files = usage.files.get(folder)
+        if files and usage.subfolders[folder]:
+            # Only worth a line of its own next to subfolders
+            out.write(dict({'prefix': folder, 'depth': depth + 1, 'files': True}, **files.as_dict()), flush=False)
+            out.ok += 1
+    out.stream.flush()
+
+
+def cmd_get(args, s3_client, settings, out):
+    if args.dest == '-':
+        key = _strip_uri(args.patterns[0], args.bucket)
+        return _stream(out, {'op': 'get', 'key': key, 'path': '-'}, args.dry_run,
+                       lambda: stream_download(s3_client, args.bucket, key, sys.stdout.buffer, settings, decompress=args.decompress))
+    dest_root = os.path.abspath(args.dest)
+    journal = _journal(args)
+
+    def items():
+        if args.manifest:
+            sources = ((_strip_uri(entry['name'], args.bucket), None, '', entry['dest']) for entry in read_manifest(args.manifest, args.manifest_format))
+        else:
+            sources = ((key, size, base, None) for key, size, base in expand_keys(s3_client, args.bucket, args.patterns, args.recursive, args.list_workers))
+        for key, size, base, dest in sources:
+            if key.endswith('/'):
+                continue  # Folder markers have nothing to download
+            record = {'op': 'get', 'key': key}
+            path = os.path.abspath(os.path.join(dest_root, dest)) if dest else _local_path(dest_root, key[len(base):])
+            if path is None:
+                out.result(record, "Key would be saved outside the destination folder")
+                continue
+            record['path'] = path
+            if size is not None:
+                record['bytes'] = size
+            if args.dry_run:
+                out.write(dict(record, status='planned'))
+                continue
+            yield record, _download(args.bucket, key, path, record, settings, journal, args.decompress)
+
+    _run_tasks(s3_client, items(), args, out)
+
+
+def _download(bucket, key, path, record, settings, journal, decompress=False):
+    _, _, download = download_task(bucket, key, path, settings=settings, journal=journal, decompress=decompress)
+
+    def run(s3_client):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        download(s3_client)
+        record['bytes'] = os.path.getsize(path)
+    return run
+
+
+def cmd_put(args, s3_client, settings, out):
+    prefix = _prefix(args.prefix)
+    if args.sources[:1] == ['-']:
+        key = prefix + _strip_uri(args.sources[1], args.bucket)
+        expected_size = int(args.expected_size * MB) if args.expected_size else None
+        return _stream(out, {'op': 'put', 'path': '-', 'key': key}, args.dry_run,
+                       lambda: stream_upload(s3_client, sys.stdin.buffer, args.bucket, key, settings, expected_size=expected_size,
+                                             compression=args.compress, compression_level=args.compress_level))
+    journal = _journal(args)
+
+    def items():
+        if args.manifest:
+            sources = ((entry['name'], entry['dest'] or os.path.basename(entry['name']), None)
+                       for entry in read_manifest(args.manifest, args.manifest_format))
+        else:
+            sources = expand_paths(args.sources, args.recursive)
+        for path, name, error in sources:
+            record = {'op': 'put', 'path': path}
+            if error is None and not os.path.isfile(path):
+                error = "Local file not found"
+            if error:
+                out.result(record, error)
+                continue
+            key = _strip_uri(name, args.bucket) if args.manifest and name.startswith('s3://') else prefix + name
+            record.update(key=key, bytes=os.path.getsize(path))
+            if args.dry_run:
+                out.write(dict(record, status='planned'))
+                continue
+            yield record, upload_task(path, args.bucket, key, settings=settings, journal=journal, compression=args.compress,
+                                      compression_level=args.compress_level)[2]
+
+    _run_tasks(s3_client, items(), args, out)
+
+
+def _stream(out, record, dry_run, transfer):
+    """Runs one stdin/stdout transfer. It bypasses the scheduler: a consumed stream cannot be retried whole."""
+    if dry_run:
+        out.write(dict(record, status='planned'))
+        return
+    try:
+        record['bytes'] = transfer()
+    except Exception as e:
+        out.result(record, e)
+        return
+    out.result(record)
+
+
+def cmd_rm(args, s3_client, settings, out):
+    if args.manifest:
+        keys = (_strip_uri(entry['name'], args.bucket) for entry in read_manifest(args.manifest, args.manifest_format))
+    else:
+        keys = (key for key, _, _ in expand_keys(s3_client, args.bucket, args.patterns, args.recursive, args.list_workers))
+    if args.dry_run:
+        for key in keys:
+            out.write({'op': 'rm', 'key': key, 'status': 'planned'})
+        return
+
+    def on_batch(batch, errors):
+        for key in batch:
+            out.result({'op': 'rm', 'key': key}, errors.get(key))
+
+    delete_keys(s3_client, args.bucket, keys, args.concurrency, on_batch=on_batch)
+
+
+def _copy_pairs(s3_client, args, patterns, dest, dest_bucket):
+    """(source, destination, size) for cp and mv. One exact key to a dest without a trailing '/' is a rename."""
+    if len(patterns) == 1 and not args.recursive and not is_glob(patterns[0]) and dest and not dest.endswith('/'):
+        if dest_bucket == args.bucket and dest == patterns[0]:
+            raise ValueError(f"'{dest}' would be copied onto itself")
+        yield patterns[0], dest, None
+        return
+    folder = dest if not dest or dest.endswith('/') else dest + '/'
+    if dest_bucket == args.bucket:
+        for pattern in patterns:
+            listed = glob_literal_prefix(pattern) if is_glob(pattern) else _prefix(pattern) if args.recursive else None
+            # The listing would pick up the copies it is making
+            if listed is not None and folder.startswith(listed):
+                raise ValueError(f"Cannot copy '{pattern}' into '{folder}', which it contains")
+    for key, size, base in expand_keys(s3_client, args.bucket, patterns, args.recursive, args.list_workers):
+        if not key.endswith('/') or size:
+            yield key, folder + key[len(base):], size
+
+
+def cmd_cp(args, s3_client, settings, out):
+    """cp and mv: server-side copies, with mv deleting the copied sources in batches afterwards."""
+    dest_bucket = args.dest_bucket or args.bucket
+    patterns = [_strip_uri(path, args.bucket) for path in args.paths[:-1]]
+    dest = _strip_uri(args.paths[-1], dest_bucket)
+    records = {}
+
+    def pairs():
+        # Records are keyed by the pair's position, as overlapping patterns can bring a key twice
+        index = 0
+        for source, target, size in _copy_pairs(s3_client, args, patterns, dest, dest_bucket):
+            record = {'op': args.command, 'key': source, 'dest': target}
+            if dest_bucket != args.bucket:
+                record['dest_bucket'] = dest_bucket
+            if size is not None:
+                record['bytes'] = size
+            if args.dry_run:
+                out.write(dict(record, status='planned'))
+                continue
+            records[index] = record
+            index += 1
+            yield source, target, size
+
+    def on_complete(index, error, succeeded, failed):
+        out.result(records.pop(index), error)
+
+    def on_batch(keys, errors):
+        for key in keys:
+            out.result({'op': 'rm', 'key': key}, errors.get(key))
+
+    if args.dry_run:
+        for _ in pairs():
+            pass
+        return
+    copy_keys(s3_client, args.bucket, pairs(), dest_bucket, args.concurrency, settings, move=args.command == 'mv',
+              on_complete=on_complete, on_batch=on_batch)
+
+
+def cmd_sync(args, s3_client, settings, out):
+    prefix = _prefix(args.prefix)
+    journal = _journal(args)
+    try:
+        hash_cache = HashCache()
+    except (OSError, sqlite3.Error):
+        hash_cache = None
+    engine = SyncEngine(s3_client, args.bucket, settings, hash_cache, list_workers=args.list_workers)
+    if args.download:
+        plan = engine.plan_mirror(prefix, args.local_dir, delete=args.delete)
+        items = (({'op': 'get', 'key': key, 'path': path},
+                  mirror_task(args.bucket, key, path, mtime, settings=settings, journal=journal)[2]) for key, path, mtime in plan.tasks)
+    else:
+        if not os.path.isdir(args.local_dir):
+            raise FileNotFoundError(f"Local folder '{args.local_dir}' not found")
+        plan = engine.plan_upload(args.local_dir, prefix, delete=args.delete)
+        items = (({'op': 'put', 'path': path, 'key': key},
+                  upload_task(path, args.bucket, key, settings=settings, journal=journal)[2]) for path, key in plan.tasks)
+    out.write({'op': 'plan', 'transfers': len(plan.tasks), 'unchanged': plan.unchanged, 'orphans': len(plan.orphans)})
+    if args.dry_run:
+        for record, _ in items:
+            out.write(dict(record, status='planned'))
+        for orphan in plan.orphans:
+            out.write({'op': 'rm', ('path' if args.download else 'key'): orphan, 'status': 'planned'})
+        return
+    _run_tasks(s3_client, items, args, out)
+    if not plan.orphans:
+        return
+    if args.download:
+        for path in plan.orphans:
+            try:
+                os.remove(path)
+                out.result({'op': 'rm', 'path': path})
+            except OSError as e:
+                out.result({'op': 'rm', 'path': path}, e)
+    else:
+        def on_batch(batch, errors):
+            for key in batch:
+                out.result({'op': 'rm', 'key': key}, errors.get(key))
+
+        delete_keys(s3_client, args.bucket, plan.orphans, args.concurrency, on_batch=on_batch)
+
+
+def _settings(args):
+    if not hasattr(args, 'chunk_size'):
+        # ls and rm take no transfer options, cp and mv only the part concurrency
+        return TransferSettings(max_concurrency=getattr(args, 'part_concurrency', DEFAULT_PART_CONCURRENCY))
+    return TransferSettings(multipart_threshold=int(args.multipart_threshold * MB), chunk_size=int(args.chunk_size * MB),
+                            max_concurrency=args.part_concurrency, max_bandwidth=int(args.max_bandwidth * MB))
+
+
+def _whole_bucket(pattern, recursive):
+    """True if pattern selects every key: the bucket root as a folder, or a glob of nothing but '*'."""
+    if is_glob(pattern):
+        return not pattern.strip('*')
+    return recursive and not pattern.strip('/')
+
+
+def _prefix(prefix):
+    prefix = (prefix or '').strip('/')
+    return prefix + '/' if prefix else ''
+
+
+def _journal(args):
+    return TransferJournal() if args.resume else None
+
+
+COMMAND_FUNCS = {'ls': cmd_ls, 'du': cmd_du, 'get': cmd_get, 'put': cmd_put, 'rm': cmd_rm, 'cp': cmd_cp, 'mv': cmd_cp, 'sync': cmd_sync}
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("bucket", help="Name of the S3 bucket")
+    common.add_argument("-p", "--profile", help="AWS profile name", default="default")
+    common.add_argument("--region", help="AWS region, defaults to the profile's region")
+    common.add_argument("--endpoint-url", help="S3 endpoint URL, e.g. for an S3-compatible service")
+    common.add_argument("-c", "--concurrency", type=int, help="Number of files transferred in parallel", default=DEFAULT_CONCURRENCY)
+    common.add_argument("--list-workers", type=int, default=DEFAULT_LIST_WORKERS, help="Key ranges listed in parallel, for prefixes "
+                        "with millions of keys (default: 1, one sequential listing)")
+    common.add_argument("--dry-run", action="store_true", help="Print what would be done without doing it")
+
+    transfers = argparse.ArgumentParser(add_help=False)
+    transfers.add_argument("--multipart-threshold", type=float, help="Size in MB above which files are transferred in parts", default=DEFAULT_MULTIPART_THRESHOLD / MB)
+    transfers.add_argument("--chunk-size", type=float, help="Part size in MB (minimum 5)", default=DEFAULT_CHUNK_SIZE / MB)
+    transfers.add_argument("--part-concurrency", type=int, help="Number of parts of one file transferred in parallel", default=DEFAULT_PART_CONCURRENCY)
+    transfers.add_argument("--max-bandwidth", type=float, help="Bandwidth cap in MB/s across all transfers (0 for unlimited)", default=0)
+    transfers.add_argument("--resume", action="store_true", help="Journal transfers so an interrupted one continues from its last finished part")
+
+    manifest = argparse.ArgumentParser(add_help=False)
+    manifest.add_argument("-m", "--manifest", help="CSV, JSON lines or plain list of keys (get, rm) or local paths (put) to process, '-' for stdin. "
+                          "An optional dest column gives the local path (get) or the key under --prefix (put)")
+    manifest.add_argument("--manifest-format", choices=("auto", "csv", "jsonl", "lines"), default="auto",
+                          help="Manifest format, by default from the file extension or first line")
+
+    parser = argparse.ArgumentParser(prog="s3_file_manager.py", description="Bulk S3 operations with JSON lines output. Exit status is "
+                                     f"{EXIT_OK} on success, {EXIT_PARTIAL} if some items failed and {EXIT_FATAL} if the command could not run.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ls = commands.add_parser("ls", parents=[common], help="List keys")
+    ls.add_argument("patterns", nargs="*", help="Prefixes or globs such as 'logs/2024-*.gz' (default: the bucket root)")
+    ls.add_argument("-r", "--recursive", action="store_true", help="List everything under each prefix rather than one level")
+
+    du = commands.add_parser("du", parents=[common], help="Total objects, bytes and oldest/newest modification per folder")
+    du.add_argument("prefix", nargs="?", default="", help="Folder to total (default: the bucket root)")
+    du.add_argument("-d", "--depth", type=int, default=1, help="Folder levels below the prefix to report (default: 1)")
+    du.add_argument("--sort", choices=tuple(SORT_KEYS), default="size", help="Order of the folders on each level (default: size)")
+    du.add_argument("--inventory", metavar="PATH", help="Read a local S3 Inventory (manifest.json, or a CSV or Parquet data file) "
+                    "instead of listing the bucket")
+    du.add_argument("--inventory-schema", help="Comma-separated fields of a CSV inventory with no manifest or header, "
+                    "default 'Bucket, Key, Size, LastModifiedDate'")
+
+    get = commands.add_parser("get", parents=[common, transfers, manifest], help="Download keys")
+    get.add_argument("patterns", nargs="*", help="Keys, globs, or with -r folders to download")
+    get.add_argument("-r", "--recursive", action="store_true", help="Treat non-glob patterns as folders and download their contents")
+    get.add_argument("--decompress", action="store_true", help="Save gzip or zstd encoded objects decompressed")
+    get.add_argument("-o", "--dest", default=".", help="Local folder to download into (default: current folder), or '-' to write a "
+                     "single key to stdout, with the JSON lines moved to stderr")
+
+    put = commands.add_parser("put", parents=[common, transfers, manifest], help="Upload local files")
+    put.add_argument("sources", nargs="*", help="Local files, globs, or with -r folders to upload; '- KEY' uploads stdin to KEY")
+    put.add_argument("-r", "--recursive", action="store_true", help="Upload the contents of folders")
+    put.add_argument("--prefix", default="", help="S3 folder/prefix to upload into")
+    put.add_argument("--compress", choices=CODECS, help="Compress with gzip or zstd on the way, setting Content-Encoding")
+    put.add_argument("--compress-level", type=int, help="Compression level, by default 6 for gzip and 3 for zstd")
+    put.add_argument("--expected-size", type=float, help="With '-', roughly how many MB stdin will carry, so parts are big enough "
+                     "for S3's 10,000 part limit")
+
+    rm = commands.add_parser("rm", parents=[common, manifest], help="Delete keys")
+    rm.add_argument("patterns", nargs="*", help="Keys, globs, or with -r folders to delete")
+    rm.add_argument("-r", "--recursive", action="store_true", help="Treat non-glob patterns as folders and delete their contents")
+    rm.add_argument("--all", action="store_true", help="Allow a pattern that selects the whole bucket, such as '' with -r or '*'")
+
+    copy_commands = {}
+    for name, verb in (("cp", "Copy"), ("mv", "Move")):
+        command = copy_commands[name] = commands.add_parser(name, parents=[common], help=f"{verb} keys server side, without downloading them")
+        command.add_argument("paths", nargs="*", metavar="PATH", help="Keys, globs, or with -r folders, then the destination: "
+                             "a folder ending in '/', or a new name when there is a single key")
+        command.add_argument("-r", "--recursive", action="store_true", help="Treat non-glob sources as folders and copy their contents")
+        command.add_argument("--dest-bucket", help="Bucket to copy into (default: the source bucket)")
+        command.add_argument("--part-concurrency", type=int, help="Number of parts of one object over 5 GB copied in parallel",
+                             default=DEFAULT_PART_CONCURRENCY)
+
+    sync = commands.add_parser("sync", parents=[common, transfers], help="Transfer only the new and changed files between a folder and a prefix")
+    sync.add_argument("local_dir", help="Local folder")
+    sync.add_argument("--prefix", default="", help="S3 folder/prefix")
+    sync.add_argument("--download", action="store_true", help="Mirror the prefix into the folder instead of uploading the folder")
+    sync.add_argument("--delete", action="store_true", help="Delete files missing from the source side")
+    return parser, dict(ls=ls, du=du, get=get, put=put, rm=rm, sync=sync, **copy_commands)
+
+
+def main(argv=None):
+    """Runs one batch subcommand and returns its exit status."""
+    argv = sys.argv[1:] if argv is None else argv
+    parser, commands = build_parser()
+    if not argv or argv[0] not in commands:
+        parser.parse_args(argv)  # Prints the usage, or the help for -h, and exits
+    command = commands[argv[0]]
+    # Intermixed so options may sit between patterns, e.g. "put bucket -r dir1 dir2 --prefix x"
+    args = command.parse_intermixed_args(argv[1:])
+    args.command = argv[0]
+    if args.command in ('get', 'put', 'rm') and not args.manifest and not (args.patterns if args.command != 'put' else args.sources):
+        command.error(f"{args.command} needs patterns or --manifest")
+    if args.command == 'rm' and not args.all and any(_whole_bucket(_strip_uri(pattern, args.bucket), args.recursive)
+                                                     for pattern in args.patterns):
+        command.error("that would delete every key in the bucket; pass --all if that is what you want")
+    if args.command in ('cp', 'mv') and len(args.paths) < 2:
+        command.error(f"{args.command} needs at least one source and a destination")
+    if args.command == 'put' and args.sources[:1] == ['-'] and (len(args.sources) != 2 or args.manifest or args.recursive):
+        command.error("put - uploads stdin to exactly one key: put BUCKET - KEY")
+    to_stdout = args.command == 'get' and args.dest == '-'
+    if to_stdout and (len(args.patterns) != 1 or args.manifest or args.recursive or is_glob(args.patterns[0])):
+        command.error("get -o - writes exactly one key to stdout")
+
+    out = JsonLines(sys.stderr if to_stdout else None)
+    started = time.monotonic()
+    status = EXIT_OK
+    try:
+        settings = _settings(args)
+        # An inventory is read locally, without a client or credentials
+        s3 = None if getattr(args, 'inventory', None) else get_client(args.profile, args.region, args.endpoint_url,
+                                                                        max_pool_connections=settings.pool_connections(args.concurrency))
+        COMMAND_FUNCS[args.command](args, s3, settings, out)
+    except KeyboardInterrupt:
+        status = EXIT_FATAL
+        _report_error("Interrupted")
+    except Exception as e:
+        status = EXIT_FATAL
+        _report_error(e)
+    if status == EXIT_OK and out.failed:
+        status = EXIT_PARTIAL
+    summary = {'op': 'summary', 'command': args.command, 'ok': out.ok, 'failed': out.failed,
+               'seconds': round(time.monotonic() - started, 3), 'exit': status}
+    print(json.dumps(summary), file=sys.stderr)
+    return status
+
+
+def _report_error(error):
+    message = (getattr(error, 'response', None) or {}).get('Error', {}).get('Message')
+    print(json.dumps({'op': 'error', 'error': message or str(error), 'type': type(error).__name__}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
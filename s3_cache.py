@@ -0,0 +1,148 @@
+import datetime
+import os
+import sqlite3
+import time
+
+DEFAULT_MAX_OBJECTS = 2_000_000
+DEFAULT_TTL = 7 * 24 * 3600  # Entries older than this are dropped instead of shown
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 's3_explorer')
+
+
+class ListingCache:
+    """On-disk copy of prefix listings, keyed by (profile, bucket, prefix).
+
+    Cached listings are served as list_objects_v2 style pages so callers treat them exactly like
+    a live listing. A connection is opened per call, which keeps the cache usable from any thread.
+    """
+
+    def __init__(self, path=None, max_objects=DEFAULT_MAX_OBJECTS, ttl=DEFAULT_TTL):
+        self.path = path or os.path.join(default_cache_dir(), 'listings.sqlite3')
+        self.max_objects = max_objects
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS listings (
+                    id INTEGER PRIMARY KEY,
+                    profile TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    prefix TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    object_count INTEGER NOT NULL DEFAULT 0,
+                    UNIQUE (profile, bucket, prefix)
+                );
+                CREATE TABLE IF NOT EXISTS objects (
+                    listing_id INTEGER NOT NULL,
+                    key TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    etag TEXT,
+                    PRIMARY KEY (listing_id, key)
+                ) WITHOUT ROWID;
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _listing_id(self, conn, profile, bucket, prefix):
+        row = conn.execute("SELECT id, fetched_at FROM listings WHERE profile=? AND bucket=? AND prefix=?",
+                           (profile, bucket, prefix)).fetchone()
+        if row and time.time() - row[1] > self.ttl:
+            self._drop(conn, row[0])
+            return None, None
+        return row if row else (None, None)
+
+    def fetched_at(self, profile, bucket, prefix):
+        """Returns when the listing was last revalidated, or None if it is not cached."""
+        with self._connect() as conn:
+            return self._listing_id(conn, profile, bucket, prefix)[1]
+
+    def iter_pages(self, profile, bucket, prefix, page_size=1000):
+        """Yields the cached listing in key order as pages shaped like list_objects_v2 Contents."""
+        conn = self._connect()
+        try:
+            with conn:
+                listing_id, _ = self._listing_id(conn, profile, bucket, prefix)
+                if listing_id is None:
+                    return
+                conn.execute("UPDATE listings SET last_used=? WHERE id=?", (time.time(), listing_id))
+            cursor = conn.execute("SELECT key, size, mtime, etag FROM objects WHERE listing_id=? ORDER BY key", (listing_id,))
+            while True:
+                rows = cursor.fetchmany(page_size)
+                if not rows:
+                    return
+                yield [{
+                    'Key': key,
+                    'Size': size,
+                    'LastModified': datetime.datetime.fromtimestamp(mtime, datetime.timezone.utc),
+                    'ETag': etag,
+                } for key, size, mtime, etag in rows]
+        finally:
+            conn.close()
+
+    def revalidate(self, profile, bucket, prefix, pages, cancel_event=None, on_page=None):
+        """Streams a live listing into the cache, rewriting only rows whose ETag, size or mtime changed.
+
+        Pages are staged in a temporary table as they arrive and applied in one short transaction at
+        the end, so other windows and processes can keep writing the cache during a long listing.
+        Returns the number of added, changed or removed objects, or None if the listing was cancelled,
+        in which case the cached copy is left untouched.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS staged (key TEXT PRIMARY KEY, size INTEGER, mtime REAL, etag TEXT) WITHOUT ROWID")
+            conn.execute("DELETE FROM temp.staged")
+            count = 0
+            for page in pages:
+                rows = [(obj['Key'], obj['Size'], obj['LastModified'].timestamp(), obj.get('ETag')) for obj in page]
+                # Only the connection's own temporary database is written, which locks nothing other writers need
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO temp.staged (key, size, mtime, etag) VALUES (?, ?, ?, ?)", rows)
+                count += len(rows)
+                if on_page:
+                    on_page(page)
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            with conn:
+                now = time.time()
+                conn.execute("""INSERT INTO listings (profile, bucket, prefix, fetched_at, last_used) VALUES (?, ?, ?, ?, ?)
+                                ON CONFLICT (profile, bucket, prefix) DO NOTHING""", (profile, bucket, prefix, 0, now))
+                listing_id = conn.execute("SELECT id FROM listings WHERE profile=? AND bucket=? AND prefix=?",
+                                          (profile, bucket, prefix)).fetchone()[0]
+                changes_before = conn.total_changes
+                # 'WHERE true' lets the upsert clause follow a SELECT without being parsed as a join
+                conn.execute("""INSERT INTO objects (listing_id, key, size, mtime, etag) SELECT ?, key, size, mtime, etag FROM temp.staged WHERE true
+                                ON CONFLICT (listing_id, key) DO UPDATE SET size=excluded.size, mtime=excluded.mtime, etag=excluded.etag
+                                WHERE objects.etag IS NOT excluded.etag OR objects.size != excluded.size OR objects.mtime != excluded.mtime""",
+                             (listing_id,))
+                conn.execute("DELETE FROM objects WHERE listing_id=? AND key NOT IN (SELECT key FROM temp.staged)", (listing_id,))
+                changed = conn.total_changes - changes_before
+                conn.execute("UPDATE listings SET fetched_at=?, last_used=?, object_count=? WHERE id=?", (now, now, count, listing_id))
+                self._evict(conn)
+            return changed
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _drop(self, conn, listing_id):
+        conn.execute("DELETE FROM objects WHERE listing_id=?", (listing_id,))
+        conn.execute("DELETE FROM listings WHERE id=?", (listing_id,))
+
+    def _evict(self, conn):
+        expired = conn.execute("SELECT id FROM listings WHERE fetched_at < ?", (time.time() - self.ttl,)).fetchall()
+        for (listing_id,) in expired:
+            self._drop(conn, listing_id)
+        # Keep the most recently used listings that fit under the object cap
+        total = 0
+        for listing_id, object_count in conn.execute("SELECT id, object_count FROM listings ORDER BY last_used DESC").fetchall():
+            total += object_count
+            if total > self.max_objects:
+                self._drop(conn, listing_id)
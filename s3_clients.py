@@ -0,0 +1,74 @@
+import threading
+
+DEFAULT_POOL_CONNECTIONS = 10
+# The retry budget. botocore only rides out blips: 3 attempts per call, with standard mode's backoff
+# and no client-side rate limiting of its own to fight TransferScheduler's AdaptiveLimiter, which
+# then hears of a throttle after at most 3 attempts. Sustained throttling is the scheduler's: it
+# halves its concurrency and retries the task up to max_throttle_retries (5) times, so a throttled
+# scheduled request makes at most 3 x 6 = 18 HTTP attempts, and an unscheduled call 3.
+RETRY_CONFIG = {'mode': 'standard', 'max_attempts': 3}
+
+
+class ClientFactory:
+    """Hands out S3 clients cached per (profile, region, endpoint) so reconnecting reuses warm connections.
+
+    Sessions are cached per profile, so credentials are resolved once. A cached client is reused as
+    long as its connection pool is at least as large as the caller asks for; a larger request
+    replaces it with a bigger pool.
+    """
+
+    def __init__(self, retries=None, connect_timeout=10, read_timeout=60):
+        self.retries = retries or RETRY_CONFIG
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._sessions = {}
+        self._clients = {}  # (profile, region, endpoint) -> (client, pool size)
+        self._lock = threading.Lock()
+
+    def session(self, profile=None):
+        with self._lock:
+            return self._session(profile)
+
+    def _session(self, profile):
+        session = self._sessions.get(profile)
+        if session is None:
+            import boto3
+            session = self._sessions[profile] = boto3.Session(profile_name=profile or None)
+        return session
+
+    def client(self, profile=None, region=None, endpoint_url=None, max_pool_connections=DEFAULT_POOL_CONNECTIONS):
+        key = (profile, region, endpoint_url)
+        with self._lock:
+            cached = self._clients.get(key)
+            if cached and cached[1] >= max_pool_connections:
+                return cached[0]
+            from botocore.config import Config
+            config = Config(max_pool_connections=max_pool_connections, retries=dict(self.retries), tcp_keepalive=True,
+                            connect_timeout=self.connect_timeout, read_timeout=self.read_timeout)
+            client = self._session(profile).client('s3', region_name=region, endpoint_url=endpoint_url, config=config)
+            self._clients[key] = (client, max_pool_connections)
+            return client
+
+    def forget(self, profile):
+        """Drops a profile's session and clients, e.g. after its credentials were edited."""
+        with self._lock:
+            self._sessions.pop(profile, None)
+            for key in [key for key in self._clients if key[0] == profile]:
+                del self._clients[key]
+
+
+def preload_sdk():
+    """Imports boto3 and the S3 pieces we use, so a background thread can pay for them before the first connect."""
+    import boto3
+    import boto3.s3.transfer
+    import botocore.config
+    import botocore.exceptions
+    boto3.Session().get_available_profiles()  # Loads botocore's data loader and the shared config
+
+
+_default_factory = ClientFactory()
+
+
+def get_client(profile=None, region=None, endpoint_url=None, max_pool_connections=DEFAULT_POOL_CONNECTIONS):
+    """A client from the process-wide factory."""
+    return _default_factory.client(profile, region, endpoint_url, max_pool_connections)
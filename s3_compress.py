@@ -0,0 +1,112 @@
+import zlib
+
+CODECS = ('gzip', 'zstd')
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3}
+READ_SIZE = 1024 * 1024  # Uncompressed bytes fed to the compressor per step
+
+
+def _zstd():
+    """The zstd module: the standard library's from Python 3.14, otherwise the zstandard package."""
+    try:
+        from compression import zstd
+        return zstd, True
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd compression needs Python 3.14 or the zstandard package (pip install zstandard)") from None
+    return zstandard, False
+
+
+def compressor(codec, level=None):
+    """An object with compress(data) and flush() producing one gzip member or zstd frame."""
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    if codec == 'gzip':
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+    if codec == 'zstd':
+        zstd, stdlib = _zstd()
+        return zstd.ZstdCompressor(level=level) if stdlib else zstd.ZstdCompressor(level=level).compressobj()
+    raise ValueError(f"Unknown compression '{codec}', expected one of {', '.join(CODECS)}")
+
+
+def decompressor(codec):
+    """An object with decompress(data), eof and unused_data for one gzip member or zstd frame."""
+    if codec == 'gzip':
+        return zlib.decompressobj(31)
+    if codec == 'zstd':
+        zstd, stdlib = _zstd()
+        return zstd.ZstdDecompressor() if stdlib else zstd.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unknown compression '{codec}', expected one of {', '.join(CODECS)}")
+
+
+def codec_for_encoding(content_encoding):
+    """The codec named by an object's Content-Encoding, or None when it is stored as is."""
+    for encoding in (content_encoding or '').lower().replace(' ', '').split(','):
+        if encoding in ('gzip', 'x-gzip'):
+            return 'gzip'
+        if encoding == 'zstd':
+            return 'zstd'
+    return None
+
+
+class CompressingReader:
+    """Reads a binary stream as its compressed form, compressing only as far ahead as the reader asks.
+
+    callback gets the uncompressed byte counts as they are consumed, so progress stays in terms of
+    the source's own size.
+    """
+
+    def __init__(self, stream, codec, level=None, callback=None):
+        self.codec = codec
+        self.callback = callback
+        self._stream = stream
+        self._compressor = compressor(codec, level)
+        self._buffer = bytearray()
+        self._finished = False
+
+    def read(self, size=-1):
+        while (size < 0 or len(self._buffer) < size) and not self._finished:
+            data = self._stream.read(READ_SIZE)
+            if data:
+                self._buffer += self._compressor.compress(data)
+                if self.callback:
+                    self.callback(len(data))
+            else:
+                self._buffer += self._compressor.flush()
+                self._finished = True
+        size = len(self._buffer) if size < 0 else size
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+class DecompressingWriter:
+    """Binary writer that decompresses what is written to it into another stream.
+
+    Concatenated gzip members and zstd frames, as written by pigz and friends, are decoded in turn.
+    """
+
+    def __init__(self, stream, codec):
+        self.stream = stream
+        self.codec = codec
+        self._decompressor = decompressor(codec)
+
+    def write(self, data):
+        written = len(data)
+        while data:
+            self.stream.write(self._decompressor.decompress(data))
+            if not self._decompressor.eof:
+                break
+            data = self._decompressor.unused_data
+            if data:
+                self._decompressor = decompressor(self.codec)
+        return written
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        """Checks the compressed data was complete; a truncated object would otherwise pass silently."""
+        if not self._decompressor.eof:
+            raise IOError(f"Compressed {self.codec} data ended early")
@@ -0,0 +1,96 @@
+import posixpath
+
+from s3_delete import MAX_DELETE_BATCH, delete_keys
+from s3_listing import DEFAULT_LIST_WORKERS, iter_objects
+from s3_transfer import DEFAULT_CONCURRENCY, TransferScheduler, copy_task
+
+
+def destination_key(source, dest, single=False):
+    """Where source lands under dest.
+
+    A dest ending in '/' is a folder the source keeps its name in; for a single source any other
+    dest is its new name.
+    """
+    if single and dest and not dest.endswith('/'):
+        return dest.rstrip('/') + '/' if source.endswith('/') else dest
+    folder = dest if not dest or dest.endswith('/') else dest + '/'
+    return folder + posixpath.basename(source.rstrip('/')) + ('/' if source.endswith('/') else '')
+
+
+def copy_pairs(s3_client, bucket, sources, dest_bucket, dest, cancel_event=None, list_workers=DEFAULT_LIST_WORKERS):
+    """An iterator of (source key, destination key, size) for keys and prefixes (ending in '/') copied to dest.
+
+    A prefix is listed page by page and everything under it is copied to the same relative place
+    under its destination prefix, so a huge tree streams through without being listed up front.
+    size is None for plain keys, which are not listed. Raises ValueError for a copy onto or into itself.
+    """
+    sources = list(sources)
+    targets = [destination_key(source, dest, len(sources) == 1) for source in sources]
+    # Checked before anything is copied, rather than failing half way through
+    for source, target in zip(sources, targets):
+        if bucket == dest_bucket and (target == source or source.endswith('/') and target.startswith(source)):
+            raise ValueError(f"Cannot copy '{source}' onto or into itself ('{target}')")
+    return _iter_pairs(s3_client, bucket, sources, targets, cancel_event, list_workers)
+
+
+def _iter_pairs(s3_client, bucket, sources, targets, cancel_event, list_workers):
+    for source, target in zip(sources, targets):
+        if source.endswith('/'):
+            for obj in iter_objects(s3_client, bucket, source, cancel_event=cancel_event, list_workers=list_workers):
+                yield obj['Key'], target + obj['Key'][len(source):], obj['Size']
+        else:
+            yield source, target, None
+
+
+def copy_keys(s3_client, bucket, pairs, dest_bucket, max_concurrency=DEFAULT_CONCURRENCY, settings=None, move=False, cancel_event=None,
+              on_complete=None, on_copy=None, on_batch=None):
+    """Copies (source, destination, size) pairs server side in parallel. Returns (copied, failed, deleted) counts.
+
+    With move, each MAX_DELETE_BATCH sources copied are deleted in one DeleteObjects batch straight
+    away, so memory stays flat however big the prefix and a cancelled move leaves no copied source
+    behind; sources whose copy failed are left alone. on_complete(index, error, succeeded, failed)
+    follows each copy like TransferScheduler's, with the pair's position in pairs, since overlapping
+    patterns can bring the same source twice. on_copy(source, dest) is called for each successful
+    copy and on_batch(sources, {source: error}) for each batch of a move's deletes, each source once.
+    """
+    counts = {'copied': 0, 'failed': 0, 'deleted': 0}
+    in_flight = {}  # Pair index -> (source, dest), copies in flight only
+    to_delete = {}  # Copied sources awaiting their batch, in order and without repeats
+
+    def delete_batch(batch_cancel_event):
+        batch = list(to_delete)
+        to_delete.clear()
+
+        def batch_done(keys, errors):
+            counts['deleted'] += len(keys) - len(errors)
+            counts['failed'] += len(errors)
+            if on_batch:
+                on_batch(keys, {key: f"Copied, but the source could not be deleted: {error}" for key, error in errors.items()})
+
+        delete_keys(s3_client, bucket, batch, 1, cancel_event=batch_cancel_event, on_batch=batch_done, keep_results=False)
+
+    def tasks():
+        for index, (source, dest, size) in enumerate(pairs):
+            in_flight[index] = source, dest
+            yield (index,) + copy_task(bucket, source, dest_bucket, dest, size=size, settings=settings)[1:]
+
+    def copy_complete(index, error, succeeded, failed):
+        source, dest = in_flight.pop(index)
+        if error is None:
+            counts['copied'] += 1
+            if on_copy:
+                on_copy(source, dest)
+            if move:
+                to_delete[source] = None
+        else:
+            counts['failed'] += 1
+        if on_complete:
+            on_complete(index, error, succeeded, failed)
+        if len(to_delete) >= MAX_DELETE_BATCH:
+            delete_batch(cancel_event)
+
+    TransferScheduler(s3_client, max_concurrency, cancel_event=cancel_event, on_complete=copy_complete, keep_results=False).run(tasks())
+    if to_delete:
+        # Even after a cancel: these sources are already copied, and a move must not leave both behind
+        delete_batch(None)
+    return counts['copied'], counts['failed'], counts['deleted']
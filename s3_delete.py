@@ -0,0 +1,78 @@
+import threading
+
+from s3_listing import DEFAULT_LIST_WORKERS, iter_objects
+from s3_transfer import DEFAULT_CONCURRENCY, TransferScheduler
+
+MAX_DELETE_BATCH = 1000  # DeleteObjects accepts at most 1,000 keys per request
+
+
+def iter_batches(keys, batch_size=MAX_DELETE_BATCH):
+    batch = []
+    for key in keys:
+        batch.append(key)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def delete_keys(s3_client, bucket, keys, max_concurrency=DEFAULT_CONCURRENCY, batch_size=MAX_DELETE_BATCH, cancel_event=None, on_progress=None,
+                on_batch=None, keep_results=True):
+    """Deletes keys through concurrent delete_objects batches and returns (deleted keys, {key: error}).
+
+    on_batch(keys, {key: error}) is called as each batch finishes, for reporting results as they arrive.
+    Without keep_results both are returned empty and only on_batch sees the keys.
+    """
+    deleted = []
+    failed = {}
+    counts = {'deleted': 0, 'failed': 0}
+    pending = {}  # Keys of the batches still in flight, so a whole-batch failure can be reported per key
+    batch_errors = {}
+    lock = threading.Lock()
+
+    def delete_task(batch_id, batch):
+        def run(s3_client):
+            response = s3_client.delete_objects(
+                Bucket=bucket,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+            )
+            # Quiet mode only reports the keys that could not be deleted
+            errors = {error['Key']: f"{error.get('Code')}: {error.get('Message')}" for error in response.get('Errors', [])}
+            with lock:
+                counts['deleted'] += len(batch) - len(errors)
+                counts['failed'] += len(errors)
+                if keep_results:
+                    deleted.extend(key for key in batch if key not in errors)
+                    failed.update(errors)
+                batch_errors[batch_id] = errors
+        return batch_id, None, run
+
+    def tasks():
+        for batch_id, batch in enumerate(iter_batches(keys, batch_size)):
+            pending[batch_id] = batch
+            yield delete_task(batch_id, batch)
+
+    def on_complete(batch_id, error, succeeded, failed_batches):
+        batch = pending.pop(batch_id)
+        with lock:
+            errors = batch_errors.pop(batch_id, {})
+            if error is not None:
+                errors = {key: str(error) for key in batch}
+                counts['failed'] += len(errors)
+                if keep_results:
+                    failed.update(errors)
+            if on_progress:
+                on_progress(counts['deleted'], counts['failed'])
+        if on_batch:
+            on_batch(batch, errors)
+
+    TransferScheduler(s3_client, max_concurrency, cancel_event=cancel_event, on_complete=on_complete).run(tasks())
+    return deleted, failed
+
+
+def delete_prefix(s3_client, bucket, prefix, list_workers=DEFAULT_LIST_WORKERS, **kwargs):
+    """Deletes everything under prefix, feeding keys from the paginated (optionally sharded) listing straight into delete batches."""
+    cancel_event = kwargs.get('cancel_event')
+    keys = (obj['Key'] for obj in iter_objects(s3_client, bucket, prefix, cancel_event=cancel_event, list_workers=list_workers))
+    return delete_keys(s3_client, bucket, keys, **kwargs)
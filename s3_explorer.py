@@ -1,9 +1,32 @@
-import boto3
 import os
+import sqlite3
+import sys
+import time
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
+from tkinter import filedialog, messagebox, simpledialog, ttk
 import tkinter.font as tkFont
-from botocore.exceptions import NoCredentialsError, ProfileNotFound
+from s3_cache import ListingCache
+from s3_clients import ClientFactory, preload_sdk
+from s3_compress import CODECS
+from s3_copy import copy_keys, copy_pairs
+from s3_delete import delete_keys, delete_prefix
+from s3_journal import TransferJournal
+from s3_listing import DEFAULT_LIST_WORKERS, iter_level_pages, iter_pages
+from s3_listview import MTIME, NAME, SIZE, FolderTree, ObjectListModel, VirtualTreeview
+from s3_metrics import Profiler, TransferMetrics, summarize
+from s3_preview import PreviewPane, RangeCache, read_range
+from s3_profiles import list_profiles
+from s3_results import TransferLog, TransferLogModel, iter_records
+from s3_search import ListFilter, parse_size, parse_time
+from s3_sync import HashCache, SyncEngine, mirror_task
+from s3_transfer import DEFAULT_CONCURRENCY, MB, TransferScheduler, TransferSettings, download_task, upload_task
+from s3_usage import format_size, read_inventory, scan_prefix
+from s3_watch import FolderWatcher
+from s3_workers import JobRunner
+
+SORT_COLUMNS = {"Name": NAME, "Size (Bytes)": SIZE, "Last Modified": MTIME}
+FILTER_DEBOUNCE_MS = 150
+PREVIEW_DEBOUNCE_MS = 60  # Long enough to skip the rows an arrow key races past
 
 class S3ClientGUI:
     def __init__(self, master):
@@ -37,12 +60,29 @@ class S3ClientGUI:
         self._create_theme_toggle_button(master)
 
         self.default_profile = 'default'
-        self.available_profiles = self._get_available_profiles()
+        self.available_profiles = []  # Filled in by a background job so the window does not wait on the AWS files
         self.current_profile = tk.StringVar(master)
-        self.current_profile.set(self.default_profile if self.default_profile in self.available_profiles else self.available_profiles[0] if self.available_profiles else '')
         self.bucket_name = tk.StringVar(master)
         self.s3_client = None
-        self.current_objects = []
+        self.clients = ClientFactory()  # Keeps each profile's client, and its open connections, across reconnects
+        self.object_list = ObjectListModel()
+        self.list_job = None
+        self.metrics = TransferMetrics()  # Request latencies, retries and throughput, shown in the Transfer Stats window
+        self.profiler = Profiler()
+        self.stats_window = None
+        try:
+            self.listing_cache = ListingCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Listing cache disabled: {e}", file=sys.stderr)
+            self.listing_cache = None
+        try:
+            self.hash_cache = HashCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Hash cache disabled: {e}", file=sys.stderr)
+            self.hash_cache = None
+        self.job_runner = JobRunner(master)
+        self.job_rows = {}
+        master.protocol("WM_DELETE_WINDOW", self._on_close)
 
         # Profile Selection
         ttk.Label(master, text="AWS Profile:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
@@ -55,6 +95,20 @@ class S3ClientGUI:
         self.bucket_entry = ttk.Entry(master, textvariable=self.bucket_name)
         self.bucket_entry.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
 
+        # Filter Bar (narrows the listed keys as you type; globs such as *.jpg match the whole name)
+        self.filter_frame = ttk.Frame(master)
+        self.filter_frame.grid(row=1, column=2, columnspan=4, padx=5, pady=5, sticky="ew")
+        self.filter_vars = {}
+        for column, (name, label, width) in enumerate((("query", "Filter:", 24), ("min_size", "Min Size:", 8),
+                                                       ("max_size", "Max Size:", 8), ("newer_than", "Newer Than:", 12))):
+            ttk.Label(self.filter_frame, text=label).grid(row=0, column=column * 2, padx=(5, 2), sticky="w")
+            var = tk.StringVar(master)
+            var.trace_add("write", self._schedule_filter)
+            ttk.Entry(self.filter_frame, textvariable=var, width=width).grid(row=0, column=column * 2 + 1, sticky="ew")
+            self.filter_vars[name] = var
+        self.filter_frame.grid_columnconfigure(1, weight=1)
+        self.filter_after_id = None
+
         # S3 Root Folder Entry
         ttk.Label(master, text="S3 Root Folder (optional, e.g., 'myfolder/'):").grid(row=2, column=0, padx=5, pady=5, sticky="w")
         self.s3_root_prefix_entry = ttk.Entry(master)
@@ -64,18 +118,83 @@ class S3ClientGUI:
         self.connect_button = ttk.Button(master, text="Connect to S3", command=self._connect_s3)
         self.connect_button.grid(row=2, column=2, padx=5, pady=5, sticky="ew")
 
+        # Transfer Stats Button (live request and throughput metrics, with export and profiling)
+        self.stats_button = ttk.Button(master, text="Transfer Stats...", command=self._show_stats)
+        self.stats_button.grid(row=2, column=3, padx=5, pady=5, sticky="ew")
+
         self.s3_root_prefix = ''
 
-        # File List
-        self.tree = ttk.Treeview(master, columns=("Name", "Size (Bytes)", "Last Modified"), show="headings")
+        # Parallel Transfers
+        ttk.Label(master, text="Parallel Transfers:").grid(row=3, column=0, padx=5, pady=5, sticky="w")
+        self.transfer_concurrency = tk.IntVar(master, value=DEFAULT_CONCURRENCY)
+        self.concurrency_spinbox = ttk.Spinbox(master, from_=1, to=128, textvariable=self.transfer_concurrency, width=6)
+        self.concurrency_spinbox.grid(row=3, column=1, padx=5, pady=5, sticky="w")
+
+        # Part size, per-object concurrency and bandwidth cap for each transfer
+        self.transfer_settings = TransferSettings()
+        # Very large prefixes list faster split into key ranges listed side by side
+        self.list_workers = DEFAULT_LIST_WORKERS
+        self.resumable_transfers = tk.BooleanVar(master, value=False)
+        self.sync_uploads = tk.BooleanVar(master, value=True)
+        # Uploaded folders keep being watched for changes until their job is cancelled
+        self.keep_in_sync = tk.BooleanVar(master, value=False)
+        # File and folder uploads can be compressed on the way; sync compares sizes, so the dialog turns it off for them
+        self.upload_compression = tk.StringVar(master, value="none")
+        self.sync_before_compression = None  # (sync_uploads, keep_in_sync) to restore when compression is turned off again
+        self.decompress_downloads = tk.BooleanVar(master, value=False)
+        self.transfer_journal = None
+        self.transfer_settings_button = ttk.Button(master, text="Transfer Settings...", command=self._edit_transfer_settings)
+        self.transfer_settings_button.grid(row=3, column=3, padx=5, pady=5, sticky="ew")
+
+        # Preview Pane (the start of the selected object, fetched with ranged reads and kept in a byte-range cache)
+        self.show_preview = tk.BooleanVar(master, value=False)
+        self.preview_check = ttk.Checkbutton(master, text="Preview", variable=self.show_preview, command=self._toggle_preview)
+        self.preview_check.grid(row=2, column=4, padx=5, pady=5, sticky="w")
+        self.preview = PreviewPane(master, self._load_preview_range)
+        self.preview.set_colors(self.text_color, self.background)
+        self.range_cache = RangeCache()
+        self.preview_after_id = None
+
+        # Folder View (browse one level at a time instead of listing everything under the root folder)
+        self.folder_view = tk.BooleanVar(master, value=False)
+        self.folder_view_check = ttk.Checkbutton(master, text="Folder View", variable=self.folder_view, command=self._toggle_folder_view)
+        self.folder_view_check.grid(row=3, column=2, padx=5, pady=5, sticky="w")
+        self.folder_tree = FolderTree(master, self._expand_folder, self._open_folder)
+
+        # Mirror Button (downloads only the new and changed files under the root folder)
+        self.mirror_button = ttk.Button(master, text="Mirror to Local...", command=self._mirror_folder, state=tk.DISABLED)
+        self.mirror_button.grid(row=3, column=4, padx=5, pady=5, sticky="ew")
+
+        # Delete Prefix Button (removes everything under a folder without listing it into the tree first)
+        self.delete_prefix_button = ttk.Button(master, text="Delete Folder...", command=self._delete_prefix, state=tk.DISABLED)
+        self.delete_prefix_button.grid(row=3, column=5, padx=5, pady=5, sticky="ew")
+
+        # Folder Sizes Button (object count, bytes and age per folder under the root folder, from a listing or an S3 Inventory)
+        self.usage_button = ttk.Button(master, text="Folder Sizes...", command=self._show_usage, state=tk.DISABLED)
+        self.usage_button.grid(row=0, column=3, padx=5, pady=5, sticky="ew")
+
+        # Copy / Move Button (server-side copies of the selected files and folders, also on the list's right-click menu)
+        self.copy_button = ttk.Button(master, text="Copy / Move...", command=self._copy_selected, state=tk.DISABLED)
+        self.copy_button.grid(row=2, column=5, padx=5, pady=5, sticky="ew")
+
+        # File List (virtualized: only the rows on screen exist in the Treeview)
+        self.file_list = VirtualTreeview(master, self.object_list, columns=("Name", "Size (Bytes)", "Last Modified"))
+        self.tree = self.file_list.tree
         self.tree.heading("Name", text="Name", command=lambda: self._sort_column(self.tree, "Name", False))
         self.tree.heading("Size (Bytes)", text="Size (Bytes)", command=lambda: self._sort_column(self.tree, "Size (Bytes)", False))
         self.tree.heading("Last Modified", text="Last Modified", command=lambda: self._sort_column(self.tree, "Last Modified", False))
         self.tree.column("Name", minwidth=0, stretch=True)  # Set a minimum width and allow stretching
         self.tree.column("Size (Bytes)", width=50, anchor="e")  # Set a fixed width and right-align
         self.tree.column("Last Modified", width=150)      # Set a fixed width
-        self.tree.grid(row=4, column=0, columnspan=6, padx=5, pady=5, sticky="nsew")
+        self.file_list.grid(row=4, column=0, columnspan=6, padx=5, pady=5, sticky="nsew")
         self.tree.bind("<Double-1>", self._download_selected_file)
+        self.tree.bind("<<TreeviewSelect>>", self._schedule_preview, add="+")
+        self.copy_menu = tk.Menu(self.tree, tearoff=0)
+        self.copy_menu.add_command(label="Copy To...", command=lambda: self._copy_selected(move=False))
+        self.copy_menu.add_command(label="Move To...", command=lambda: self._copy_selected(move=True))
+        self.copy_menu.add_command(label="Rename...", accelerator="F2", command=self._rename_selected)
+        self.tree.bind("<Button-3>", lambda event: self.s3_client and self.copy_menu.tk_popup(event.x_root, event.y_root))
+        self.tree.bind("<F2>", self._rename_selected)
 
         # Buttons
         self.download_button = ttk.Button(master, text="Download", command=self._download_selected_file, state=tk.DISABLED)
@@ -96,6 +215,67 @@ class S3ClientGUI:
         self.refresh_button = ttk.Button(master, text="Refresh", command=self._list_objects, state=tk.DISABLED)
         self.refresh_button.grid(row=5, column=5, padx=5, pady=5, sticky="ew")
 
+        # Background Jobs (one row per running job with its progress and a cancel button)
+        self.jobs_frame = ttk.Frame(master)
+        self.jobs_frame.grid(row=6, column=0, columnspan=6, padx=5, pady=5, sticky="ew")
+        self.jobs_frame.grid_columnconfigure(1, weight=1)
+
+        # Importing the AWS SDK and reading the profile files both happen after the window is up
+        self.job_runner.submit("Loading AWS SDK", lambda job: preload_sdk())
+        self.job_runner.submit("Reading AWS profiles", lambda job: self._get_available_profiles(), on_result=self._on_profiles_loaded)
+
+    def _on_profiles_loaded(self, job, profiles):
+        self.available_profiles = profiles
+        self.profile_menu.config(values=profiles)
+        if not self.current_profile.get():
+            self.current_profile.set(self.default_profile if self.default_profile in profiles else profiles[0] if profiles else '')
+
+    def _on_close(self):
+        self.job_runner.shutdown()
+        self.master.destroy()
+
+    def _start_job(self, title, func, *args, on_data=None, on_result=None, on_error=None, on_done=None):
+        """Runs func(job, *args) off the Tk thread with a progress bar and cancel button in the jobs panel."""
+        def start(job):
+            label = ttk.Label(self.jobs_frame, text=title)
+            progress = ttk.Progressbar(self.jobs_frame, mode="indeterminate", length=200)
+            cancel = ttk.Button(self.jobs_frame, text="Cancel", command=job.cancel)
+            row = job.id  # Rows only need to be unique, gaps are harmless
+            label.grid(row=row, column=0, padx=5, pady=2, sticky="w")
+            progress.grid(row=row, column=1, padx=5, pady=2, sticky="ew")
+            cancel.grid(row=row, column=2, padx=5, pady=2, sticky="e")
+            progress.start(15)
+            self.job_rows[job.id] = (label, progress, cancel)
+
+        def progress(job, done, total, text):
+            label, bar, _ = self.job_rows[job.id]
+            if total:
+                if bar.cget("mode") != "determinate":
+                    bar.stop()
+                    bar.config(mode="determinate")
+                bar.config(maximum=total, value=done)
+            if text:
+                label.config(text=f"{title}: {text}")
+
+        def done(job):
+            for widget in self.job_rows.pop(job.id, ()):
+                widget.destroy()
+            if on_done:
+                on_done(job)
+
+        def error(job, e):
+            if on_error:
+                on_error(job, e)
+            else:
+                messagebox.showerror("Error", f"{title} failed: {e}")
+
+        def run(job, *job_args):
+            # Worker threads predate any profiling session, so each job runs under the profiler itself
+            return self.profiler.run(func, job, *job_args)
+
+        return self.job_runner.submit(title, run, *args, on_start=start, on_progress=progress, on_data=on_data,
+                                      on_result=on_result, on_error=error, on_done=done)
+
     def _create_theme_toggle_button(self, master):
         style = ttk.Style()
         font_size = 12
@@ -130,24 +310,33 @@ class S3ClientGUI:
     def _sort_column(self, tv, col, reverse):
         """Sorts the treeview based on the clicked column."""
         try:
-            data = [(tv.set(child, col), child) for child in tv.get_children('')]
-
-            # Sort based on the column type
-            if col == "Size (Bytes)":
-                data.sort(key=lambda s: int(s[0]), reverse=reverse)
-            elif col == "Last Modified":
-                data.sort(key=lambda s: s[0], reverse=reverse) # Assuming string comparison is sufficient
-            else:
-                data.sort(key=lambda s: s[0].lower(), reverse=reverse)
-
-            for index, (val, child) in enumerate(data):
-                tv.move(child, '', index)
+            # Sorts the in-memory column arrays, then redraws only the rows on screen
+            self.object_list.sort_by(SORT_COLUMNS[col], reverse)
+            self.file_list.top = 0
+            self.file_list.refresh()
 
             # Switch the sort order for the next click
             tv.heading(col, command=lambda: self._sort_column(tv, col, not reverse))
         except Exception as e:
             messagebox.showerror("Sorting Error", f"Error during sorting: {e}")
 
+    def _schedule_filter(self, *_):
+        # Debounced so a burst of keystrokes costs one search once typing pauses
+        if self.filter_after_id is not None:
+            self.master.after_cancel(self.filter_after_id)
+        self.filter_after_id = self.master.after(FILTER_DEBOUNCE_MS, self._apply_filter)
+
+    def _apply_filter(self):
+        self.filter_after_id = None
+        values = {name: var.get().strip() for name, var in self.filter_vars.items()}
+        try:
+            list_filter = ListFilter(values["query"], min_size=parse_size(values["min_size"]), max_size=parse_size(values["max_size"]),
+                                     newer_than=parse_time(values["newer_than"]))
+        except ValueError:
+            return  # Half-typed sizes and dates are ignored until they parse
+        self.object_list.set_filter(list_filter)
+        self.file_list.reset_view()
+
     def _toggle_theme(self):
         self.dark_mode_on = not self.dark_mode_on
         if self.dark_mode_on:
@@ -175,6 +364,7 @@ class S3ClientGUI:
 
         for widget in master.winfo_children():
             self._apply_text_bg_to_widget(widget, text_color, background)
+        self.preview.set_colors(text_color, background)
 
     def _apply_text_bg_to_widget(self, widget, text_color, background):
         try:
@@ -193,18 +383,7 @@ class S3ClientGUI:
             pass
 
     def _get_available_profiles(self):
-        config_path = os.path.join(os.path.expanduser('~'), '.aws', 'credentials')
-        profiles = []
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                content = f.read()
-                import configparser
-                config = configparser.ConfigParser()
-                config.read_string(content)
-                profiles = config.sections()
-                if 'default' in config:
-                    profiles.insert(0, 'default')
-        return sorted(list(set(profiles)))
+        return list_profiles()
 
     def _connect_s3(self, event=None):
         profile_name = self.current_profile.get()
@@ -215,16 +394,18 @@ class S3ClientGUI:
         if not bucket:
             messagebox.showerror("Error", "Please enter the S3 bucket name.")
             return
+        from botocore.exceptions import NoCredentialsError, ProfileNotFound  # Deferred with the rest of the SDK
 
-        try:
-            session = boto3.Session(profile_name=profile_name)
-            self.s3_client = session.client('s3')
-            list_result = self._list_objects()
+        def on_listed(list_result):
             if list_result == True:
                 self.download_button.config(state=tk.NORMAL)
                 self.upload_button.config(state=tk.NORMAL)
                 self.upload_folder_button.config(state=tk.NORMAL)
                 self.delete_button.config(state=tk.NORMAL)
+                self.delete_prefix_button.config(state=tk.NORMAL)
+                self.copy_button.config(state=tk.NORMAL)
+                self.usage_button.config(state=tk.NORMAL)
+                self.mirror_button.config(state=tk.NORMAL)
                 self.create_folder_button.config(state=tk.NORMAL, command=self._create_s3_folder)
                 self.refresh_button.config(state=tk.NORMAL, command=self._refresh_object_list)
                 messagebox.showinfo("Success", f"Connected to bucket '{bucket}' using profile '{profile_name}' with root folder '{self.s3_root_prefix}'.")
@@ -232,6 +413,16 @@ class S3ClientGUI:
                 self._disable_buttons()
                 self.refresh_button.config(state=tk.DISABLED, command=None)
                 self.create_folder_button.config(state=tk.DISABLED, command=None)
+
+        try:
+            # One pooled client is shared by every transfer, so give it a connection per parallel part of each transfer
+            pool_connections = self.transfer_settings.pool_connections(self._get_transfer_concurrency())
+            self.s3_client = self.clients.client(profile_name, max_pool_connections=pool_connections)
+            self.metrics.attach(self.s3_client)
+            self.range_cache.clear()  # Blocks are keyed by bucket and key, which another profile or endpoint may reuse
+            self.preview.clear()
+            self._reset_folder_tree()
+            self._list_objects(on_complete=on_listed)
         except ProfileNotFound:
             messagebox.showerror("Error", f"AWS profile '{profile_name}' not found in your credentials file.")
             self.s3_client = None
@@ -251,6 +442,288 @@ class S3ClientGUI:
             self._disable_buttons()
             self.refresh_button.config(state=tk.DISABLED, command=None)
 
+    def _get_transfer_concurrency(self):
+        try:
+            return max(1, int(self.transfer_concurrency.get()))
+        except (tk.TclError, ValueError):
+            return DEFAULT_CONCURRENCY
+
+    def _edit_transfer_settings(self):
+        settings = self.transfer_settings
+        dialog = tk.Toplevel(self.master)
+        dialog.title("Transfer Settings")
+
+        fields = [
+            ("Multipart threshold (MB):", settings.multipart_threshold / MB),
+            ("Part size (MB, min 5):", settings.chunk_size / MB),
+            ("Parallel parts per file:", settings.max_concurrency),
+            ("Bandwidth cap (MB/s, 0 = unlimited):", (settings.max_bandwidth or 0) / MB),
+            ("Listing workers (1 = sequential):", self.list_workers),
+        ]
+        entries = []
+        for row, (label, value) in enumerate(fields):
+            ttk.Label(dialog, text=label).grid(row=row, column=0, padx=5, pady=5, sticky="w")
+            entry = ttk.Entry(dialog, width=10)
+            entry.insert(0, f"{value:g}")
+            entry.grid(row=row, column=1, padx=5, pady=5, sticky="ew")
+            entries.append(entry)
+        ttk.Checkbutton(dialog, text="Resumable transfers (journal parts so a retry continues where it stopped)",
+                        variable=self.resumable_transfers).grid(row=len(fields), column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        sync_check = ttk.Checkbutton(dialog, text="Folder uploads only send new and changed files", variable=self.sync_uploads)
+        sync_check.grid(row=len(fields) + 1, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        keep_check = ttk.Checkbutton(dialog, text="Keep uploaded folders in sync (upload changed files until the job is cancelled)",
+                                     variable=self.keep_in_sync)
+        keep_check.grid(row=len(fields) + 2, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        ttk.Label(dialog, text="Compress uploads:").grid(row=len(fields) + 3, column=0, padx=5, pady=5, sticky="w")
+        compression_box = ttk.Combobox(dialog, textvariable=self.upload_compression, values=("none",) + CODECS, state="readonly", width=8)
+        compression_box.grid(row=len(fields) + 3, column=1, padx=5, pady=5, sticky="ew")
+        compression_note = ttk.Label(dialog, text="Sync compares sizes and ETags with the local files, so compressed folder uploads "
+                                                  "send every file and cannot be kept in sync.", wraplength=400)
+        ttk.Checkbutton(dialog, text="Decompress gzip and zstd encoded objects when downloading",
+                        variable=self.decompress_downloads).grid(row=len(fields) + 5, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+
+        # The variables are the live settings, so closing without Save puts these back
+        opened_with = (self.upload_compression.get(), self.sync_uploads.get(), self.keep_in_sync.get(), self.sync_before_compression)
+        saved = tk.BooleanVar(self.master, value=False)
+
+        def on_compression(*_):
+            # Sync would silently send the files uncompressed, so choosing a codec turns it off until compression is off again
+            if self._get_upload_compression():
+                if self.sync_before_compression is None:
+                    self.sync_before_compression = (self.sync_uploads.get(), self.keep_in_sync.get())
+                self.sync_uploads.set(False)
+                self.keep_in_sync.set(False)
+                sync_check.state(["disabled"])
+                keep_check.state(["disabled"])
+                compression_note.grid(row=len(fields) + 4, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+            else:
+                if self.sync_before_compression is not None:
+                    sync_uploads, keep_in_sync = self.sync_before_compression
+                    self.sync_uploads.set(sync_uploads)
+                    self.keep_in_sync.set(keep_in_sync)
+                    self.sync_before_compression = None
+                sync_check.state(["!disabled"])
+                keep_check.state(["!disabled"])
+                compression_note.grid_remove()
+
+        compression_box.bind("<<ComboboxSelected>>", on_compression)
+        on_compression()
+
+        def save():
+            try:
+                threshold, chunk_size, part_concurrency, bandwidth, list_workers = (float(entry.get()) for entry in entries)
+            except ValueError:
+                messagebox.showerror("Error", "Transfer settings must be numbers.", parent=dialog)
+                return
+            self.transfer_settings = TransferSettings(multipart_threshold=int(threshold * MB), chunk_size=int(chunk_size * MB),
+                                                      max_concurrency=int(part_concurrency), max_bandwidth=int(bandwidth * MB))
+            self.list_workers = max(1, int(list_workers))
+            saved.set(True)
+            dialog.destroy()
+
+        save_button = ttk.Button(dialog, text="Save", command=save)
+        save_button.grid(row=len(fields) + 6, column=0, columnspan=2, padx=5, pady=10)
+
+        dialog.transient(self.master)
+        dialog.grab_set()
+        self.master.wait_window(dialog)
+        if not saved.get():
+            compression, sync_uploads, keep_in_sync, self.sync_before_compression = opened_with
+            self.upload_compression.set(compression)
+            self.sync_uploads.set(sync_uploads)
+            self.keep_in_sync.set(keep_in_sync)
+
+    def _get_upload_compression(self):
+        compression = self.upload_compression.get()
+        return compression if compression in CODECS else None
+
+    def _get_transfer_journal(self):
+        """The journal to pass to transfers, or None when resumable transfers are off or the journal cannot be opened."""
+        if not self.resumable_transfers.get():
+            return None
+        if self.transfer_journal is None:
+            try:
+                self.transfer_journal = TransferJournal()
+            except (OSError, sqlite3.Error) as e:
+                messagebox.showerror("Error", f"Transfer journal unavailable, transfers will not be resumable: {e}")
+                self.resumable_transfers.set(False)
+        return self.transfer_journal if self.resumable_transfers.get() else None
+
+    def _show_stats(self):
+        """Live request latencies, retries, throttles and throughput, refreshed every second while the window is open."""
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            return
+        top = self.stats_window = tk.Toplevel(self.master)
+        top.title("Transfer Stats")
+
+        columns = ("Requests", "Errors", "Retries", "Throttles", "p50 ms", "p90 ms", "p99 ms")
+        table = ttk.Treeview(top, columns=columns, height=10)
+        table.heading("#0", text="Operation")
+        table.column("#0", width=180)
+        for column in columns:
+            table.heading(column, text=column)
+            table.column(column, width=80, anchor="e")
+        table.grid(row=0, column=0, columnspan=5, padx=5, pady=5, sticky="nsew")
+        summary = ttk.Label(top, justify="left")
+        summary.grid(row=1, column=0, columnspan=5, padx=5, pady=5, sticky="w")
+        top.grid_columnconfigure(0, weight=1)
+        top.grid_rowconfigure(0, weight=1)
+
+        last = {'time': None, 'bytes': None}
+
+        def refresh():
+            if not top.winfo_exists():
+                return
+            snapshot = self.metrics.snapshot()
+            table.delete(*table.get_children())
+            for name, stats in snapshot['requests'].items():
+                quantiles = [f"{stats[q] * 1000:.0f}" if stats[q] is not None else "" for q in ('p50', 'p90', 'p99')]
+                table.insert("", tk.END, text=name, values=(stats['count'], stats['errors'], stats['retries'], stats['throttles'], *quantiles))
+
+            now = time.monotonic()
+            moved = {direction: stats['bytes'] for direction, stats in snapshot['transfers'].items()}
+            lines = []
+            for direction, stats in snapshot['transfers'].items():
+                rate = max(0, moved[direction] - last['bytes'][direction]) / (now - last['time']) if last['time'] else 0
+                median = stats['median_bytes_per_second']
+                lines.append(f"{direction.title()}s: {stats['count']} done, {stats['failed']} failed, {stats['bytes'] / MB:.1f} MB, "
+                             f"now {rate / MB:.2f} MB/s" + (f", median {median / MB:.2f} MB/s per file" if median is not None else ""))
+            lines.append(f"Transfers retried after throttling: {snapshot['task_retries']}")
+            lines.append(f"Listing: {snapshot['list']['pages']} pages, {snapshot['list']['keys']} keys")
+            summary.config(text="\n".join(lines))
+            last.update(time=now, bytes=moved)
+            top.after(1000, refresh)
+
+        def toggle_profiling():
+            if not self.profiler.running:
+                self.profiler.start()
+                profile_button.config(text="Stop Profiling")
+                return
+            profile_button.config(text="Start Profiling")
+            stats = self.profiler.stop()
+            if stats is None:
+                messagebox.showinfo("Profile", "Nothing was recorded.", parent=top)
+                return
+            path = filedialog.asksaveasfilename(parent=top, title="Save profile (Cancel to only view it)", defaultextension=".prof",
+                                                filetypes=[("cProfile output", "*.prof")])
+            if path:
+                stats.dump_stats(path)
+            self._show_long_message("Profile", summarize(stats))
+
+        def export(fmt, extension):
+            path = filedialog.asksaveasfilename(parent=top, defaultextension=extension, filetypes=[(fmt, f"*{extension}")])
+            if path:
+                try:
+                    self.metrics.write(path, fmt)
+                except OSError as e:
+                    messagebox.showerror("Error", f"Could not write {path}: {e}", parent=top)
+
+        profile_button = ttk.Button(top, text="Stop Profiling" if self.profiler.running else "Start Profiling", command=toggle_profiling)
+        profile_button.grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        ttk.Button(top, text="Export JSON...", command=lambda: export("json", ".json")).grid(row=2, column=1, padx=5, pady=5)
+        ttk.Button(top, text="Export Prometheus...", command=lambda: export("prometheus", ".prom")).grid(row=2, column=2, padx=5, pady=5)
+        ttk.Button(top, text="Reset", command=self.metrics.reset).grid(row=2, column=3, padx=5, pady=5)
+        ttk.Button(top, text="Close", command=top.destroy).grid(row=2, column=4, padx=5, pady=5)
+        refresh()
+
+    def _show_usage(self):
+        """Folder sizes under the root folder. Drilling down and re-sorting reuse the totals already gathered."""
+        s3_client, bucket, root, list_workers = self.s3_client, self.bucket_name.get(), self.s3_root_prefix, self.list_workers
+        top = tk.Toplevel(self.master)
+        top.title(f"Folder Sizes - s3://{bucket}/{root}")
+        state = {'usage': None, 'folder': root, 'sort': 'size', 'job': None}
+
+        path_label = ttk.Label(top)
+        path_label.grid(row=0, column=0, columnspan=4, padx=5, pady=5, sticky="w")
+        columns = ("Objects", "Size", "Share", "Oldest", "Newest")
+        table = ttk.Treeview(top, columns=columns, height=16)
+        scrollbar = ttk.Scrollbar(top, orient="vertical", command=table.yview)
+        table.configure(yscrollcommand=scrollbar.set)
+        table.heading("#0", text="Folder", command=lambda: resort('name'))
+        table.column("#0", width=260)
+        for column, sort in zip(columns, ('count', 'size', 'size', 'oldest', 'newest')):
+            table.heading(column, text=column, command=lambda sort=sort: resort(sort))
+            table.column(column, width=140 if column in ("Oldest", "Newest") else 90, anchor="e")
+        table.grid(row=1, column=0, columnspan=4, padx=(5, 0), pady=5, sticky="nsew")
+        scrollbar.grid(row=1, column=4, pady=5, sticky="ns")
+        top.grid_columnconfigure(0, weight=1)
+        top.grid_rowconfigure(1, weight=1)
+
+        def when(timestamp):
+            return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(timestamp)) if timestamp is not None else ""
+
+        def show():
+            usage, folder = state['usage'], state['folder']
+            table.delete(*table.get_children())
+            if usage is None:
+                return
+            total = usage.folders[folder]
+            path_label.config(text=f"s3://{bucket}/{folder}: {total.count} objects, {format_size(total.size)}")
+            rows = usage.children(folder, state['sort'])
+            if folder in usage.files and rows:
+                rows.append(("(files)", usage.files[folder]))
+            for name, folder_usage in rows:
+                share = f"{folder_usage.size / total.size:.1%}" if total.size else ""
+                table.insert("", tk.END, iid=name, text=name[len(folder):] if name in usage.folders else name,
+                             values=(folder_usage.count, format_size(folder_usage.size), share, when(folder_usage.oldest), when(folder_usage.newest)))
+            up_button.config(state=tk.NORMAL if folder != usage.root else tk.DISABLED)
+
+        def resort(sort):
+            state['sort'] = sort
+            show()
+
+        def drill_down(event=None):
+            selection = table.selection()
+            if state['usage'] and selection and selection[0] in state['usage'].folders:
+                state['folder'] = selection[0]
+                show()
+
+        def go_up():
+            folder = state['folder']
+            state['folder'] = max(folder[:folder.rstrip('/').rfind('/') + 1], root, key=len)
+            show()
+
+        def gather(title, func):
+            if state['job']:
+                state['job'].cancel()
+
+            def on_result(job, usage):
+                if job.cancelled or not top.winfo_exists():
+                    return
+                state.update(usage=usage, folder=root)
+                show()
+
+            state['job'] = self._start_job(title, func, on_result=on_result)
+
+        def rescan():
+            def scan(job):
+                return scan_prefix(s3_client, bucket, root, list_workers=list_workers, cancel_event=job.cancel_event,
+                                   on_page=lambda usage: job.progress(usage.total.count, text=f"{usage.total.count} objects"))
+
+            gather(f"Totalling s3://{bucket}/{root}", scan)
+
+        def load_inventory():
+            path = filedialog.askopenfilename(parent=top, title="S3 Inventory manifest.json, CSV or Parquet file",
+                                              filetypes=[("S3 Inventory", "*.json *.csv *.gz *.parquet"), ("All files", "*")])
+            if not path:
+                return
+
+            def read(job):
+                return read_inventory(path, bucket, root, cancel_event=job.cancel_event,
+                                      on_progress=lambda usage: job.progress(usage.total.count, text=f"{usage.total.count} objects"))
+
+            gather(f"Reading inventory {os.path.basename(path)}", read)
+
+        table.bind("<Double-1>", drill_down)
+        table.bind("<Return>", drill_down)
+        up_button = ttk.Button(top, text="Up", command=go_up, state=tk.DISABLED)
+        up_button.grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        ttk.Button(top, text="Rescan", command=rescan).grid(row=2, column=1, padx=5, pady=5)
+        ttk.Button(top, text="Load Inventory...", command=load_inventory).grid(row=2, column=2, padx=5, pady=5)
+        ttk.Button(top, text="Close", command=top.destroy).grid(row=2, column=3, padx=5, pady=5)
+        rescan()
+
     def _refresh_object_list(self):
         bucket = self.bucket_name.get()
         self.s3_root_prefix = self.s3_root_prefix_entry.get().strip()
@@ -267,6 +740,100 @@ class S3ClientGUI:
             messagebox.showerror("Error", "Not connected to S3. Please connect first.")
 
 
+    def _toggle_folder_view(self):
+        if self.folder_view.get():
+            self.folder_tree.grid(row=4, column=0, padx=5, pady=5, sticky="nsew")
+            self.file_list.grid(row=4, column=1, columnspan=5, padx=5, pady=5, sticky="nsew")
+        else:
+            self.folder_tree.grid_remove()
+            self.file_list.grid(row=4, column=0, columnspan=6, padx=5, pady=5, sticky="nsew")
+        if self.s3_client and self.bucket_name.get():
+            self._reset_folder_tree()
+            self._list_objects()
+
+    def _toggle_preview(self):
+        if self.show_preview.get():
+            self.preview.grid(row=4, column=6, padx=5, pady=5, sticky="nsew")
+            self.master.grid_columnconfigure(6, weight=1)
+            self._schedule_preview()
+        else:
+            self.preview.grid_remove()
+            self.preview.clear()
+            self.master.grid_columnconfigure(6, weight=0)
+
+    def _schedule_preview(self, event=None):
+        if not self.show_preview.get():
+            return
+        if self.preview_after_id is not None:
+            self.master.after_cancel(self.preview_after_id)
+        self.preview_after_id = self.master.after(PREVIEW_DEBOUNCE_MS, self._preview_selected)
+
+    def _preview_selected(self):
+        self.preview_after_id = None
+        indices = self.file_list.selection_indices()
+        if len(indices) != 1 or not self.s3_client:
+            self.preview.clear("Select one object to preview it." if indices else "")
+            return
+        index = indices[0]
+        name, size, mtime = self.object_list.names[index], self.object_list.sizes[index], self.object_list.mtimes[index]
+        if name.endswith('/'):
+            self.preview.clear(f"'{name}' is a folder.")
+            return
+        # The listing's size and mtime version the cached blocks, so an overwritten object is fetched afresh
+        target = (self.bucket_name.get(), f"{self.s3_root_prefix}{name}", size, mtime)
+        if target != self.preview.target:
+            self.preview.begin(target, name, size)
+
+    def _load_preview_range(self, target, start, length):
+        """Feeds the preview pane from the range cache, or from a ranged GET in the background on a miss."""
+        bucket, key, size, mtime = target
+        data = read_range(None, bucket, key, (size, mtime), size, start, length, self.range_cache)
+        if data is not None:
+            self.preview.append(target, data)
+            return
+        s3_client = self.s3_client
+        # Submitted straight to the runner: previews are too short-lived to earn a row in the jobs panel
+        self.job_runner.submit(f"Previewing s3://{bucket}/{key}",
+                               lambda job: read_range(s3_client, bucket, key, (size, mtime), size, start, length, self.range_cache),
+                               on_result=lambda job, data: self.preview.append(target, data),
+                               on_error=lambda job, e: self.preview.fail(target, e))
+
+    def _reset_folder_tree(self):
+        self.folder_tree.reset(self.s3_root_prefix, f"s3://{self.bucket_name.get()}/{self.s3_root_prefix}")
+
+    def _open_folder(self, prefix):
+        if prefix == self.s3_root_prefix:
+            return
+        self.s3_root_prefix = prefix
+        self.s3_root_prefix_entry.delete(0, tk.END)
+        self.s3_root_prefix_entry.insert(0, prefix)
+        self._list_objects()
+
+    def _expand_folder(self, prefix):
+        """Fetches the subfolders of a node the first time it is opened in the folder pane."""
+        s3_client, bucket = self.s3_client, self.bucket_name.get()
+        if not s3_client:
+            self.folder_tree.finish_load(prefix, complete=False)
+            return
+
+        def list_folders(job):
+            for folders, _ in iter_level_pages(s3_client, bucket, prefix, cancel_event=job.cancel_event):
+                if folders:
+                    job.emit(folders)
+
+        def on_folders(job, folders):
+            self.folder_tree.add_folders(prefix, folders)
+
+        def on_result(job, _):
+            self.folder_tree.finish_load(prefix, complete=not job.cancelled)
+
+        def on_error(job, e):
+            self.folder_tree.finish_load(prefix, complete=False)
+            messagebox.showerror("Error", f"Failed to list folders under '{prefix}': {e}")
+
+        self._start_job(f"Listing folders in s3://{bucket}/{prefix}", list_folders, on_data=on_folders,
+                        on_result=on_result, on_error=on_error)
+
     def _show_long_message(self, title, message):
         top = tk.Toplevel(self.master)
         top.title(title)
@@ -287,50 +854,136 @@ class S3ClientGUI:
         self.upload_button.config(state=tk.DISABLED)
         self.upload_folder_button.config(state=tk.DISABLED)
         self.delete_button.config(state=tk.DISABLED)
+        self.delete_prefix_button.config(state=tk.DISABLED)
+        self.copy_button.config(state=tk.DISABLED)
+        self.usage_button.config(state=tk.DISABLED)
+        self.mirror_button.config(state=tk.DISABLED)
         self.refresh_button.config(state=tk.DISABLED)
 
     def _clear_file_list(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self.current_objects = []
+        self.file_list.clear()
+
+    def _selected_names(self):
+        return [self.object_list.names[index] for index in self.file_list.selection_indices()]
 
-    def _list_objects(self):
+    def _list_objects(self, on_complete=None):
         if not self.s3_client or not self.bucket_name.get():
             messagebox.showerror("Error", "Not connected to S3 or bucket name is missing.")
             return
+        if self.list_job:
+            self.list_job.cancel()  # A newer listing supersedes the one still streaming in
 
         self._clear_file_list()
-        items = []  # Initialize items list here to ensure it always exists
-        try:
-            response = self.s3_client.list_objects_v2(Bucket=self.bucket_name.get(), Prefix=self.s3_root_prefix)
-            if 'Contents' in response:
-                self.current_objects = response['Contents']
-                for obj in self.current_objects:
-                    key = obj['Key']
-                    if self.s3_root_prefix and key.startswith(self.s3_root_prefix):
-                        display_key = key[len(self.s3_root_prefix):]
-                        if display_key: # Don't show if it's just the prefix
-                            size = obj['Size']
-                            last_modified = obj['LastModified'].strftime('%Y-%m-%d %H:%M:%S')
-                            items.append((display_key, size, last_modified))
-                    elif not self.s3_root_prefix:
-                        size = obj['Size']
-                        last_modified = obj['LastModified'].strftime('%Y-%m-%d %H:%M:%S')
-                        items.append((key, size, last_modified))
+        s3_client, bucket, prefix = self.s3_client, self.bucket_name.get(), self.s3_root_prefix
+        cache, profile = self.listing_cache, self.current_profile.get()
+        folder_view, list_workers = self.folder_view.get(), self.list_workers
+        if folder_view:
+            if prefix not in self.folder_tree:
+                self._reset_folder_tree()
+            self.folder_tree.begin_load(prefix)
+            self.folder_tree.select(prefix)
+
+        def list_level(job):
+            # One Delimiter request per page fills both the file list and this node's subfolders
+            listed = 0
+            for folders, page in iter_level_pages(s3_client, bucket, prefix, cancel_event=job.cancel_event):
+                if folders:
+                    job.emit(('folders', folders))
+                if page:
+                    job.emit(('page', page))
+                listed += len(folders) + len(page)
+                job.progress(listed, text=f"{listed} entries")
+            return listed
+
+        def list_live(job, use_cache):
+            listed = 0
+
+            def emit_page(page):
+                nonlocal listed
+                job.emit(('page', page))
+                listed += len(page)
+                job.progress(listed, text=f"{listed} objects")
+
+            pages = iter_pages(s3_client, bucket, prefix, cancel_event=job.cancel_event, list_workers=list_workers)
+            if use_cache:
+                cache.revalidate(profile, bucket, prefix, pages, cancel_event=job.cancel_event, on_page=emit_page)
             else:
+                for page in pages:
+                    emit_page(page)
+            return listed
+
+        def list_pages(job):
+            if folder_view:
+                return list_level(job)
+            if not cache:
+                return list_live(job, use_cache=False)
+            try:
+                if cache.fetched_at(profile, bucket, prefix) is None:
+                    return list_live(job, use_cache=True)
+
+                # Show the cached copy straight away, then check it against S3 in the background
+                cached = 0
+                for page in cache.iter_pages(profile, bucket, prefix):
+                    job.emit(('page', page))
+                    cached += len(page)
+                job.progress(cached, text=f"{cached} cached objects, revalidating")
+                pages = iter_pages(s3_client, bucket, prefix, cancel_event=job.cancel_event, list_workers=list_workers)
+                changed = cache.revalidate(profile, bucket, prefix, pages, cancel_event=job.cancel_event)
+                if not changed:
+                    return cached
+                job.emit(('reset', None))
+                listed = 0
+                for page in cache.iter_pages(profile, bucket, prefix):
+                    job.emit(('page', page))
+                    listed += len(page)
+                return listed
+            except sqlite3.Error as e:
+                print(f"Listing cache unavailable, listing from S3: {e}", file=sys.stderr)
+                job.emit(('reset', None))
+                return list_live(job, use_cache=False)
+
+        def on_page(job, data):
+            # Rows are inserted page by page so the first results show up without waiting for the whole prefix
+            if job is not self.list_job:
+                return
+            kind, page = data
+            if kind == 'reset':
+                self._clear_file_list()
+                return
+            if kind == 'folders':
+                self.folder_tree.add_folders(prefix, page)
+                return
+            self.object_list.append_page(page, prefix)
+            self.file_list.rows_added()
+
+        def on_result(job, listed):
+            if folder_view:
+                self.folder_tree.finish_load(prefix, complete=not job.cancelled)
+            if job is not self.list_job:
+                return
+            list_result = True
+            if not listed and not job.cancelled:
                 messagebox.showinfo("Info", "Bucket is empty or prefix not found.")
-                return "empty"
-
-            # Clear existing items before re-inserting
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            for item in items:
-                self.tree.insert("", tk.END, values=item)
-            return True
-        except Exception as e:
+                list_result = "empty"
+            if on_complete:
+                on_complete(list_result)
+
+        def on_error(job, e):
+            if folder_view:
+                self.folder_tree.finish_load(prefix, complete=False)
+            if job is not self.list_job:
+                return
             messagebox.showerror("Error", f"Failed to list objects: {e}")
-            return False
-        
+            if on_complete:
+                on_complete(False)
+
+        def on_done(job):
+            if job is self.list_job:
+                self.list_job = None
+
+        self.list_job = self._start_job(f"Listing s3://{bucket}/{prefix}", list_pages, on_data=on_page,
+                                        on_result=on_result, on_error=on_error, on_done=on_done)
+
     def _create_s3_folder(self):
         if not self.s3_client or not self.bucket_name.get():
             messagebox.showerror("Error", "Not connected to S3 or bucket name is missing.")
@@ -346,15 +999,21 @@ class S3ClientGUI:
         def create():
             new_folder_name = folder_name_entry.get().strip()
             if new_folder_name:
-                s3_key = f"{self.s3_root_prefix}{new_folder_name}/"
-                try:
-                    self.s3_client.put_object(Bucket=self.bucket_name.get(), Key=s3_key)
-                    messagebox.showinfo("Success", f"Folder '{new_folder_name}' created at '{self.s3_root_prefix}'.")
+                s3_client, bucket, prefix = self.s3_client, self.bucket_name.get(), self.s3_root_prefix
+                s3_key = f"{prefix}{new_folder_name}/"
+
+                def put_folder(job):
+                    s3_client.put_object(Bucket=bucket, Key=s3_key)
+
+                def on_result(job, _):
+                    messagebox.showinfo("Success", f"Folder '{new_folder_name}' created at '{prefix}'.")
                     self._refresh_object_list()
-                except Exception as e:
+
+                def on_error(job, e):
                     messagebox.showerror("Error", f"Failed to create folder: {e}")
-                finally:
-                    create_folder_dialog.destroy()
+
+                create_folder_dialog.destroy()
+                self._start_job(f"Creating folder {s3_key}", put_folder, on_result=on_result, on_error=on_error)
             else:
                 messagebox.showerror("Error", "Folder name cannot be empty.")
 
@@ -366,11 +1025,7 @@ class S3ClientGUI:
         self.master.wait_window(create_folder_dialog)
 
     def _download_selected_file(self, event=None):
-        selected_items = self.tree.selection()
-        if not selected_items:
-            return
-
-        files_to_download = [self.tree.item(item)['values'][0] for item in selected_items]
+        files_to_download = self._selected_names()
         if not files_to_download:
             return
 
@@ -378,43 +1033,127 @@ class S3ClientGUI:
         if not destination_folder:
             return  # User cancelled directory selection
 
-        successful_downloads = []
-        failed_downloads = {}
-
-        for file_key_display in files_to_download:
-            s3_key_full = f"{self.s3_root_prefix}{file_key_display}" if self.s3_root_prefix else file_key_display
-            save_path = os.path.join(destination_folder, os.path.basename(file_key_display))
-            try:
-                self.s3_client.download_file(self.bucket_name.get(), s3_key_full, save_path)
-                successful_downloads.append(f"{file_key_display} -> {save_path}")
-            except Exception as e:
-                failed_downloads[file_key_display] = str(e)
-
-        if successful_downloads:
-            self._show_long_message("Download Success", "Successfully downloaded the following files:\n" + "\n".join(successful_downloads))
+        s3_client, bucket, prefix = self.s3_client, self.bucket_name.get(), self.s3_root_prefix
+        concurrency = self._get_transfer_concurrency()
+        settings, journal = self.transfer_settings, self._get_transfer_journal()
+        decompress = self.decompress_downloads.get()
+
+        def download(job, item):
+            return download_task(bucket, item['key'], item['path'], settings=settings, journal=journal,
+                                 Callback=lambda _: job.check_cancelled(), metrics=self.metrics, decompress=decompress)
+
+        items = ({'key': f"{prefix}{name}", 'path': os.path.join(destination_folder, os.path.basename(name))} for name in files_to_download)
+        self._run_logged_transfers(s3_client, f"Downloading {len(files_to_download)} file(s)", "download", items, download,
+                                   concurrency, total=len(files_to_download))
+
+    def _run_logged_transfers(self, s3_client, title, op, items, make_task, concurrency, total=None, refresh=False, after=None):
+        """Runs make_task(job, item) for every item dict through the scheduler, streaming each result to a transfer log.
+
+        Only counters stay in memory however many items there are. after(job, log), if given, runs once
+        the transfers are done, to log follow-up work into the same log. The results window reads the
+        log back and retries failures through this same method.
+        """
+        def run(job):
+            with TransferLog.create(op) as log:
+                pending = {}
+
+                def tasks():
+                    for item_id, item in enumerate(items):
+                        pending[item_id] = item
+                        yield item_id, None, make_task(job, item)[2]
+
+                def on_complete(item_id, error, succeeded, failed):
+                    log.result(pending.pop(item_id), error)
+                    done = succeeded + failed
+                    job.progress(done, total, f"{done}/{total} files" if total else f"{succeeded} done, {failed} failed")
+
+                scheduler = TransferScheduler(s3_client, concurrency, cancel_event=job.cancel_event, on_complete=on_complete, metrics=self.metrics,
+                                              keep_results=False)
+                scheduler.run(tasks())
+                if after:
+                    after(job, log)
+            return log
+
+        def retry(records, count):
+            self._run_logged_transfers(s3_client, f"Retrying {count} failed {op}(s)", op, records, make_task, concurrency, count, refresh)
+
+        def on_result(job, log):
+            self._show_transfer_results(title, log, retry)
+            if refresh:
+                self._list_objects()
+
+        self._start_job(title, run, on_result=on_result)
+
+    def _run_logged_deletes(self, s3_client, bucket, title, delete, concurrency, total=None):
+        """Runs delete(job, on_batch), a delete_keys or delete_prefix call, logging each key's outcome as its batch finishes."""
+        def run(job):
+            with TransferLog.create('delete') as log:
+                def on_batch(keys, errors):
+                    for key in keys:
+                        log.result({'key': key}, errors.get(key))
+                    job.progress(log.ok + log.failed, total, f"{log.ok} deleted, {log.failed} failed")
+
+                delete(job, on_batch)
+            return log
+
+        def retry(records, count):
+            def delete_again(job, on_batch):
+                return delete_keys(s3_client, bucket, (record['key'] for record in records), concurrency, cancel_event=job.cancel_event,
+                                   on_batch=on_batch, keep_results=False)
+
+            self._run_logged_deletes(s3_client, bucket, f"Retrying {count} failed delete(s)", delete_again, concurrency, count)
+
+        def on_result(job, log):
+            self._show_transfer_results(title, log, retry)
+            self._list_objects()
 
-        if failed_downloads:
-            error_message = "The following files failed to download:\n"
-            for file, error in failed_downloads.items():
-                error_message += f"- {file}: {error}\n"
-            messagebox.showerror("Download Error", error_message)
+        self._start_job(title, run, on_result=on_result)
 
-    def _show_upload_success(self, successful_uploads, bucket_name):
+    def _show_transfer_results(self, title, log, retry=None):
+        """A logged operation's results, read from its transfer log a screenful at a time and filterable down to one error type."""
+        model = TransferLogModel(log.path)
         top = tk.Toplevel(self.master)
-        top.title("Upload Success")
-        text_area = tk.Text(top, width=80, height=15, wrap="none")  # Increased width, disabled wrapping
-        scrollbar_y = ttk.Scrollbar(top, orient="vertical", command=text_area.yview)
-        scrollbar_x = ttk.Scrollbar(top, orient="horizontal", command=text_area.xview)
-        text_area.config(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
-        scrollbar_y.pack(fill="y", side="right")
-        scrollbar_x.pack(fill="x", side="bottom")
-        text_area.pack(expand=True, fill="both", padx=10, pady=10)
-        text_area.insert(tk.END, f"Successfully uploaded the following files to '{bucket_name}':\n")
-        for file in successful_uploads:
-            text_area.insert(tk.END, f"- {file}\n")
-        text_area.config(state=tk.DISABLED)  # Make it read-only
-        ok_button = ttk.Button(top, text="OK", command=top.destroy)
-        ok_button.pack(pady=5)
+        top.title(title)
+        top.geometry("900x400")
+        ttk.Label(top, text=f"{log.ok} succeeded, {log.failed} failed. Log: {log.path}").grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        error_types = log.error_types.most_common()
+        filters = ["All", "Failures"] + [f"{name} ({count})" for name, count in error_types]
+        filter_types = [None, None] + [name for name, _ in error_types]
+        choice = tk.StringVar(top, value=filters[1] if log.failed else filters[0])
+        ttk.Combobox(top, textvariable=choice, values=filters, state="readonly", width=30).grid(row=0, column=2, padx=5, pady=5, sticky="e")
+
+        results = VirtualTreeview(top, model, columns=("Item", "Status", "Error"))
+        for column in ("Item", "Status", "Error"):
+            results.tree.heading(column, text=column)
+        results.tree.column("Item", width=400, stretch=True)
+        results.tree.column("Status", width=60, stretch=False)
+        results.tree.column("Error", width=400, stretch=True)
+        results.grid(row=1, column=0, columnspan=3, padx=5, pady=5, sticky="nsew")
+        top.grid_rowconfigure(1, weight=1)
+        top.grid_columnconfigure(1, weight=1)
+
+        def apply_filter(event=None):
+            selected = filters.index(choice.get())
+            model.set_filter(failures_only=selected > 0, error_type=filter_types[selected])
+            results.reset_view()
+
+        def close():
+            model.close()
+            top.destroy()
+
+        def retry_failed():
+            # Only the failures in view: all of them, or one error type's
+            error_type = model.error_type
+            count = log.error_types[error_type] if error_type else log.failed
+            close()
+            retry(iter_records(log.path, failed_only=True, error_type=error_type), count)
+
+        top.bind("<<ComboboxSelected>>", apply_filter)
+        ttk.Button(top, text="Retry Failed", command=retry_failed,
+                   state=tk.NORMAL if retry and log.failed else tk.DISABLED).grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        ttk.Button(top, text="Close", command=close).grid(row=2, column=2, padx=5, pady=5, sticky="e")
+        top.protocol("WM_DELETE_WINDOW", close)
+        apply_filter()
 
     def _upload_folder(self):
         folder_path = filedialog.askdirectory(title="Select Folder to Upload")
@@ -427,65 +1166,170 @@ class S3ClientGUI:
             return
 
         folder_name = os.path.basename(folder_path)  # Get the name of the selected folder
-        successful_uploads = []
-        failed_uploads = {}
+        s3_client, prefix = self.s3_client, self.s3_root_prefix
+        concurrency = self._get_transfer_concurrency()
+        settings, journal = self.transfer_settings, self._get_transfer_journal()
+        compression = self._get_upload_compression()
 
-        for root, _, files in os.walk(folder_path):
-            for filename in files:
-                local_file_path = os.path.join(root, filename)
-                relative_path = os.path.relpath(local_file_path, folder_path)
-                # Construct the S3 key with the folder name as a prefix
-                s3_key = f"{self.s3_root_prefix}{folder_name}/{relative_path.replace(os.path.sep, '/')}" if self.s3_root_prefix else f"{folder_name}/{relative_path.replace(os.path.sep, '/')}"
+        if self.keep_in_sync.get():
+            self._watch_folder(folder_path, f"{prefix}{folder_name}/")
+            return
 
-                try:
-                    self.s3_client.upload_file(local_file_path, bucket_name, s3_key)
-                    successful_uploads.append(f"{local_file_path} -> s3://{bucket_name}/{s3_key}")
-                except Exception as e:
-                    failed_uploads[local_file_path] = str(e)
+        if self.sync_uploads.get():
+            target_prefix = f"{prefix}{folder_name}/"
 
-        if successful_uploads:
-            self._show_long_message("Upload Success", f"Successfully uploaded '{folder_name}' and its contents under '{self.s3_root_prefix}' with folder structure:\n" + "\n".join(successful_uploads))
+            def plan(engine):
+                return engine.plan_upload(folder_path, target_prefix, delete=True)
 
-        if failed_uploads:
-            error_message = "The following files failed to upload:\n"
-            for file, error in failed_uploads.items():
-                error_message += f"- {file}: {error}\n"
-            messagebox.showerror("Upload Error", error_message)
+            def upload(job, item):
+                if item.get('op') == 'delete':
+                    return item['key'], None, lambda s3: s3.delete_object(Bucket=bucket_name, Key=item['key'])
+                return upload_task(item['path'], bucket_name, item['key'], settings=settings, journal=journal,
+                                   Callback=lambda _: job.check_cancelled(), metrics=self.metrics)
 
-        self._list_objects()
+            def delete_orphans(job, keys, log):
+                def on_batch(batch, errors):
+                    for key in batch:
+                        log.result({'op': 'delete', 'key': key}, errors.get(key))
+
+                delete_keys(s3_client, bucket_name, keys, concurrency, cancel_event=job.cancel_event, on_batch=on_batch, keep_results=False)
+
+            self._run_sync(f"Syncing {folder_name} to s3://{bucket_name}/{target_prefix}", plan, "upload",
+                           lambda sync_plan: ({'path': path, 'key': key} for path, key in sync_plan.tasks), upload, delete_orphans,
+                           lambda orphans: f"{len(orphans)} object(s) under '{target_prefix}' no longer exist in '{folder_path}'. Delete them from S3?")
+            return
+
+        def items():
+            for root, _, files in os.walk(folder_path):
+                for filename in files:
+                    local_file_path = os.path.join(root, filename)
+                    relative_path = os.path.relpath(local_file_path, folder_path)
+                    # Construct the S3 key with the folder name as a prefix
+                    yield {'path': local_file_path, 'key': f"{prefix}{folder_name}/{relative_path.replace(os.path.sep, '/')}"}
+
+        def upload(job, item):
+            return upload_task(item['path'], bucket_name, item['key'], settings=settings, journal=journal, Callback=lambda _: job.check_cancelled(),
+                               metrics=self.metrics, compression=compression)
+
+        self._run_logged_transfers(s3_client, f"Uploading folder {folder_name}", "upload", items(), upload, concurrency, refresh=True)
+
+    def _watch_folder(self, folder_path, target_prefix):
+        """Syncs folder_path to target_prefix, then uploads files as they are created or modified until the job is cancelled."""
+        s3_client, bucket = self.s3_client, self.bucket_name.get()
+        concurrency = self._get_transfer_concurrency()
+        settings, journal, hash_cache = self.transfer_settings, self._get_transfer_journal(), self.hash_cache
+        list_workers = self.list_workers
+        folder_name = os.path.basename(folder_path)
+
+        def watch(job):
+            engine = SyncEngine(s3_client, bucket, settings, hash_cache, cancel_event=job.cancel_event,
+                                on_progress=lambda text: job.progress(0, text=text), list_workers=list_workers)
+
+            def on_upload(path, key, error):
+                last = f"{key} failed: {error}" if error is not None else key
+                job.progress(0, text=f"{watcher.uploaded} uploaded, {watcher.failed} failed (last: {last})")
+
+            watcher = FolderWatcher(engine, folder_path, target_prefix, concurrency, journal=journal, Callback=lambda _: job.check_cancelled(),
+                                    metrics=self.metrics, on_upload=on_upload, on_status=lambda text: job.progress(0, text=text))
+            return watcher.run()
+
+        def on_result(job, result):
+            uploaded, failed = result
+            messagebox.showinfo("Keep in Sync", f"Stopped keeping '{folder_name}' in sync with s3://{bucket}/{target_prefix}: "
+                                                f"{uploaded} upload(s), {failed} failed.")
+            self._list_objects()
+
+        self._start_job(f"Keeping {folder_name} in sync with s3://{bucket}/{target_prefix}", watch, on_result=on_result)
+
+    def _mirror_folder(self):
+        if not self.s3_client or not self.bucket_name.get():
+            messagebox.showerror("Error", "Not connected to S3 or bucket name is missing.")
+            return
+        local_dir = filedialog.askdirectory(title="Select Local Folder to Mirror Into")
+        if not local_dir:
+            return
+        bucket, prefix = self.bucket_name.get(), self.s3_root_prefix
+        settings, journal = self.transfer_settings, self._get_transfer_journal()
+
+        def plan(engine):
+            return engine.plan_mirror(prefix, local_dir, delete=True)
+
+        def download(job, item):
+            if item.get('op') == 'delete':
+                return item['path'], None, lambda s3: os.remove(item['path'])
+            return mirror_task(bucket, item['key'], item['path'], item['mtime'], settings=settings, journal=journal,
+                               Callback=lambda _: job.check_cancelled(), metrics=self.metrics)
+
+        def delete_orphans(job, paths, log):
+            for path in paths:
+                if job.cancelled:
+                    break
+                try:
+                    os.remove(path)
+                    log.result({'op': 'delete', 'path': path})
+                except OSError as e:
+                    log.result({'op': 'delete', 'path': path}, e)
+
+        self._run_sync(f"Mirroring s3://{bucket}/{prefix} to {local_dir}", plan, "download",
+                       lambda sync_plan: ({'key': key, 'path': path, 'mtime': mtime} for key, path, mtime in sync_plan.tasks), download, delete_orphans,
+                       lambda orphans: f"{len(orphans)} file(s) in '{local_dir}' do not exist under '{prefix}'. Delete them locally?",
+                       refresh=False)
+
+    def _run_sync(self, title, plan, op, plan_items, make_task, delete_orphans, orphan_question, refresh=True):
+        """Compares both sides in one job, asks about orphans, then transfers only the differences in a second, logged job.
+
+        plan_items(sync_plan) gives the item dicts make_task(job, item) turns into transfers; the orphans
+        delete_orphans(job, orphans, log) removes are logged with op 'delete', which make_task retries.
+        """
+        s3_client, bucket = self.s3_client, self.bucket_name.get()
+        concurrency = self._get_transfer_concurrency()
+        settings, hash_cache = self.transfer_settings, self.hash_cache
+        list_workers = self.list_workers
+
+        def compare(job):
+            engine = SyncEngine(s3_client, bucket, settings, hash_cache, cancel_event=job.cancel_event,
+                                on_progress=lambda text: job.progress(0, text=text), list_workers=list_workers)
+            sync_plan = plan(engine)
+            job.check_cancelled()
+            return sync_plan
+
+        def on_compared(job, sync_plan):
+            delete = bool(sync_plan.orphans) and messagebox.askyesno("Confirm Delete", orphan_question(sync_plan.orphans))
+            if not sync_plan.tasks and not delete:
+                messagebox.showinfo("Sync", f"Everything is up to date ({sync_plan.unchanged} unchanged file(s)).")
+                return
+
+            def after(job, log):
+                if delete and not job.cancelled:
+                    delete_orphans(job, sync_plan.orphans, log)
+
+            self._run_logged_transfers(s3_client, f"{title} ({sync_plan.unchanged} unchanged)", op, plan_items(sync_plan), make_task,
+                                       concurrency, total=len(sync_plan.tasks), refresh=refresh, after=after)
+
+        self._start_job(f"{title} (comparing)", compare, on_result=on_compared)
 
     def _upload_file(self):
         file_paths = filedialog.askopenfilenames(title="Select File(s) for Upload", multiple=True)
         if file_paths:
-            successful_uploads = []
-            failed_uploads = {}
-            for file_path in file_paths:
-                file_name = os.path.basename(file_path)
-                s3_key = f"{self.s3_root_prefix}{file_name}" if self.s3_root_prefix else file_name
-                try:
-                    self.s3_client.upload_file(file_path, self.bucket_name.get(), s3_key)
-                    successful_uploads.append(f"{file_path} -> s3://{self.bucket_name.get()}/{s3_key}")
-                except Exception as e:
-                    failed_uploads[file_path] = str(e)
+            s3_client, bucket, prefix = self.s3_client, self.bucket_name.get(), self.s3_root_prefix
+            concurrency = self._get_transfer_concurrency()
+            settings, journal = self.transfer_settings, self._get_transfer_journal()
+            compression = self._get_upload_compression()
 
-            if successful_uploads:
-                self._show_long_message("Upload Success", "Successfully uploaded the following files under '{self.s3_root_prefix}':\n" + "\n".join(successful_uploads))
+            def upload(job, item):
+                return upload_task(item['path'], bucket, item['key'], settings=settings, journal=journal,
+                                   Callback=lambda _: job.check_cancelled(), metrics=self.metrics, compression=compression)
 
-            if failed_uploads:
-                error_message = "The following files failed to upload:\n"
-                for file, error in failed_uploads.items():
-                    error_message += f"- {file}: {error}\n"
-                messagebox.showerror("Upload Error", error_message)
-
-            self._list_objects()
+            items = ({'path': file_path, 'key': f"{prefix}{os.path.basename(file_path)}"} for file_path in file_paths)
+            self._run_logged_transfers(s3_client, f"Uploading {len(file_paths)} file(s)", "upload", items, upload, concurrency,
+                                       total=len(file_paths), refresh=True)
 
     def _delete_selected_files(self):
-        selected_items = self.tree.selection()
-        if not selected_items:
+        files_to_delete_display = self._selected_names()
+        if not files_to_delete_display:
             messagebox.showinfo("Info", "Please select one or more files to delete.")
             return
 
-        files_to_delete_display = [self.tree.item(item)['values'][0] for item in selected_items]
         files_to_delete = [f"{self.s3_root_prefix}{key}" for key in files_to_delete_display] if self.s3_root_prefix else files_to_delete_display
 
         if not files_to_delete:
@@ -523,33 +1367,139 @@ class S3ClientGUI:
         confirm_top.wait_window()  # Wait for the confirmation window to close
 
         if confirmed.get():
-            deleted_count = 0
-            failed_deletes = {}
-            deleted_files_list = []
-            for i, file_key in enumerate(files_to_delete):
-                display_key = files_to_delete_display[i]
-                try:
-                    self.s3_client.delete_object(Bucket=self.bucket_name.get(), Key=file_key)
-                    deleted_count += 1
-                    deleted_files_list.append(display_key)
-                except Exception as e:
-                    failed_deletes[display_key] = str(e)
-
-
-            if deleted_count > 0 or failed_deletes:
-                status_message = ""
-                if deleted_count > 0:
-                    status_message += f"Successfully deleted the following {deleted_count} file(s) under '{self.s3_root_prefix}':\n" + "\n".join(deleted_files_list) + "\n\n"
-                if failed_deletes:
-                    status_message += "The following files failed to delete:\n"
-                    for file, error in failed_deletes.items():
-                        status_message += f"- {file}: {error}\n"
-                self._show_long_message("Delete Status", status_message)
-            else:
-                messagebox.showinfo("Info", "No files were deleted.")
+            s3_client, bucket, prefix = self.s3_client, self.bucket_name.get(), self.s3_root_prefix
 
+            concurrency = self._get_transfer_concurrency()
+
+            def delete(job, on_batch):
+                return delete_keys(s3_client, bucket, files_to_delete, concurrency, cancel_event=job.cancel_event, on_batch=on_batch,
+                                   keep_results=False)
+
+            self._run_logged_deletes(s3_client, bucket, f"Deleting {len(files_to_delete)} file(s) under '{prefix}'", delete, concurrency,
+                                     total=len(files_to_delete))
+
+    def _copy_selected(self, move=None):
+        """Copies or moves the selection into a folder; the button (move=None) asks which."""
+        names = self._selected_names()
+        if not names:
+            messagebox.showinfo("Info", "Please select one or more files or folders to copy or move.")
+            return
+        if move is None:
+            move = messagebox.askyesnocancel("Copy / Move", f"Move the {len(names)} selected item(s)? Choose No to copy them instead.")
+            if move is None:
+                return
+        verb = "Move" if move else "Copy"
+        dest = simpledialog.askstring(f"{verb} To", f"Folder under '{self.s3_root_prefix}' to {verb.lower()} the {len(names)} selected "
+                                      "item(s) into, or s3://bucket/folder/ for another place:", parent=self.master)
+        if dest is None:
+            return
+        dest_bucket, dest = self._parse_destination(dest.strip())
+        self._run_copy(names, dest_bucket, dest.strip('/') + '/' if dest.strip('/') else '', move)
+
+    def _rename_selected(self, event=None):
+        names = self._selected_names()
+        if len(names) != 1:
+            messagebox.showinfo("Info", "Please select one file or folder to rename.")
+            return
+        new_name = simpledialog.askstring("Rename", f"New name under '{self.s3_root_prefix}':", initialvalue=names[0].rstrip('/'), parent=self.master)
+        if not new_name or not new_name.strip().strip('/') or new_name.strip().strip('/') == names[0].strip('/'):
+            return
+        self._run_copy(names, self.bucket_name.get(), f"{self.s3_root_prefix}{new_name.strip().strip('/')}", move=True)
+
+    def _parse_destination(self, dest):
+        """(bucket, key) for a destination typed relative to the root folder, or as s3://bucket/key."""
+        if dest.startswith("s3://"):
+            bucket, _, key = dest[len("s3://"):].partition('/')
+            return bucket, key
+        return self.bucket_name.get(), f"{self.s3_root_prefix}{dest.lstrip('/')}"
+
+    def _run_copy(self, names, dest_bucket, dest, move):
+        """Copies (or moves) the selected names server side; a folder, ending in '/', brings everything under it."""
+        s3_client, bucket, prefix = self.s3_client, self.bucket_name.get(), self.s3_root_prefix
+        sources = [f"{prefix}{name}" for name in names]
+        concurrency, settings, list_workers = self._get_transfer_concurrency(), self.transfer_settings, self.list_workers
+        verb = "Move" if move else "Copy"
+
+        def make_pairs(job):
+            return copy_pairs(s3_client, bucket, sources, dest_bucket, dest, cancel_event=job.cancel_event, list_workers=list_workers)
+
+        def on_error(job, e):
+            messagebox.showerror("Error", f"Failed to {verb.lower()}: {e}")
+
+        self._run_logged_copies(s3_client, bucket, f"{'Moving' if move else 'Copying'} {len(sources)} item(s) to s3://{dest_bucket}/{dest}",
+                                make_pairs, dest_bucket, move, concurrency, settings, on_error=on_error)
+
+    def _run_logged_copies(self, s3_client, bucket, title, make_pairs, dest_bucket, move, concurrency, settings, total=None, on_error=None):
+        """Runs copy_keys over make_pairs(job), logging one line per source: its copy, or for a move its copy and then its delete."""
+        op = "move" if move else "copy"
+
+        def run(job):
+            with TransferLog.create(op) as log:
+                pending = {}  # Pair index -> record, for copies in flight (a selection can hold a folder and files under it)
+                awaiting = {}  # For a move, copied source -> its destinations, until the source's delete batch
+                done = "moved" if move else "copied"
+
+                def pairs():
+                    for index, (source, target, size) in enumerate(make_pairs(job)):
+                        pending[index] = {'key': source, 'dest': target}
+                        yield source, target, size
+
+                def on_complete(index, error, succeeded, failed):
+                    record = pending.pop(index)
+                    if error is not None or not move:
+                        log.result(record, error)
+                    else:
+                        awaiting.setdefault(record['key'], []).append(record['dest'])
+                    job.progress(log.ok + log.failed, total, f"{log.ok} {done}, {log.failed} failed")
+
+                def on_batch(keys, errors):
+                    for key in keys:
+                        for target in awaiting.pop(key):
+                            log.result({'key': key, 'dest': target}, errors.get(key))
+
+                copy_keys(s3_client, bucket, pairs(), dest_bucket, concurrency, settings, move=move, cancel_event=job.cancel_event,
+                          on_complete=on_complete, on_batch=on_batch)
+            return log
+
+        def retry(records, count):
+            def retry_pairs(job):
+                return ((record['key'], record['dest'], None) for record in records)
+
+            self._run_logged_copies(s3_client, bucket, f"Retrying {count} failed {op}(s)", retry_pairs, dest_bucket, move, concurrency,
+                                    settings, count, on_error)
+
+        def on_result(job, log):
+            self._show_transfer_results(title, log, retry)
             self._list_objects()
 
+        self._start_job(title, run, on_result=on_result, on_error=on_error)
+
+    def _delete_prefix(self):
+        if not self.s3_client or not self.bucket_name.get():
+            messagebox.showerror("Error", "Not connected to S3 or bucket name is missing.")
+            return
+
+        folder = simpledialog.askstring("Delete Folder", f"Folder to delete under '{self.s3_root_prefix}':", parent=self.master)
+        if folder is None:
+            return
+        folder = folder.strip().strip('/')
+        s3_client, bucket, prefix = self.s3_client, self.bucket_name.get(), self.s3_root_prefix
+        target_prefix = f"{prefix}{folder}/" if folder else prefix
+        if not target_prefix:
+            messagebox.showerror("Error", "Refusing to delete the entire bucket. Please enter a folder name.")
+            return
+
+        if not messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete EVERY object under 's3://{bucket}/{target_prefix}'?"):
+            return
+
+        concurrency, list_workers = self._get_transfer_concurrency(), self.list_workers
+
+        def delete(job, on_batch):
+            return delete_prefix(s3_client, bucket, target_prefix, list_workers, max_concurrency=concurrency,
+                                 cancel_event=job.cancel_event, on_batch=on_batch, keep_results=False)
+
+        self._run_logged_deletes(s3_client, bucket, f"Deleting s3://{bucket}/{target_prefix}", delete, concurrency)
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = S3ClientGUI(root)
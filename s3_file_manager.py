@@ -1,70 +1,298 @@
-import boto3
 import argparse
 import os
-from botocore.exceptions import ProfileNotFound, ClientError
+import sqlite3
+import sys
+import time
+import s3_batch
+from s3_cache import ListingCache
+from s3_clients import get_client
+from s3_compress import CODECS
+from s3_delete import delete_keys
+from s3_journal import TransferJournal
+from s3_listing import DEFAULT_LIST_WORKERS, iter_pages
+from s3_metrics import Profiler, TransferMetrics, summarize
+from s3_search import ListFilter, parse_size, parse_time
+from s3_sync import HashCache, SyncEngine
+from s3_transfer import (DEFAULT_CHUNK_SIZE, DEFAULT_CONCURRENCY, DEFAULT_MULTIPART_THRESHOLD, DEFAULT_PART_CONCURRENCY, MB,
+                         TransferScheduler, TransferSettings, abort_orphaned_uploads, download_task, stream_download,
+                         stream_upload, upload_task)
+from s3_watch import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, FolderWatcher
+
+def _run_transfers(s3, tasks, concurrency, verb, destination=None, metrics=None):
+    def on_complete(key, error, succeeded, failed):
+        if error is None:
+            print(f"{verb} Successful: {key}")
+        else:
+            print(f"{verb} Failed: {key}: {error}")
+
+    successful, failed = TransferScheduler(s3, concurrency, on_complete=on_complete, metrics=metrics).run(tasks)
+    if len(tasks) > 1:
+        print(f"{len(successful)} of {len(tasks)} files transferred, {len(failed)} failed.")
+    if verb == "Download" and successful:
+        print(f"Saved to {destination or os.getcwd()}")
 
 def s3_manager():
+    # 'ls', 'get', 'put', 'rm' and 'sync' run the non-interactive batch commands instead
+    if len(sys.argv) > 1 and sys.argv[1] in s3_batch.COMMANDS:
+        sys.exit(s3_batch.main(sys.argv[1:]))
+
     parser = argparse.ArgumentParser(description="S3 File Manager")
     parser.add_argument("bucket", help="Name of the S3 bucket")
     parser.add_argument("-p", "--profile", help="AWS profile name", default="default")
-    parser.add_argument("-d", "--download", help="File name to download (relative to prefix)")
-    parser.add_argument("-u", "--upload", help="Local file path to upload")
+    parser.add_argument("--region", help="AWS region, defaults to the profile's region")
+    parser.add_argument("--endpoint-url", help="S3 endpoint URL, e.g. for an S3-compatible service")
+    parser.add_argument("-d", "--download", action="append", help="File name to download (relative to prefix), repeatable")
+    parser.add_argument("-u", "--upload", action="append", help="Local file path to upload, repeatable; '-' uploads stdin to --key")
+    parser.add_argument("-k", "--key", help="With '-u -', the name (relative to prefix) to upload stdin as")
+    parser.add_argument("-o", "--output", help="With one --download, the local path to save it as, or '-' to write it to stdout")
+    parser.add_argument("--compress", choices=CODECS, help="Compress uploads with gzip or zstd on the way, setting Content-Encoding")
+    parser.add_argument("--compress-level", type=int, help="Compression level, by default 6 for gzip and 3 for zstd")
+    parser.add_argument("--decompress", action="store_true", help="Save gzip or zstd encoded downloads decompressed")
+    parser.add_argument("--expected-size", type=float, help="With '-u -', roughly how many MB stdin will carry, so parts are big enough for S3's 10,000 part limit")
+    parser.add_argument("-c", "--concurrency", type=int, help="Number of files transferred in parallel", default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--multipart-threshold", type=float, help="Size in MB above which files are transferred in parts", default=DEFAULT_MULTIPART_THRESHOLD / MB)
+    parser.add_argument("--chunk-size", type=float, help="Part size in MB (minimum 5)", default=DEFAULT_CHUNK_SIZE / MB)
+    parser.add_argument("--part-concurrency", type=int, help="Number of parts of one file transferred in parallel", default=DEFAULT_PART_CONCURRENCY)
+    parser.add_argument("--max-bandwidth", type=float, help="Bandwidth cap in MB/s across all transfers (0 for unlimited)", default=0)
+    parser.add_argument("--sync", metavar="DIR", help="Upload the new and changed files in DIR to the prefix and exit")
+    parser.add_argument("--mirror", metavar="DIR", help="Download the new and changed objects under the prefix into DIR and exit")
+    parser.add_argument("--watch", metavar="DIR", help="Upload the new and changed files in DIR to the prefix, then keep uploading files as "
+                        "they are created or modified until interrupted")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE, help="With --watch, seconds a file must be left alone before it is uploaded")
+    parser.add_argument("--poll", type=float, metavar="SECONDS", help="With --watch, rescan DIR every SECONDS instead of using change "
+                        "notifications, e.g. on network shares (polling is also the fallback without the watchdog package)")
+    parser.add_argument("--delete", action="store_true", help="With --sync or --mirror, delete files missing from the source side")
+    parser.add_argument("--resume", action="store_true", help="Journal transfers so an interrupted one continues from its last finished part")
+    parser.add_argument("--abort-uploads", action="store_true", help="Abort unfinished multipart uploads under the prefix and exit")
+    parser.add_argument("--older-than", type=float, help="With --abort-uploads, only abort uploads started this many hours ago", default=24)
     parser.add_argument("--prefix", help="S3 folder/prefix for all operations", default="")
+    parser.add_argument("--list-workers", type=int, default=DEFAULT_LIST_WORKERS, help="Key ranges listed in parallel, for prefixes "
+                        "with millions of keys (default: 1, one sequential listing)")
+    parser.add_argument("--max-keys", type=int, help="Stop listing after this many objects", default=None)
+    parser.add_argument("--cached", action="store_true", help="Answer the listing from the local cache when it holds this prefix")
+    parser.add_argument("--match", help="Only list keys (relative to the prefix) containing this text, or matching it as a glob such as '2024/*.csv'", default="")
+    parser.add_argument("--min-size", help="Only list objects at least this big, e.g. 1500, 10K or 2GB")
+    parser.add_argument("--max-size", help="Only list objects at most this big")
+    parser.add_argument("--newer-than", help="Only list objects modified after this date (YYYY-MM-DD, UTC) or within this age (e.g. 7d, 12h)")
+    parser.add_argument("--modified-before", help="Only list objects modified before this date or age")
+    parser.add_argument("--metrics-out", metavar="PATH", help="Write request latency, retry and throughput metrics to PATH on exit ('-' for stdout)")
+    parser.add_argument("--metrics-format", choices=("json", "prometheus"), help="Format for --metrics-out, by default from the file extension (.prom is Prometheus)")
+    parser.add_argument("--cprofile", metavar="PATH", help="Profile the run with cProfile, save the stats to PATH and print the top entries")
     args = parser.parse_args()
+    try:
+        list_filter = ListFilter(args.match, min_size=parse_size(args.min_size), max_size=parse_size(args.max_size),
+                                 newer_than=parse_time(args.newer_than), older_than=parse_time(args.modified_before))
+    except ValueError as e:
+        parser.error(str(e))
+    if args.upload and '-' in args.upload and (len(args.upload) > 1 or not args.key):
+        parser.error("'-u -' uploads stdin on its own and needs --key")
+    if args.output and len(args.download or []) != 1:
+        parser.error("--output needs exactly one --download")
+    from botocore.exceptions import ProfileNotFound, ClientError  # Imported after parsing so --help stays instant
 
+    # Piped data may be on stdout, so stream errors go to stderr and fail the exit status, as put - and get - do
+    streaming = args.upload == ['-'] or args.output == '-'
+    errors = sys.stderr if streaming else sys.stdout
+    failed = False
+    metrics = TransferMetrics()
+    profiler = Profiler()
+    if args.cprofile:
+        profiler.start()
     try:
-        session = boto3.Session(profile_name=args.profile)
-        s3 = session.client('s3')
+        settings = TransferSettings(multipart_threshold=int(args.multipart_threshold * MB), chunk_size=int(args.chunk_size * MB),
+                                    max_concurrency=args.part_concurrency, max_bandwidth=int(args.max_bandwidth * MB))
+        s3 = get_client(args.profile, args.region, args.endpoint_url, max_pool_connections=settings.pool_connections(args.concurrency))
+        metrics.attach(s3)
         
         prefix = args.prefix.strip('/')
         if prefix:
             prefix += '/'
 
+        journal = TransferJournal() if args.resume or args.abort_uploads else None
+
+        # --- CLEANUP ---
+        if args.abort_uploads:
+            def on_abort(key, upload_id):
+                print(f"Aborted upload of {key} ({upload_id})")
+
+            aborted = abort_orphaned_uploads(s3, args.bucket, prefix, older_than=args.older_than * 3600, journal=journal, on_abort=on_abort)
+            print(f"{len(aborted)} unfinished upload(s) aborted.")
+            return
+
+        # --- SYNC / MIRROR / WATCH ---
+        if args.sync or args.mirror or args.watch:
+            local_dir = args.sync or args.watch
+            if local_dir and not os.path.isdir(local_dir):
+                print(f"Error: Local folder '{local_dir}' not found.")
+                return
+            try:
+                hash_cache = HashCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Hash cache disabled: {e}")
+                hash_cache = None
+            engine = SyncEngine(s3, args.bucket, settings, hash_cache, on_progress=lambda text: print(f"... {text}"), list_workers=args.list_workers)
+            if args.watch:
+                def on_upload(path, key, error):
+                    if error is None:
+                        print(f"Upload Successful: {path} -> s3://{args.bucket}/{key}")
+                    else:
+                        print(f"Upload Failed: {path}: {error} (retrying)")
+
+                watcher = FolderWatcher(engine, args.watch, prefix, args.concurrency, debounce=args.debounce, poll_interval=args.poll or DEFAULT_POLL_INTERVAL,
+                                        notify=not args.poll, journal=journal, metrics=metrics, on_upload=on_upload,
+                                        on_status=lambda text: print(f"... {text}"))
+                try:
+                    watcher.run()
+                except KeyboardInterrupt:
+                    # run() has already let the uploads under way finish
+                    print("\nStopped watching.")
+                print(f"{watcher.uploaded} file(s) uploaded, {watcher.failed} failed upload(s).")
+                return
+            if args.sync:
+                plan = engine.plan_upload(args.sync, prefix, delete=args.delete)
+                tasks, verb = list(engine.upload_tasks(plan, journal=journal, metrics=metrics)), "Upload"
+            else:
+                plan = engine.plan_mirror(prefix, args.mirror, delete=args.delete)
+                tasks, verb = list(engine.mirror_tasks(plan, journal=journal, metrics=metrics)), "Download"
+            print(f"{len(tasks)} file(s) to transfer, {plan.unchanged} unchanged, {len(plan.orphans)} to delete.")
+            if tasks:
+                _run_transfers(s3, tasks, args.concurrency, verb, destination=args.mirror, metrics=metrics)
+            if plan.orphans and args.sync:
+                deleted, failed = delete_keys(s3, args.bucket, plan.orphans, args.concurrency)
+                for key, error in failed.items():
+                    print(f"Delete Failed: {key}: {error}")
+                print(f"{len(deleted)} remote object(s) deleted.")
+            elif plan.orphans:
+                for path in plan.orphans:
+                    try:
+                        os.remove(path)
+                        print(f"Deleted {path}")
+                    except OSError as e:
+                        print(f"Delete Failed: {path}: {e}")
+            return
+
+        # --- STREAMS ---
+        # Piped data goes straight between S3 and stdin/stdout, and status lines go to stderr out of its way (errors too, below)
+        if args.upload == ['-']:
+            s3_key = f"{prefix}{args.key.lstrip('/')}"
+            expected_size = int(args.expected_size * MB) if args.expected_size else None
+            with metrics.transfer('upload') as callback:
+                size = stream_upload(s3, sys.stdin.buffer, args.bucket, s3_key, settings, callback=callback, expected_size=expected_size,
+                                     compression=args.compress, compression_level=args.compress_level)
+            print(f"Upload Successful: stdin -> s3://{args.bucket}/{s3_key} ({size} bytes)", file=sys.stderr)
+            return
+        if args.output == '-':
+            s3_key = args.download[0] if not prefix or args.download[0].startswith(prefix) else f"{prefix}{args.download[0]}"
+            with metrics.transfer('download') as callback:
+                size = stream_download(s3, args.bucket, s3_key, sys.stdout.buffer, settings, callback=callback, decompress=args.decompress)
+            print(f"Download Successful: s3://{args.bucket}/{s3_key} -> stdout ({size} bytes)", file=sys.stderr)
+            return
+
         # --- UPLOAD ---
         if args.upload:
-            if not os.path.isfile(args.upload):
-                print(f"Error: Local file '{args.upload}' not found.")
-                return
-            
-            s3_key = f"{prefix}{os.path.basename(args.upload)}"
-            print(f"Uploading {args.upload} to s3://{args.bucket}/{s3_key}...")
-            s3.upload_file(args.upload, args.bucket, s3_key)
-            print("Upload Successful!")
+            tasks = []
+            for local_path in args.upload:
+                if not os.path.isfile(local_path):
+                    print(f"Error: Local file '{local_path}' not found.")
+                    return
+                s3_key = f"{prefix}{os.path.basename(local_path)}"
+                print(f"Uploading {local_path} to s3://{args.bucket}/{s3_key}...")
+                tasks.append(upload_task(local_path, args.bucket, s3_key, settings=settings, journal=journal, metrics=metrics,
+                                         compression=args.compress, compression_level=args.compress_level))
+
+            _run_transfers(s3, tasks, args.concurrency, "Upload", metrics=metrics)
             return
 
         # --- LIST ---
         print(f"--- Bucket: {args.bucket} | Profile: {args.profile} | Prefix: '{prefix}' ---")
-        response = s3.list_objects_v2(Bucket=args.bucket, Prefix=prefix)
-        
-        if 'Contents' in response:
-            for obj in response['Contents']:
+        listed = 0
+        shown = 0
+        # A glob's literal head narrows the listing itself rather than being filtered out afterwards
+        list_prefix = prefix + list_filter.list_prefix()
+
+        def print_page(page):
+            nonlocal listed, shown
+            for obj in page:
+                if list_filter.active and not list_filter.match(obj['Key'][len(prefix):], obj['Size'], obj['LastModified'].timestamp()):
+                    continue
                 print(f"-> {obj['Key']} ({obj['Size']} bytes)")
-        else:
-            print("No objects found matching that prefix.")
+                shown += 1
+            listed += len(page)
+            sys.stdout.flush()
+
+        try:
+            cache = ListingCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Listing cache disabled: {e}")
+            cache = None
+
+        try:
+            fetched_at = cache.fetched_at(args.profile, args.bucket, list_prefix) if cache and args.cached else None
+            if fetched_at is not None:
+                print(f"(cached listing from {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(fetched_at))})")
+                for page in cache.iter_pages(args.profile, args.bucket, list_prefix):
+                    if args.max_keys is not None:
+                        page = page[:args.max_keys - listed]
+                    print_page(page)
+                    if args.max_keys is not None and listed >= args.max_keys:
+                        break
+            elif cache and args.max_keys is None:
+                # A complete listing also refreshes the cached copy as it streams past
+                cache.revalidate(args.profile, args.bucket, list_prefix, iter_pages(s3, args.bucket, list_prefix, list_workers=args.list_workers), on_page=print_page)
+            else:
+                for page in iter_pages(s3, args.bucket, list_prefix, max_keys=args.max_keys, list_workers=args.list_workers):
+                    print_page(page)
+        except KeyboardInterrupt:
+            print(f"\nListing cancelled after {listed} objects.")
+            return
+
+        if not shown:
+            print("No objects found matching that prefix." if not list_filter.active else f"None of the {listed} listed objects matched the filter.")
 
         # --- DOWNLOAD ---
-        file_to_get = args.download
-        if not file_to_get:
+        files_to_get = args.download or []
+        if not files_to_get and sys.stdin.isatty():
             file_to_get = input("\nEnter file name/key to download (or Enter to exit): ").strip()
+            files_to_get = [file_to_get] if file_to_get else []
 
-        if file_to_get:
+        tasks = []
+        for file_to_get in files_to_get:
             if prefix and not file_to_get.startswith(prefix):
                 s3_key = f"{prefix}{file_to_get}"
             else:
                 s3_key = file_to_get
 
-            local_filename = os.path.basename(s3_key)
-            
+            local_filename = args.output or os.path.basename(s3_key)
+
             print(f"Downloading {s3_key} as {local_filename}...")
-            s3.download_file(args.bucket, s3_key, local_filename)
-            print(f"Success! Saved to {os.getcwd()}/{local_filename}")
+            tasks.append(download_task(args.bucket, s3_key, local_filename, settings=settings, journal=journal, metrics=metrics,
+                                       decompress=args.decompress))
+
+        if tasks:
+            _run_transfers(s3, tasks, args.concurrency, "Download", metrics=metrics)
 
     except ProfileNotFound:
-        print(f"Error: Profile '{args.profile}' not found in ~/.aws/credentials")
+        failed = True
+        print(f"Error: Profile '{args.profile}' not found in ~/.aws/credentials", file=errors)
     except ClientError as e:
-        print(f"AWS Error: {e.response['Error']['Message']}")
+        failed = True
+        print(f"AWS Error: {e.response['Error']['Message']}", file=errors)
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        failed = True
+        print(f"An unexpected error occurred: {e}", file=errors)
+    finally:
+        if args.cprofile:
+            stats = profiler.stop()
+            if stats is not None:
+                stats.dump_stats(args.cprofile)
+                print(summarize(stats, limit=25), file=sys.stderr)
+        if args.metrics_out:
+            try:
+                metrics.write(args.metrics_out, args.metrics_format)
+            except OSError as e:
+                print(f"Could not write metrics to {args.metrics_out}: {e}", file=errors)
+    if failed and streaming:
+        sys.exit(s3_batch.EXIT_FATAL)
 
 if __name__ == "__main__":
     s3_manager()
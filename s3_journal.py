@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import time
+
+from s3_cache import default_cache_dir
+
+
+class TransferJournal:
+    """On-disk record of interrupted transfers so re-running one continues where it stopped.
+
+    Uploads keep their multipart upload ID and the ETag of every finished part; downloads keep the
+    object's ETag and the offsets of the byte ranges already written to the partial file. Entries are
+    only reused when the local file, part size and remote object still match what was recorded.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(default_cache_dir(), 'transfers.sqlite3')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS uploads (
+                    id INTEGER PRIMARY KEY,
+                    bucket TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    local_path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    chunk_size INTEGER NOT NULL,
+                    upload_id TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    UNIQUE (bucket, key, local_path)
+                );
+                CREATE TABLE IF NOT EXISTS upload_parts (
+                    upload INTEGER NOT NULL,
+                    part_number INTEGER NOT NULL,
+                    etag TEXT NOT NULL,
+                    PRIMARY KEY (upload, part_number)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS downloads (
+                    id INTEGER PRIMARY KEY,
+                    bucket TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    save_path TEXT NOT NULL,
+                    etag TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    chunk_size INTEGER NOT NULL,
+                    UNIQUE (bucket, key, save_path)
+                );
+                CREATE TABLE IF NOT EXISTS download_ranges (
+                    download INTEGER NOT NULL,
+                    start INTEGER NOT NULL,
+                    PRIMARY KEY (download, start)
+                ) WITHOUT ROWID;
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # --- Uploads ---
+
+    def find_upload(self, bucket, key, local_path, size, mtime, chunk_size):
+        """Returns (upload_id, {part_number: etag}) for a matching unfinished upload, or (None, {})."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT id, size, mtime, chunk_size, upload_id FROM uploads WHERE bucket=? AND key=? AND local_path=?",
+                               (bucket, key, local_path)).fetchone()
+            if not row:
+                return None, {}
+            entry_id, entry_size, entry_mtime, entry_chunk_size, upload_id = row
+            if (entry_size, entry_mtime, entry_chunk_size) != (size, mtime, chunk_size):
+                return None, {}
+            parts = dict(conn.execute("SELECT part_number, etag FROM upload_parts WHERE upload=?", (entry_id,)))
+            return upload_id, parts
+
+    def stale_upload_id(self, bucket, key, local_path):
+        """The upload ID recorded for this transfer, whether or not it still matches the local file."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT upload_id FROM uploads WHERE bucket=? AND key=? AND local_path=?",
+                               (bucket, key, local_path)).fetchone()
+            return row[0] if row else None
+
+    def start_upload(self, bucket, key, local_path, size, mtime, chunk_size, upload_id):
+        with self._connect() as conn:
+            self._drop_upload(conn, bucket, key, local_path)
+            conn.execute("""INSERT INTO uploads (bucket, key, local_path, size, mtime, chunk_size, upload_id, started_at)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", (bucket, key, local_path, size, mtime, chunk_size, upload_id, time.time()))
+
+    def record_part(self, upload_id, part_number, etag):
+        with self._connect() as conn:
+            conn.execute("""INSERT OR REPLACE INTO upload_parts (upload, part_number, etag)
+                            SELECT id, ?, ? FROM uploads WHERE upload_id=?""", (part_number, etag, upload_id))
+
+    def finish_upload(self, bucket, key, local_path):
+        with self._connect() as conn:
+            self._drop_upload(conn, bucket, key, local_path)
+
+    def forget_upload_id(self, upload_id):
+        with self._connect() as conn:
+            for (entry_id,) in conn.execute("SELECT id FROM uploads WHERE upload_id=?", (upload_id,)).fetchall():
+                conn.execute("DELETE FROM upload_parts WHERE upload=?", (entry_id,))
+                conn.execute("DELETE FROM uploads WHERE id=?", (entry_id,))
+
+    def _drop_upload(self, conn, bucket, key, local_path):
+        for (entry_id,) in conn.execute("SELECT id FROM uploads WHERE bucket=? AND key=? AND local_path=?",
+                                        (bucket, key, local_path)).fetchall():
+            conn.execute("DELETE FROM upload_parts WHERE upload=?", (entry_id,))
+            conn.execute("DELETE FROM uploads WHERE id=?", (entry_id,))
+
+    # --- Downloads ---
+
+    def find_download(self, bucket, key, save_path, etag, size, chunk_size):
+        """Returns the set of range offsets already written for a matching download, or None to start over."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT id, etag, size, chunk_size FROM downloads WHERE bucket=? AND key=? AND save_path=?",
+                               (bucket, key, save_path)).fetchone()
+            if not row or row[1:] != (etag, size, chunk_size):
+                return None
+            return {start for (start,) in conn.execute("SELECT start FROM download_ranges WHERE download=?", (row[0],))}
+
+    def start_download(self, bucket, key, save_path, etag, size, chunk_size):
+        with self._connect() as conn:
+            self._drop_download(conn, bucket, key, save_path)
+            conn.execute("INSERT INTO downloads (bucket, key, save_path, etag, size, chunk_size) VALUES (?, ?, ?, ?, ?, ?)",
+                         (bucket, key, save_path, etag, size, chunk_size))
+
+    def record_range(self, bucket, key, save_path, start):
+        with self._connect() as conn:
+            conn.execute("""INSERT OR IGNORE INTO download_ranges (download, start)
+                            SELECT id, ? FROM downloads WHERE bucket=? AND key=? AND save_path=?""", (start, bucket, key, save_path))
+
+    def finish_download(self, bucket, key, save_path):
+        with self._connect() as conn:
+            self._drop_download(conn, bucket, key, save_path)
+
+    def _drop_download(self, conn, bucket, key, save_path):
+        for (entry_id,) in conn.execute("SELECT id FROM downloads WHERE bucket=? AND key=? AND save_path=?",
+                                        (bucket, key, save_path)).fetchall():
+            conn.execute("DELETE FROM download_ranges WHERE download=?", (entry_id,))
+            conn.execute("DELETE FROM downloads WHERE id=?", (entry_id,))
@@ -0,0 +1,239 @@
+import queue
+import string
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_LIST_WORKERS = 1  # Sequential; more shard the listing
+SHARDS_PER_WORKER = 4  # Small shards keep one big one from leaving the other workers idle
+SHARD_BUFFER_PAGES = 64  # Pages a shard lists ahead of the one being read before it waits
+MAX_SHARD_DEPTH = 3  # Folder levels searched for shard boundaries
+PROBES_PER_SHARD = 4  # Requests spent sampling a flat keyspace, for each shard wanted
+PROBE_CHARS = '-.' + string.digits + string.ascii_uppercase + '_' + string.ascii_lowercase
+_SHARD_DONE = object()
+
+
+def iter_pages(s3_client, bucket, prefix='', page_size=DEFAULT_PAGE_SIZE, max_keys=None, cancel_event=None, list_workers=DEFAULT_LIST_WORKERS, **list_kwargs):
+    """Yields pages of objects from list_objects_v2, following continuation tokens until the listing ends.
+
+    With list_workers above 1 the listing is sharded across that many threads (see iter_sharded_pages);
+    the pages still arrive in key order.
+    """
+    if list_workers > 1 and not list_kwargs:
+        return iter_sharded_pages(s3_client, bucket, prefix, list_workers, page_size, max_keys, cancel_event)
+    return _iter_pages(s3_client, bucket, prefix, page_size, max_keys, cancel_event, **list_kwargs)
+
+
+def _iter_pages(s3_client, bucket, prefix, page_size, max_keys, cancel_event, **list_kwargs):
+    kwargs = dict(list_kwargs, Bucket=bucket, Prefix=prefix)
+    remaining = max_keys
+
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        kwargs['MaxKeys'] = page_size if remaining is None else min(page_size, remaining)
+        response = s3_client.list_objects_v2(**kwargs)
+        contents = response.get('Contents', [])
+        if contents:
+            yield contents
+
+        if remaining is not None:
+            remaining -= len(contents)
+            if remaining <= 0:
+                return
+        if not response.get('IsTruncated') or not response.get('NextContinuationToken'):
+            return
+        kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+
+def iter_objects(s3_client, bucket, prefix='', **kwargs):
+    """Yields objects one at a time from a paginated listing."""
+    for page in iter_pages(s3_client, bucket, prefix, **kwargs):
+        yield from page
+
+
+def iter_level_pages(s3_client, bucket, prefix='', page_size=DEFAULT_PAGE_SIZE, cancel_event=None, delimiter='/'):
+    """Yields (folders, objects) per page for a single level under prefix, with folders taken from CommonPrefixes."""
+    kwargs = dict(Bucket=bucket, Prefix=prefix, Delimiter=delimiter, MaxKeys=page_size)
+
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        response = s3_client.list_objects_v2(**kwargs)
+        folders = [common['Prefix'] for common in response.get('CommonPrefixes', [])]
+        contents = response.get('Contents', [])
+        if folders or contents:
+            yield folders, contents
+
+        if not response.get('IsTruncated') or not response.get('NextContinuationToken'):
+            return
+        kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+
+def shard_boundaries(s3_client, bucket, prefix='', shards=SHARDS_PER_WORKER, max_workers=4):
+    """Up to shards - 1 sorted keys splitting the listing under prefix into ranges that can be listed independently.
+
+    Folders from a delimited listing are the natural boundaries, descending while there are too few
+    of them. A flat keyspace, or a level too big for one page, is sampled as well by asking for the
+    first key after each probe character. The boundaries only decide how the work is split, never
+    what is listed.
+    """
+    with ThreadPoolExecutor(max_workers, thread_name_prefix="s3-shards") as executor:
+        candidates, complete, base = _folder_boundaries(executor, s3_client, bucket, prefix, shards)
+        if len(candidates) < 2 or not complete:
+            candidates += _sampled_boundaries(executor, s3_client, bucket, prefix, base, shards)
+    candidates = sorted(set(candidates))
+    if len(candidates) < shards:
+        return candidates
+    step = len(candidates) / shards
+    return [candidates[int(step * i)] for i in range(1, shards)]
+
+
+def _folder_boundaries(executor, s3_client, bucket, prefix, shards):
+    """(boundaries, complete, base) from folders. complete is False when a level had more than one page;
+    base is the deepest folder holding everything, where sampling can start."""
+    def first_page(base):
+        response = s3_client.list_objects_v2(Bucket=bucket, Prefix=base, Delimiter='/', MaxKeys=DEFAULT_PAGE_SIZE)
+        return ([common['Prefix'] for common in response.get('CommonPrefixes', [])], [obj['Key'] for obj in response.get('Contents', [])],
+                response.get('IsTruncated', False))
+
+    candidates, level, complete, base = [], [prefix], True, prefix
+    for _ in range(MAX_SHARD_DEPTH):
+        folders, level_keys = [], 0
+        for subfolders, keys, truncated in executor.map(first_page, level):
+            # The first page of a longer level only covers its start, which would skew the shards
+            candidates += subfolders if truncated else subfolders + keys
+            folders += subfolders
+            level_keys += len(keys)
+            complete = complete and not truncated
+        if len(level) == 1 and len(folders) == 1 and not level_keys:
+            base = folders[0]
+        if len(candidates) >= shards or not folders:
+            break
+        level = folders
+    return candidates, complete, base
+
+
+def _sampled_boundaries(executor, s3_client, bucket, prefix, base, shards):
+    def first_key_after(start):
+        contents = s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix, StartAfter=start, MaxKeys=1).get('Contents', [])
+        return contents[0]['Key'] if contents else None
+
+    first = first_key_after(base)
+    if first is None or not first.startswith(base):
+        return []
+    # Probing under a start every key shares would land every probe on the same key, so find the
+    # longest one first: a binary search over the first key's length, where nothing sorts after
+    # start + the highest character if all the keys begin with start
+    shortest, longest = len(base), len(first)
+    while shortest < longest:
+        middle = (shortest + longest + 1) // 2
+        if first_key_after(first[:middle] + '\U0010ffff') is None:
+            shortest = middle
+        else:
+            longest = middle - 1
+    keys, bases, sampled = set(), [first[:shortest]], set()
+    budget = PROBES_PER_SHARD * shards
+    while bases and len(keys) < shards and budget > 0:
+        # Spread over fewer characters when there are many bases, to stay within the budget
+        step = -(-len(bases) * len(PROBE_CHARS) // budget)
+        starts = [base + char for base in bases for char in PROBE_CHARS[::step]]
+        budget -= len(starts)
+        sampled.update(bases)
+        next_bases = set()
+        for start, key in zip(starts, executor.map(first_key_after, starts)):
+            if key:
+                keys.add(key)
+                next_bases.add(key[:len(start)])
+        # Then one character further in under each key found, until there are enough to share out
+        bases = sorted(next_bases - sampled)
+    return list(keys)
+
+
+def iter_sharded_pages(s3_client, bucket, prefix='', max_workers=8, page_size=DEFAULT_PAGE_SIZE, max_keys=None, cancel_event=None,
+                       boundaries=None):
+    """Yields the same pages as iter_pages, in key order, listing up to max_workers key ranges at once.
+
+    A single continuation chain is strictly sequential; here the keyspace is split at
+    shard_boundaries into about SHARDS_PER_WORKER shards per worker, each listed from StartAfter
+    its lower boundary up to its upper one. The shard being read streams while the next ones list
+    ahead into buffers of SHARD_BUFFER_PAGES pages, so memory stays bounded however big the bucket.
+    The first page is listed on its own, so a listing that fits in it costs nothing extra.
+    """
+    remaining = max_keys
+    start = None
+    if boundaries is None:
+        response = s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix, MaxKeys=page_size)
+        page = response.get('Contents', [])[:remaining]
+        if page:
+            yield page
+            start = page[-1]['Key']
+        if remaining is not None:
+            remaining -= len(page)
+        if not response.get('IsTruncated') or (remaining is not None and remaining <= 0) or \
+                (cancel_event is not None and cancel_event.is_set()):
+            return
+        boundaries = [key for key in shard_boundaries(s3_client, bucket, prefix, max_workers * SHARDS_PER_WORKER, max_workers)
+                      if key > start]
+    shards = iter(zip([start] + list(boundaries), list(boundaries) + [None]))
+    stop_event = threading.Event()
+
+    def stopped():
+        return stop_event.is_set() or (cancel_event is not None and cancel_event.is_set())
+
+    def put(pages, item):
+        while not stopped():
+            try:
+                return pages.put(item, timeout=0.1)
+            except queue.Full:
+                pass
+
+    def list_shard(start, stop, pages):
+        try:
+            list_kwargs = {'StartAfter': start} if start else {}
+            for page in _iter_pages(s3_client, bucket, prefix, page_size, None, stop_event, **list_kwargs):
+                if stop is not None and page[-1]['Key'] > stop:
+                    page = [obj for obj in page if obj['Key'] <= stop]
+                    if page:
+                        put(pages, page)
+                    break
+                put(pages, page)
+        except BaseException as e:
+            put(pages, e)
+        finally:
+            put(pages, _SHARD_DONE)
+
+    with ThreadPoolExecutor(max_workers, thread_name_prefix="s3-list") as executor:
+        window = deque()
+
+        def submit_next():
+            shard = next(shards, None)
+            if shard is not None:
+                window.append(queue.Queue(SHARD_BUFFER_PAGES))
+                executor.submit(list_shard, *shard, window[-1])
+
+        try:
+            for _ in range(max_workers):
+                submit_next()
+            while window and not stopped():
+                pages = window[0]
+                item = None
+                while item is not _SHARD_DONE and not stopped():
+                    try:
+                        item = pages.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if isinstance(item, BaseException):
+                        raise item
+                    if item is not _SHARD_DONE:
+                        if remaining is not None:
+                            item = item[:remaining]
+                            remaining -= len(item)
+                        yield item
+                        if remaining is not None and remaining <= 0:
+                            return
+                window.popleft()
+                submit_next()
+        finally:
+            stop_event.set()
@@ -0,0 +1,390 @@
+import datetime
+import tkinter as tk
+from array import array
+from tkinter import ttk
+
+from s3_search import KeyIndex
+
+NAME, SIZE, MTIME = 0, 1, 2
+DEFAULT_ROW_HEIGHT = 20
+
+
+class ObjectListModel:
+    """Column store for a listing: parallel arrays of names, sizes and mtimes rather than a Tk row per object."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.names = []
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        self.order = None  # Ascending permutation of row indices for the active sort, None for listing order
+        self.reversed = False
+        self._sort_cache = {}  # column -> ascending permutation, valid until rows are added or cleared
+        self.index = KeyIndex()
+        # The filter outlives clear() so a refreshed listing comes back filtered the same way
+        self.filter = getattr(self, 'filter', None)
+        self.matches = None if self.filter is None else []  # Ascending row indices passing the filter
+        self.view = None if self.filter is None else []  # Filtered rows in display order
+
+    def __len__(self):
+        return len(self.names) if self.view is None else len(self.view)
+
+    def append_page(self, page, strip_prefix=''):
+        """Adds one list_objects_v2 page, keeping keys relative to strip_prefix. Returns the number of rows added."""
+        start = len(self.names)
+        for obj in page:
+            key = obj['Key']
+            if strip_prefix and key.startswith(strip_prefix):
+                key = key[len(strip_prefix):]
+                if not key: # Don't show if it's just the prefix
+                    continue
+            self.names.append(key)
+            self.sizes.append(obj['Size'])
+            self.mtimes.append(obj['LastModified'].timestamp())
+        if len(self.names) != start:
+            self._sort_cache.clear()
+            self.index.add(self.names[start:])
+            if self.filter is not None:
+                # Rows arriving under an active filter join the bottom of the view, like unsorted rows do
+                added = self.filter.apply(self.index, self.sizes, self.mtimes, candidates=range(start, len(self.names)))
+                self.matches.extend(added)
+                self.view.extend(added)
+        return len(self.names) - start
+
+    def set_filter(self, list_filter):
+        """Shows only the rows passing list_filter, or every row for None. Returns the number of rows shown."""
+        if list_filter is None or not list_filter.active:
+            self.filter = self.matches = self.view = None
+            return len(self.names)
+        # A filter that only narrows the previous one searches its results instead of the whole index
+        candidates = self.matches if list_filter.narrows(self.filter) else None
+        self.matches = list_filter.apply(self.index, self.sizes, self.mtimes, candidates)
+        self.filter = list_filter
+        self._build_view()
+        return len(self.matches)
+
+    def _build_view(self):
+        if self.order is None:
+            self.view = list(self.matches)
+            return
+        rank = self._rank()
+        if not self.reversed:
+            self.view = sorted(self.matches, key=rank.__getitem__)
+            return
+        # Reversed, the sorted rows flip but rows added since the sort stay at the bottom in arrival order
+        last = len(self.order) - 1
+        self.view = sorted(self.matches, key=lambda index: last - rank[index] if rank[index] <= last else rank[index])
+
+    def _rank(self):
+        """Position of every row in the active sort, for ordering filtered rows without rescanning the permutation."""
+        rank = self._sort_cache.get(('rank', id(self.order)))
+        if rank is None:
+            rank = array('l', [0]) * len(self.names)
+            for position, index in enumerate(self.order):
+                rank[index] = position
+            # Rows added after the last sort rank after every sorted row, in arrival order
+            for index in range(len(self.order), len(self.names)):
+                rank[index] = index
+            self._sort_cache[('rank', id(self.order))] = rank
+        return rank
+
+    def index_at(self, position):
+        if self.view is not None:
+            return self.view[position]
+        # Rows added after the last sort sit unsorted below the sorted block until the next sort
+        order = self.order
+        if order is None or position >= len(order):
+            return position
+        return order[-1 - position] if self.reversed else order[position]
+
+    def display_row(self, index):
+        last_modified = datetime.datetime.fromtimestamp(self.mtimes[index], datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        return self.names[index], self.sizes[index], last_modified
+
+    def sort_by(self, column, reverse=False):
+        """Sorts on the raw column values. Each column is sorted once; reversing only flips how the permutation is read."""
+        order = self._sort_cache.get(column)
+        if order is None:
+            if column == SIZE:
+                keys = self.sizes
+            elif column == MTIME:
+                keys = self.mtimes
+            else:
+                keys = [name.lower() for name in self.names]
+            order = array('l', sorted(range(len(self.names)), key=keys.__getitem__))
+            self._sort_cache[column] = order
+        self.order = order
+        self.reversed = reverse
+        if self.view is not None:
+            self._build_view()
+
+
+class VirtualTreeview:
+    """A ttk.Treeview that only ever holds the rows currently on screen.
+
+    A fixed pool of Tk items is rewritten in place as the user scrolls, so the widget costs the
+    same for ten rows as for a million. Selection is tracked as model row indices.
+    """
+
+    def __init__(self, master, model, columns, **tree_kwargs):
+        self.model = model
+        self.frame = ttk.Frame(master)
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", height=1, selectmode="extended", **tree_kwargs)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        self.tree.configure(yscrollcommand=lambda *_: None)  # The real scroll position lives in self.top
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        self.top = 0
+        self.visible_rows = 1
+        self.pool = []  # Tk item ids, reused for whichever rows are on screen
+        self.selected = set()
+        self._attached = 0  # Pool items currently shown; the rest are detached
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self._on_arrow(-1))
+        self.tree.bind("<Down>", lambda e: self._on_arrow(1))
+        self.tree.bind("<Prior>", lambda e: self._scroll_and_break(-self.visible_rows))
+        self.tree.bind("<Next>", lambda e: self._scroll_and_break(self.visible_rows))
+        self.tree.bind("<Home>", lambda e: self._scroll_and_break(-len(self.model)))
+        self.tree.bind("<End>", lambda e: self._scroll_and_break(len(self.model)))
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def clear(self):
+        self.model.clear()
+        self.selected.clear()
+        self.top = 0
+        self.refresh()
+
+    def reset_view(self):
+        """Redraws from the top after the model's rows changed wholesale, e.g. when a filter was applied."""
+        self.selected.clear()
+        self.top = 0
+        self.refresh()
+
+    def selection_indices(self):
+        return sorted(self.selected)
+
+    def scroll(self, delta):
+        self.scroll_to(self.top + delta)
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.model) - self.visible_rows))
+        if top != self.top:
+            self.top = top
+            self.refresh()
+
+    def rows_added(self):
+        """Redraws after the model grew, skipping the Tk work when the window is already full."""
+        if self._attached < self.visible_rows:
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def refresh(self):
+        count = self._window_size()
+        while len(self.pool) < count:
+            iid = self.tree.insert("", tk.END)
+            self.tree.detach(iid)
+            self.pool.append(iid)
+        selected_iids = []
+        for slot in range(count):
+            iid = self.pool[slot]
+            index = self.model.index_at(self.top + slot)
+            self.tree.item(iid, values=self.model.display_row(index))
+            if slot >= self._attached:
+                self.tree.move(iid, "", slot)
+            if index in self.selected:
+                selected_iids.append(iid)
+        for slot in range(count, self._attached):
+            self.tree.detach(self.pool[slot])
+        self._attached = count
+        self.tree.selection_set(selected_iids)
+        self._update_scrollbar()
+
+    def _window_size(self):
+        return max(0, min(self.visible_rows, len(self.model) - self.top))
+
+    def _visible_indices(self):
+        return {self.pool[slot]: self.model.index_at(self.top + slot) for slot in range(self._attached)}
+
+    def _update_scrollbar(self):
+        total = len(self.model)
+        if total <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + self.visible_rows) / total)
+
+    def _row_height(self):
+        try:
+            return int(ttk.Style(self.tree).lookup("Treeview", "rowheight")) or DEFAULT_ROW_HEIGHT
+        except (tk.TclError, ValueError):
+            return DEFAULT_ROW_HEIGHT
+
+    def _on_resize(self, event):
+        row_height = self._row_height()
+        header_height = row_height
+        if self._attached:
+            bbox = self.tree.bbox(self.pool[0])
+            if bbox:
+                header_height = bbox[1]
+        visible_rows = max(1, (event.height - header_height) // row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.top = max(0, min(self.top, len(self.model) - self.visible_rows))
+            self.refresh()
+
+    def _on_select(self, event):
+        # Reads the live selection rather than the event, so events queued by an earlier redraw stay harmless
+        current = set(self.tree.selection())
+        for iid, index in self._visible_indices().items():
+            if iid in current:
+                self.selected.add(index)
+            else:
+                self.selected.discard(index)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.model)))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll(int(amount) * step)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS reports small deltas
+        notches = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll(-3 * notches)
+        return "break"
+
+    def _scroll_and_break(self, delta):
+        self.scroll(delta)
+        return "break"
+
+    def _on_arrow(self, step):
+        focus = self.tree.focus()
+        if focus not in self.pool:
+            return None
+        slot = self.pool.index(focus)
+        count = self._attached
+        if (step < 0 and slot == 0 and self.top > 0) or (step > 0 and slot == count - 1 and self.top + count < len(self.model)):
+            # At the edge of the window: scroll the data under the same slot instead of leaving the widget
+            index = self.model.index_at(self.top + slot + step)
+            self.selected = {index}
+            self.scroll(step)
+            self.tree.focus(focus)
+            return "break"
+        return None
+
+
+class FolderTree:
+    """Folder pane built from CommonPrefixes, one level at a time.
+
+    A node's children are requested through load_children(prefix) the first time it is opened and
+    kept until the node is reloaded, so browsing back and forth costs no further requests.
+    """
+
+    def __init__(self, master, load_children, on_select):
+        self.load_children = load_children
+        self.on_select = on_select
+        self.frame = ttk.Frame(master)
+        self.tree = ttk.Treeview(self.frame, show="tree", selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        self.loaded = set()  # Prefixes whose children are all in the tree
+        self.loading = set()
+        self._selecting = False
+
+        self.tree.bind("<<TreeviewOpen>>", self._on_open)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def grid_remove(self):
+        self.frame.grid_remove()
+
+    def __contains__(self, prefix):
+        return self.tree.exists(self._iid(prefix))
+
+    def reset(self, root_prefix, label):
+        self.tree.delete(*self.tree.get_children())
+        self.loaded.clear()
+        self.loading.clear()
+        self.root_prefix = root_prefix
+        self.tree.insert("", tk.END, iid=self._iid(root_prefix), text=label, open=True)
+
+    def begin_load(self, prefix):
+        """Drops a node's children ahead of listing it again."""
+        iid = self._iid(prefix)
+        if not self.tree.exists(iid):
+            return
+        self.tree.delete(*self.tree.get_children(iid))
+        self.loaded.discard(prefix)
+        self.loading.add(prefix)
+
+    def add_folders(self, prefix, folders):
+        parent = self._iid(prefix)
+        if not self.tree.exists(parent):
+            return
+        for folder in folders:
+            iid = self._iid(folder)
+            if self.tree.exists(iid):
+                continue
+            self.tree.insert(parent, tk.END, iid=iid, text=folder[len(prefix):].rstrip('/'))
+            # A placeholder child gives the node an expand arrow before its contents are known
+            self.tree.insert(iid, tk.END, iid=self._placeholder(folder), text="...")
+
+    def finish_load(self, prefix, complete=True):
+        self.loading.discard(prefix)
+        placeholder = self._placeholder(prefix)
+        if complete:
+            self.loaded.add(prefix)
+            if self.tree.exists(placeholder):
+                self.tree.delete(placeholder)
+        elif self.tree.exists(self._iid(prefix)) and not self.tree.get_children(self._iid(prefix)):
+            self.tree.insert(self._iid(prefix), tk.END, iid=placeholder, text="...")
+
+    def select(self, prefix):
+        iid = self._iid(prefix)
+        if self.tree.exists(iid) and self.tree.selection() != (iid,):
+            self._selecting = True
+            self.tree.selection_set(iid)
+            self.tree.see(iid)
+
+    def _iid(self, prefix):
+        return "p:" + prefix
+
+    def _placeholder(self, prefix):
+        return "loading:" + prefix
+
+    def _on_open(self, event):
+        iid = self.tree.focus()
+        if not iid.startswith("p:"):
+            return
+        prefix = iid[2:]
+        if prefix not in self.loaded and prefix not in self.loading:
+            self.loading.add(prefix)
+            self.load_children(prefix)
+
+    def _on_select(self, event):
+        if self._selecting:
+            self._selecting = False
+            return
+        selection = self.tree.selection()
+        if selection and selection[0].startswith("p:"):
+            self.on_select(selection[0][2:])
@@ -0,0 +1,358 @@
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from s3_transfer import THROTTLE_CODES
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # Seconds
+RATE_BUCKETS = tuple(4 ** i * 64 * 1024 for i in range(8))  # Bytes per second, 64 KiB/s to 1 GiB/s
+DIRECTIONS = ('upload', 'download')
+
+
+class Histogram:
+    """Fixed-bucket histogram in the Prometheus style: a count per upper bound, plus the overall count and sum."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last slot is the +Inf bucket
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimates a quantile by interpolating inside the bucket it falls in, as histogram_quantile() does."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs, ending with ('+Inf', count)."""
+        running = 0
+        pairs = []
+        for bound, count in zip(list(self.bounds) + ['+Inf'], self.counts):
+            running += count
+            pairs.append((bound, running))
+        return pairs
+
+
+class _OperationStats:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.errors = 0
+        self.retries = 0
+        self.throttles = 0
+
+
+class _DirectionStats:
+    def __init__(self):
+        self.count = 0
+        self.failed = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.rate = Histogram(RATE_BUCKETS)
+
+
+class TransferMetrics:
+    """Request latencies, retries, throttles, transfer throughput and listing volume for one session.
+
+    attach() hooks a client's botocore events, so every call made through it is timed per operation,
+    including the ones s3transfer makes on its own threads. Retries come from the RetryAttempts botocore
+    reports for each call; throttles are counted per HTTP attempt. Transfers are measured by the upload
+    and download tasks through transfer().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.operations = {}
+            self.directions = {direction: _DirectionStats() for direction in DIRECTIONS}
+            self.task_retries = 0
+            self.list_pages = 0
+            self.list_keys = 0
+
+    # --- botocore hooks ---
+
+    def attach(self, s3_client):
+        """Registers the event hooks on s3_client. Attaching the same client twice is a no-op."""
+        events = s3_client.meta.events
+        tag = f"s3-metrics-{id(self)}"
+        events.register('before-call.s3', self._before_call, unique_id=f"{tag}-before")
+        events.register('after-call.s3', self._after_call, unique_id=f"{tag}-after")
+        events.register('after-call-error.s3', self._after_call_error, unique_id=f"{tag}-error")
+        events.register('response-received.s3', self._response_received, unique_id=f"{tag}-response")
+
+    def _before_call(self, model, context, **kwargs):
+        context['s3_metrics_start'] = (model.name, time.perf_counter())
+
+    def _after_call(self, parsed, context, **kwargs):
+        started = context.get('s3_metrics_start')
+        if not started:
+            return
+        operation, start = started
+        status = parsed.get('ResponseMetadata', {}).get('HTTPStatusCode', 200)
+        self._record_call(operation, time.perf_counter() - start, parsed, failed=status >= 400)
+        if operation == 'ListObjectsV2':
+            with self._lock:
+                self.list_pages += 1
+                self.list_keys += len(parsed.get('Contents', [])) + len(parsed.get('CommonPrefixes', []))
+
+    def _after_call_error(self, exception, context, **kwargs):
+        started = context.get('s3_metrics_start')
+        if started:
+            self._record_call(started[0], time.perf_counter() - started[1], getattr(exception, 'response', None) or {}, failed=True)
+
+    def _response_received(self, response_dict, parsed_response, context, exception, **kwargs):
+        operation = context.get('s3_metrics_start', ('unknown',))[0]
+        status = (response_dict or {}).get('status_code')
+        code = (parsed_response or {}).get('Error', {}).get('Code')
+        if status == 503 or code in THROTTLE_CODES:
+            with self._lock:
+                self._operation(operation).throttles += 1
+
+    def _record_call(self, operation, seconds, response, failed):
+        retries = response.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        with self._lock:
+            stats = self._operation(operation)
+            stats.latency.observe(seconds)
+            stats.retries += retries
+            if failed:
+                stats.errors += 1
+
+    def _operation(self, operation):
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = _OperationStats()
+        return stats
+
+    # --- Transfers ---
+
+    def transfer(self, direction, callback=None):
+        """Context manager yielding a progress callback that counts one transfer's bytes and then calls callback."""
+        return _Transfer(self, direction, callback)
+
+    def record_task_retry(self):
+        """Counts a whole transfer the scheduler retried after S3 throttled it."""
+        with self._lock:
+            self.task_retries += 1
+
+    def _add_bytes(self, direction, amount):
+        with self._lock:
+            self.directions[direction].bytes += amount
+
+    def _finish_transfer(self, direction, transferred, seconds, failed):
+        with self._lock:
+            stats = self.directions[direction]
+            stats.count += 1
+            stats.seconds += seconds
+            if failed:
+                stats.failed += 1
+            elif seconds > 0:
+                stats.rate.observe(transferred / seconds)
+
+    # --- Reporting ---
+
+    def snapshot(self):
+        """A JSON-serialisable copy of every counter."""
+        with self._lock:
+            operations = {}
+            for name, stats in sorted(self.operations.items()):
+                latency = stats.latency
+                operations[name] = {
+                    'count': latency.count, 'errors': stats.errors, 'retries': stats.retries, 'throttles': stats.throttles,
+                    'seconds': latency.sum, 'p50': latency.quantile(0.5), 'p90': latency.quantile(0.9), 'p99': latency.quantile(0.99),
+                    'buckets': latency.cumulative(),
+                }
+            transfers = {}
+            for direction, stats in self.directions.items():
+                transfers[direction] = {
+                    'count': stats.count, 'failed': stats.failed, 'bytes': stats.bytes, 'seconds': stats.seconds,
+                    'median_bytes_per_second': stats.rate.quantile(0.5),
+                    'rate_sum': stats.rate.sum, 'rate_buckets': stats.rate.cumulative(),
+                }
+            return {
+                'uptime_seconds': time.time() - self.started_at,
+                'requests': operations,
+                'transfers': transfers,
+                'task_retries': self.task_retries,
+                'list': {'pages': self.list_pages, 'keys': self.list_keys},
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """The counters in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in samples)
+
+        def histogram(name, help_text, series):
+            # series holds (labels, sum, cumulative buckets) per labelled histogram
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, total, buckets in series:
+                lines.extend(f"{name}_bucket{_labels([*labels, ('le', bound)])} {count}" for bound, count in buckets)
+                lines.append(f"{name}_sum{_labels(labels)} {total}")
+                lines.append(f"{name}_count{_labels(labels)} {buckets[-1][1]}")
+
+        requests = snapshot['requests']
+        histogram('s3_request_duration_seconds', 'Latency of S3 API calls, retries included.',
+                  [([('operation', name)], stats['seconds'], stats['buckets']) for name, stats in requests.items()])
+        for field, help_text in (('errors', 'S3 API calls that failed.'), ('retries', 'Retry attempts botocore made.'),
+                                 ('throttles', 'HTTP attempts S3 throttled with 503 or SlowDown.')):
+            metric(f's3_request_{field}_total', 'counter', help_text,
+                   [([('operation', name)], stats[field]) for name, stats in requests.items()])
+
+        transfers = snapshot['transfers']
+        metric('s3_transfer_bytes_total', 'counter', 'Bytes moved by uploads and downloads.',
+               [([('direction', direction)], stats['bytes']) for direction, stats in transfers.items()])
+        metric('s3_transfers_total', 'counter', 'Finished transfers.',
+               [([('direction', direction), ('outcome', outcome)], value) for direction, stats in transfers.items()
+                for outcome, value in (('ok', stats['count'] - stats['failed']), ('failed', stats['failed']))])
+        histogram('s3_transfer_bytes_per_second', 'Throughput of each successful transfer.',
+                  [([('direction', direction)], stats['rate_sum'], stats['rate_buckets']) for direction, stats in transfers.items()])
+        metric('s3_transfer_task_retries_total', 'counter', 'Whole transfers retried after throttling.', [([], snapshot['task_retries'])])
+        metric('s3_list_pages_total', 'counter', 'list_objects_v2 pages fetched.', [([], snapshot['list']['pages'])])
+        metric('s3_list_keys_total', 'counter', 'Keys and common prefixes returned by listings.', [([], snapshot['list']['keys'])])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path, fmt=None):
+        """Writes the metrics to path ('-' for stdout) as JSON, or as Prometheus text for fmt 'prometheus' or a .prom file."""
+        fmt = fmt or ('prometheus' if path.endswith(('.prom', '.txt')) else 'json')
+        text = self.to_prometheus() if fmt == 'prometheus' else self.to_json() + '\n'
+        if path == '-':
+            sys.stdout.write(text)
+        else:
+            with open(path, 'w') as f:
+                f.write(text)
+
+
+def _labels(labels):
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}' if labels else ''
+
+
+class _Transfer:
+    def __init__(self, metrics, direction, callback):
+        self.metrics = metrics
+        self.direction = direction
+        self.inner = callback
+        self.transferred = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.callback
+
+    def callback(self, amount):
+        if amount:
+            self.transferred += amount
+            self.metrics._add_bytes(self.direction, amount)
+        if self.inner:
+            self.inner(amount)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics._finish_transfer(self.direction, self.transferred, time.perf_counter() - self.start, failed=exc_type is not None)
+        return False
+
+
+class Profiler:
+    """cProfile over the calling thread and every thread started while it runs.
+
+    Before Python 3.12 a cProfile profiler only sees, and can only be disabled by, the thread that
+    enabled it, so each thread started with a target runs that target under its own, which the
+    thread disables itself when the target returns, and the results are merged. From 3.12 one
+    profiler already covers every thread.
+    """
+
+    PER_THREAD = sys.version_info < (3, 12)
+
+    def __init__(self):
+        self._profile = None
+        self._profiles = []  # Per-thread profilers their threads have disabled
+        self._lock = threading.Lock()
+        self.running = False
+
+    def start(self):
+        self._profiles = []
+        self.running = True
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        if self.PER_THREAD:
+            threading.setprofile(self._bootstrap)
+
+    def _bootstrap(self, frame, event, arg):
+        # First profile event in a new thread, the call of Thread.run: wrap the target it is about to call
+        sys.setprofile(None)
+        thread = threading.current_thread()
+        target = getattr(thread, '_target', None)
+        if self.running and target is not None and frame.f_code is threading.Thread.run.__code__:
+            thread._target = lambda *args, **kwargs: self.run(target, *args, **kwargs)
+
+    def run(self, func, *args, **kwargs):
+        """Calls func on this thread under a profiler of its own, for worker threads that existed before start()."""
+        if not (self.running and self.PER_THREAD):
+            return func(*args, **kwargs)
+        profiles = self._profiles
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                profiles.append(profile)
+
+    def stop(self):
+        """Stops profiling and returns the merged pstats.Stats, or None if nothing was recorded.
+
+        Before 3.12, threads still running their target keep profiling until it returns and are left out.
+        """
+        self.running = False
+        if self.PER_THREAD:
+            threading.setprofile(None)
+        self._profile.disable()
+        with self._lock:
+            profiles, self._profiles = [self._profile] + self._profiles, []
+        stats = None
+        for profile in profiles:
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            except TypeError:
+                pass  # A thread that never made a call leaves an empty profile
+        return stats
+
+
+def summarize(stats, limit=30, sort='cumulative'):
+    """The top entries of a pstats.Stats as text."""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,409 @@
+import base64
+import codecs
+import csv
+import io
+import json
+import os
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+from s3_compress import DecompressingWriter
+
+KB = 1024
+MB = 1024 * KB
+PREVIEW_BLOCK = 64 * KB  # Bytes per cache entry; ranged GETs fetch whole blocks
+PREVIEW_BYTES = 64 * KB  # Fetched when a row is selected, and again each time the view scrolls near its end
+MAX_PREVIEW_BYTES = 16 * MB  # Object bytes one preview loads before it stops fetching further ranges
+MAX_IMAGE_BYTES = 8 * MB
+MAX_IMAGE_SIDE = 480  # Pixels; larger images are scaled down to fit
+MAX_COLUMN_WIDTH = 40  # Characters per CSV column before cells are cut short
+DEFAULT_CACHE_BYTES = 64 * MB
+IMAGE_SIGNATURES = ((b'\x89PNG\r\n\x1a\n', 'PNG'), (b'GIF87a', 'GIF'), (b'GIF89a', 'GIF'), (b'\xff\xd8\xff', 'JPEG'))
+COMPRESSED_SIGNATURES = ((b'\x1f\x8b', 'gzip'), (b'\x28\xb5\x2f\xfd', 'zstd'))
+JSON_EXTENSIONS = ('.json', '.jsonl', '.ndjson', '.geojson')
+CSV_DELIMITERS = {'.csv': ',', '.tsv': '\t', '.tab': '\t', '.psv': '|'}
+
+
+class RangeCache:
+    """Least recently used object blocks, bounded by their total size.
+
+    Jobs fill it from worker threads while the Tk thread reads it, so every access takes the lock.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._blocks.get(key)
+            if data is not None:
+                self._blocks.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            old = self._blocks.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._blocks[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes and len(self._blocks) > 1:
+                _, evicted = self._blocks.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+            self.size = 0
+
+
+def _runs(indices):
+    """Groups ascending block indices into (first, last) runs of consecutive ones."""
+    runs = []
+    for index in indices:
+        if runs and runs[-1][1] == index - 1:
+            runs[-1][1] = index
+        else:
+            runs.append([index, index])
+    return runs
+
+
+def read_range(s3_client, bucket, key, version, size, start, length, cache):
+    """Bytes start to start + length of an object of the given size, assembled from cached PREVIEW_BLOCK blocks.
+
+    Missing blocks are fetched with one ranged GET per run of consecutive blocks and added to the
+    cache. version (the listing's size and mtime) keeps an overwritten object from being served
+    from stale blocks. With s3_client None only the cache is consulted, and None is returned when
+    any block is missing.
+    """
+    end = min(size, start + length)
+    if end <= start:
+        return b''
+    blocks = {}
+    missing = []
+    for index in range(start // PREVIEW_BLOCK, (end - 1) // PREVIEW_BLOCK + 1):
+        data = cache.get((bucket, key, version, index))
+        if data is None:
+            missing.append(index)
+        else:
+            blocks[index] = data
+    if missing and s3_client is None:
+        return None
+    for first, last in _runs(missing):
+        range_end = min((last + 1) * PREVIEW_BLOCK, size) - 1
+        body = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={first * PREVIEW_BLOCK}-{range_end}")['Body']
+        try:
+            data = body.read()
+        finally:
+            body.close()
+        for index in range(first, last + 1):
+            offset = (index - first) * PREVIEW_BLOCK
+            blocks[index] = data[offset:offset + PREVIEW_BLOCK]
+            cache.put((bucket, key, version, index), blocks[index])
+    data = b''.join(blocks[index] for index in sorted(blocks))
+    offset = start - start // PREVIEW_BLOCK * PREVIEW_BLOCK
+    return data[offset:offset + end - start]
+
+
+def sniff(name, head):
+    """Classifies an object from its name and first bytes as (kind, detail).
+
+    kind is 'image' (detail is the format), 'compressed' (detail is the codec), 'json', 'csv'
+    (detail is the delimiter), 'text' or 'binary'.
+    """
+    for signature, image_format in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return 'image', image_format
+    for signature, codec in COMPRESSED_SIGNATURES:
+        if head.startswith(signature):
+            return 'compressed', codec
+    sample = head[:4096]
+    if b'\0' in sample:
+        return 'binary', None
+    try:
+        # A multi-byte character cut off at the end of the sample is not a reason to call it binary
+        sample.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.start < len(sample) - 3:
+            return 'binary', None
+    extension = os.path.splitext(name.lower())[1]
+    if extension in CSV_DELIMITERS:
+        return 'csv', CSV_DELIMITERS[extension]
+    if extension in JSON_EXTENSIONS or sample.lstrip()[:1] in (b'{', b'['):
+        return 'json', None
+    return 'text', None
+
+
+def format_csv(lines, delimiter, widths):
+    """Lays out complete CSV lines as aligned columns. widths is filled from the first rows seen and reused after."""
+    rows = list(csv.reader(lines, delimiter=delimiter))
+    if not widths:
+        for row in rows:
+            for column, cell in enumerate(row):
+                width = max(1, min(MAX_COLUMN_WIDTH, len(cell)))
+                if column >= len(widths):
+                    widths.append(width)
+                else:
+                    widths[column] = max(widths[column], width)
+    formatted = []
+    for row in rows:
+        cells = []
+        for column, cell in enumerate(row):
+            width = widths[column] if column < len(widths) else MAX_COLUMN_WIDTH
+            cells.append((cell if len(cell) <= width else cell[:width - 1] + '…').ljust(width))
+        formatted.append('  '.join(cells).rstrip() + '\n')
+    return ''.join(formatted)
+
+
+def format_hex(data, offset):
+    """A classic hex dump of data, which starts at byte offset of the object."""
+    lines = []
+    for start in range(0, len(data), 16):
+        row = data[start:start + 16]
+        hex_part = ' '.join(f"{byte:02x}" for byte in row)
+        text_part = ''.join(chr(byte) if 32 <= byte < 127 else '.' for byte in row)
+        lines.append(f"{offset + start:08x}  {hex_part:<47}  {text_part}\n")
+    return ''.join(lines)
+
+
+class PreviewPane:
+    """Shows the start of the selected object and fetches further ranges as the view scrolls towards its end.
+
+    The pane asks for bytes through load_range(target, start, length) and is handed them, in order,
+    through append(target, data) or fail(target, error); target identifies the object so answers
+    for a row the user has already left are dropped.
+    """
+
+    def __init__(self, master, load_range):
+        self.load_range = load_range
+        self.frame = ttk.Frame(master)
+        self.title = ttk.Label(self.frame, anchor="w")
+        self.text = tk.Text(self.frame, width=60, wrap="char", state=tk.DISABLED)
+        self.scrollbar_y = ttk.Scrollbar(self.frame, orient="vertical", command=self.text.yview)
+        self.scrollbar_x = ttk.Scrollbar(self.frame, orient="horizontal", command=self.text.xview)
+        self.text.config(yscrollcommand=self._on_scroll, xscrollcommand=self.scrollbar_x.set)
+        self.image_label = ttk.Label(self.frame, anchor="center")
+        self.title.grid(row=0, column=0, columnspan=2, sticky="ew")
+        self.text.grid(row=1, column=0, sticky="nsew")
+        self.scrollbar_y.grid(row=1, column=1, sticky="ns")
+        self.scrollbar_x.grid(row=2, column=0, sticky="ew")
+        self.frame.grid_rowconfigure(1, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.target = None
+        self.image = None  # Tk drops a PhotoImage nobody holds a reference to
+        self._reset()
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def grid_remove(self):
+        self.frame.grid_remove()
+
+    def set_colors(self, foreground, background):
+        self.text.config(foreground=foreground, background=background, insertbackground=foreground)
+
+    def _reset(self):
+        self.name = ''
+        self.size = 0
+        self.loaded = 0
+        self.loading = False
+        self.kind = self.detail = None
+        self.stopped = False
+        self._decompressed = None  # BytesIO collecting what the DecompressingWriter produces
+        self._writer = None
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._pending = ''  # Text after the last newline, for kinds laid out line by line
+        self._pending_bytes = b''  # Bytes short of a full hex dump row
+        self._shown = 0  # Decoded bytes rendered so far, which is the hex dump offset
+        self._widths = []
+        self._image_data = bytearray()
+        self._backlog = b''  # Decompressed bytes not rendered yet, from _backlog_offset on
+        self._backlog_offset = 0
+
+    def clear(self, message=''):
+        self.target = None
+        self._reset()
+        self.title.config(text='')
+        self._show_text(message)
+
+    def begin(self, target, name, size):
+        """Starts previewing an object of the given size, fetching its first PREVIEW_BYTES."""
+        self.target = target
+        self._reset()
+        self.name, self.size = name, size
+        self.title.config(text=f"{name} ({size:,} bytes)")
+        if not size:
+            self._show_text("(empty object)")
+            return
+        self._show_text("Loading...")
+        self._request(0, PREVIEW_BYTES)
+
+    def _request(self, start, length):
+        self.loading = True
+        self.load_range(self.target, start, length)
+
+    def fail(self, target, error):
+        if target != self.target:
+            return
+        self.loading = False
+        self.stopped = True
+        if not self.loaded:
+            self._show_text(f"Preview failed: {error}")
+        else:
+            self._insert(f"\n[Could not load more: {error}]\n")
+
+    def append(self, target, data):
+        """Adds the next bytes of the object, as requested through load_range."""
+        if target != self.target:
+            return
+        self.loading = False
+        first = not self.loaded
+        self.loaded += len(data)
+        final = self.loaded >= self.size
+        if first:
+            self.kind, self.detail = sniff(self.name, data)
+            if self.kind == 'image':
+                if self.size > MAX_IMAGE_BYTES:
+                    self._show_text(f"{self.detail} image, too large to preview ({self.size / MB:.1f} MB).")
+                    self.stopped = True
+                    return
+            elif self.kind == 'compressed':
+                try:
+                    self._decompressed = io.BytesIO()
+                    self._writer = DecompressingWriter(self._decompressed, self.detail)
+                except RuntimeError:
+                    self._decompressed = self._writer = None  # zstd without a zstd module: show the raw bytes
+                    self.kind = 'binary'
+            self._show_text('')
+        if self.kind == 'image':
+            self._image_data += data
+            if not final:
+                self._request(self.loaded, self.size - self.loaded)
+            else:
+                self._show_image(bytes(self._image_data))
+            return
+        if self._writer is not None:
+            self._backlog = self._backlog[self._backlog_offset:] + self._decompress(data)
+            self._backlog_offset = 0
+            if self.kind == 'compressed':
+                if not self._backlog and not final:
+                    self._request(self.loaded, PREVIEW_BYTES)  # Not a single byte decoded yet
+                    return
+                stem, _ = os.path.splitext(self.name)
+                self.kind, self.detail = sniff(stem, self._backlog)
+                if self.kind == 'image':
+                    self.kind = 'binary'  # Compressed images cannot be shown from a partial read
+                self.text.config(wrap=self._wrap())
+            self._drain()
+            return
+        self._render(data, final)
+
+    def _drain(self):
+        """Renders decompressed bytes PREVIEW_BYTES at a time, as a small range can expand enormously."""
+        end = self._backlog_offset + PREVIEW_BYTES
+        data = self._backlog[self._backlog_offset:end]
+        self._backlog_offset = min(end, len(self._backlog))
+        self._render(data, self.loaded >= self.size and self._backlog_offset == len(self._backlog))
+
+    def _decompress(self, data):
+        try:
+            self._writer.write(data)
+        except Exception as e:
+            self.stopped = True
+            return f"\n[Could not decompress: {e}]".encode()
+        decoded = self._decompressed.getvalue()
+        self._decompressed.seek(0)
+        self._decompressed.truncate()
+        return decoded
+
+    def _render(self, data, final):
+        if self.kind == 'binary':
+            data = self._pending_bytes + data
+            cut = len(data) if final else len(data) - len(data) % 16
+            self._pending_bytes = data[cut:]
+            self._insert(format_hex(data[:cut], self._shown))
+            self._shown += cut
+            return
+        whole = final and not self._shown
+        self._shown += len(data)
+        text = self._decoder.decode(data, final)
+        if self.kind == 'json' and whole:
+            # The whole document arrived in one piece: show it indented
+            try:
+                text = json.dumps(json.loads(text), indent=2, ensure_ascii=False) + '\n'
+            except ValueError:
+                pass
+        if self.kind == 'csv':
+            text = self._pending + text
+            lines = text.splitlines(keepends=True)
+            self._pending = '' if final or not lines or lines[-1].endswith(('\n', '\r')) else lines.pop()
+            text = format_csv(lines, self.detail, self._widths)
+        self._insert(text)
+
+    def _insert(self, text):
+        if not text:
+            return
+        self.text.config(state=tk.NORMAL)
+        self.text.insert(tk.END, text)
+        self.text.config(state=tk.DISABLED)
+
+    def _show_text(self, text):
+        self.image_label.grid_remove()
+        self.image = None
+        self.text.config(state=tk.NORMAL, wrap=self._wrap())
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, text)
+        self.text.config(state=tk.DISABLED)
+        self.text.yview_moveto(0)
+        self.text.xview_moveto(0)
+
+    def _wrap(self):
+        # Tables and hex dumps keep their rows intact; wrapped text keeps a single long line scrollable
+        return "none" if self.kind in ('csv', 'binary') else "char"
+
+    def _show_image(self, data):
+        try:
+            image = self._photo_image(data)
+        except ImportError:
+            self._show_text(f"{self.detail} image: install Pillow to preview this format.")
+            return
+        except Exception as e:
+            self._show_text(f"Could not show the image: {e}")
+            return
+        self.image = image
+        self.image_label.config(image=image)
+        self.image_label.grid(row=1, column=0, sticky="nsew")
+
+    def _photo_image(self, data):
+        if self.detail in ('PNG', 'GIF'):
+            # Tk reads both natively
+            image = tk.PhotoImage(master=self.frame, data=base64.b64encode(data).decode('ascii'))
+            factor = -(-max(image.width(), image.height()) // MAX_IMAGE_SIDE)
+            return image.subsample(factor) if factor > 1 else image
+        from PIL import Image, ImageTk
+        image = Image.open(io.BytesIO(data))
+        image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+        return ImageTk.PhotoImage(image, master=self.frame)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar_y.set(first, last)
+        if float(last) >= 0.9:
+            # Deferred: this runs inside Tk's redraw of the text, too early to insert more into it
+            self.text.after_idle(self._load_more)
+
+    def _load_more(self):
+        if self.target is None or self.loading or self.stopped or self.kind in (None, 'image'):
+            return
+        if self._shown >= MAX_PREVIEW_BYTES or (self.loaded >= MAX_PREVIEW_BYTES and self.loaded < self.size):
+            self.stopped = True
+            self._insert(f"\n[Preview stops after {MAX_PREVIEW_BYTES // MB} MB; download the object to see the rest]\n")
+            return
+        if self._backlog_offset < len(self._backlog):
+            self._drain()
+        elif self.loaded < self.size:
+            self._request(self.loaded, PREVIEW_BYTES)
@@ -0,0 +1,67 @@
+import configparser
+import json
+import os
+import sys
+
+from s3_cache import default_cache_dir
+
+
+def aws_config_files():
+    """The shared credentials and config files, honouring the same environment overrides as botocore."""
+    aws_dir = os.path.join(os.path.expanduser('~'), '.aws')
+    return (os.environ.get('AWS_SHARED_CREDENTIALS_FILE') or os.path.join(aws_dir, 'credentials'),
+            os.environ.get('AWS_CONFIG_FILE') or os.path.join(aws_dir, 'config'))
+
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+        return [stat.st_mtime, stat.st_size]
+    except OSError:
+        return None
+
+
+def _parse_profiles(credentials_path, config_path):
+    profiles = set()
+    for path, is_config in ((credentials_path, False), (config_path, True)):
+        if not os.path.exists(path):
+            continue
+        config = configparser.RawConfigParser()
+        try:
+            config.read(path)
+        except configparser.Error as e:
+            print(f"Skipping unreadable AWS file {path}: {e}", file=sys.stderr)
+            continue
+        for section in config.sections():
+            # The config file names profiles "profile foo", except for "default"; other sections are sso-session etc.
+            if is_config:
+                if section == 'default':
+                    profiles.add(section)
+                elif section.startswith('profile '):
+                    profiles.add(section[len('profile '):].strip())
+            else:
+                profiles.add(section)
+    return sorted(profiles)
+
+
+def list_profiles(cache_path=None):
+    """Profiles from ~/.aws/credentials and ~/.aws/config, re-parsed only when either file's mtime or size changed."""
+    cache_path = cache_path or os.path.join(default_cache_dir(), 'profiles.json')
+    credentials_path, config_path = aws_config_files()
+    stamps = {credentials_path: _file_stamp(credentials_path), config_path: _file_stamp(config_path)}
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if cached.get('stamps') == stamps:
+            return cached['profiles']
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    profiles = _parse_profiles(credentials_path, config_path)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump({'stamps': stamps, 'profiles': profiles}, f)
+    except OSError:
+        pass  # The cache only saves a parse next time
+    return profiles
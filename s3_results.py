@@ -0,0 +1,185 @@
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+
+from s3_cache import default_cache_dir
+
+MAX_LOGS = 50  # Older transfer logs are removed as new ones are created
+ROW_CACHE_SIZE = 512  # Decoded log lines kept for redrawing the visible window
+OUTCOME_FIELDS = ('status', 'error', 'error_type')
+ERROR_CODE = re.compile(r"\(([A-Za-z][\w.]*)\)|^([A-Za-z][\w.]*):")
+OK = -1  # Error type id of a successful row
+OK_LINE_END = b'"status": "ok"}\n'
+
+
+def default_log_dir():
+    return os.path.join(default_cache_dir(), 'transfer-logs')
+
+
+def error_type(error):
+    """A short class for grouping failures: the S3 error code, or the exception's class name.
+
+    Errors already turned into text, such as the 'Code: message' of a DeleteObjects batch or a
+    botocore message carrying '(Code)', are classified by the code they contain.
+    """
+    if not isinstance(error, str):
+        code = (getattr(error, 'response', None) or {}).get('Error', {}).get('Code')
+        if code:
+            return code
+        if type(error).__name__ != 'ClientError':
+            return type(error).__name__
+        error = str(error)
+    match = ERROR_CODE.search(error)
+    return (match.group(1) or match.group(2)) if match else 'Error'
+
+
+class TransferLog:
+    """One operation's results streamed to a JSON lines file as each item finishes.
+
+    Only counters stay in memory: successes, failures and failures per error type. Each line holds
+    the item's own fields, enough to retry it, plus status 'ok' or 'error' (with error and
+    error_type), like the batch commands' output. Thread safe.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, path):
+        self.path = path
+        self.ok = 0
+        self.failed = 0
+        self.error_types = Counter()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, op, directory=None):
+        """A new log for op (e.g. 'upload') in the log directory, pruning the oldest logs beyond MAX_LOGS."""
+        directory = directory or default_log_dir()
+        os.makedirs(directory, exist_ok=True)
+        logs = sorted((entry.stat().st_mtime, entry.path) for entry in os.scandir(directory) if entry.name.endswith('.jsonl'))
+        for _, path in logs[:max(0, len(logs) - MAX_LOGS + 1)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{op}-{os.getpid()}-{next(cls._ids)}.jsonl"
+        return cls(os.path.join(directory, name))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def result(self, record, error=None):
+        record = dict(record)
+        if error is None:
+            record['status'] = 'ok'
+        else:
+            record['status'] = 'error'
+            record['error'] = str(error)
+            record['error_type'] = error_type(error)
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            if error is None:
+                self.ok += 1
+            else:
+                self.failed += 1
+                self.error_types[record['error_type']] += 1
+            self._file.write(line)
+
+
+def iter_records(path, failed_only=False, error_type=None):
+    """Streams a log's items, without their outcome fields, so they can be run again. error_type implies failed_only."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if (failed_only or error_type) and record.get('status') != 'error':
+                continue
+            if error_type and record.get('error_type') != error_type:
+                continue
+            yield {field: value for field, value in record.items() if field not in OUTCOME_FIELDS}
+
+
+class TransferLogModel:
+    """Rows of a transfer log for VirtualTreeview, read from the file on demand.
+
+    One pass over the log records each line's offset and outcome; lines are only decoded again as
+    they scroll into view. A filter shows just the failures, or just one error type's.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = array('q')
+        self.kinds = array('l')  # OK, or an index into error_types
+        self.error_types = []
+        self.view = None  # Row indices passing the filter, None for every row
+        self.failures_only = False
+        self.error_type = None
+        self._rows = {}
+        self._file = open(path, 'rb')
+        type_ids = {}
+        offset = 0
+        for line in self._file:
+            # Successes end with the status TransferLog.result appended, so only failures need decoding
+            if line.endswith(OK_LINE_END):
+                kind = OK
+            else:
+                record = json.loads(line)
+                kind = OK
+                if record.get('status') == 'error':
+                    name = record.get('error_type')
+                    kind = type_ids.get(name)
+                    if kind is None:
+                        kind = type_ids[name] = len(self.error_types)
+                        self.error_types.append(name)
+            self.offsets.append(offset)
+            self.kinds.append(kind)
+            offset += len(line)
+
+    def __len__(self):
+        return len(self.offsets) if self.view is None else len(self.view)
+
+    def close(self):
+        self._file.close()
+
+    def clear(self):
+        self.view = array('q')
+
+    def set_filter(self, failures_only=False, error_type=None):
+        """Shows every row, only failures, or only the failures of error_type. Returns the number of rows shown."""
+        self.failures_only = failures_only or error_type is not None
+        self.error_type = error_type
+        if not self.failures_only:
+            self.view = None
+        elif error_type is None:
+            self.view = array('q', (index for index, kind in enumerate(self.kinds) if kind != OK))
+        else:
+            wanted = self.error_types.index(error_type) if error_type in self.error_types else -2
+            self.view = array('q', (index for index, kind in enumerate(self.kinds) if kind == wanted))
+        return len(self)
+
+    def index_at(self, position):
+        return position if self.view is None else self.view[position]
+
+    def record(self, index):
+        record = self._rows.get(index)
+        if record is None:
+            if len(self._rows) >= ROW_CACHE_SIZE:
+                self._rows.clear()
+            self._file.seek(self.offsets[index])
+            record = self._rows[index] = json.loads(self._file.readline())
+        return record
+
+    def display_row(self, index):
+        record = self.record(index)
+        return record.get('name') or record.get('key') or record.get('path', ''), record.get('status', ''), record.get('error', '')
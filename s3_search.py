@@ -0,0 +1,316 @@
+import bisect
+import datetime
+import re
+import time
+from array import array
+
+GLOB_CHARS = '*?['
+SIZE_UNITS = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2,
+              'G': 1024 ** 3, 'GB': 1024 ** 3, 'T': 1024 ** 4, 'TB': 1024 ** 4}
+AGE_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+MAX_CACHED_TRIGRAMS = 64
+RESORT_MIN_TAIL = 50_000  # Unsorted keys tolerated after the prefix permutation before it is rebuilt
+
+
+def parse_size(text):
+    """Parses '1500', '10K' or '2.5GB' into bytes. Empty text means no bound."""
+    text = (text or '').strip().upper()
+    if not text:
+        return None
+    match = re.fullmatch(r'([0-9.]+)\s*([KMGT]?B?)', text)
+    if not match:
+        raise ValueError(f"Invalid size '{text}', expected e.g. 1500, 10K or 2.5GB")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def parse_time(text):
+    """Parses 'YYYY-MM-DD[ HH:MM[:SS]]' (UTC) or an age such as '30m', '12h' or '7d' into a timestamp."""
+    text = (text or '').strip()
+    if not text:
+        return None
+    match = re.fullmatch(r'([0-9.]+)\s*([mhdw])', text)
+    if match:
+        return time.time() - float(match.group(1)) * AGE_UNITS[match.group(2)]
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.datetime.strptime(text, fmt).replace(tzinfo=datetime.timezone.utc).timestamp()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date '{text}', expected YYYY-MM-DD, 'YYYY-MM-DD HH:MM' or an age like 7d")
+
+
+def is_glob(query):
+    return any(char in query for char in GLOB_CHARS)
+
+
+def _glob_class(pattern, start):
+    """The regex for the character class opening at pattern[start], parsed as fnmatch does, and the index after it.
+
+    None when the '[' is never closed, so it matches itself. '[!' negates, a ']' first in the set
+    is a member, and a leading '^' is a literal; reversed ranges such as 'z-a' match nothing.
+    """
+    i = j = start + 1
+    if j < len(pattern) and pattern[j] == '!':
+        j += 1
+    if j < len(pattern) and pattern[j] == ']':
+        j += 1
+    while j < len(pattern) and pattern[j] != ']':
+        j += 1
+    if j >= len(pattern):
+        return None, start + 1
+    body = pattern[i:j]
+    if '-' not in body:
+        body = body.replace('\\', r'\\')
+    else:
+        chunks = []
+        k = i + 2 if pattern[i] == '!' else i + 1
+        while True:
+            k = pattern.find('-', k, j)
+            if k < 0:
+                break
+            chunks.append(pattern[i:k])
+            i = k + 1
+            k = k + 3
+        chunk = pattern[i:j]
+        if chunk:
+            chunks.append(chunk)
+        else:
+            chunks[-1] += '-'
+        # Empty ranges are an error in a regex
+        for k in range(len(chunks) - 1, 0, -1):
+            if chunks[k - 1][-1] > chunks[k][0]:
+                chunks[k - 1] = chunks[k - 1][:-1] + chunks[k][1:]
+                del chunks[k]
+        body = '-'.join(chunk.replace('\\', r'\\').replace('-', r'\-') for chunk in chunks)
+    body = re.sub(r'([&~|])', r'\\\1', body)  # Set operations a future re may give meaning to
+    if not body:
+        return '(?!)', j + 1
+    if body == '!':
+        return '.', j + 1
+    if body[0] == '!':
+        body = '^' + body[1:]
+    elif body[0] in ('^', '['):
+        body = '\\' + body
+    return f'[{body}]', j + 1
+
+
+def _glob_tokens(pattern):
+    """(literal, regex) for each piece of a glob: a literal character, or None for a wildcard or character class."""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '*':
+            yield None, '.*'
+        elif char == '?':
+            yield None, '.'
+        elif char == '[':
+            regex, end = _glob_class(pattern, i)
+            if regex is not None:
+                yield None, regex
+                i = end
+                continue
+            yield char, re.escape(char)
+        else:
+            yield char, re.escape(char)
+        i += 1
+
+
+def glob_to_regex(pattern, ignore_case=True):
+    """Compiles a glob that must match the whole key, case-insensitive by default. '*' and '?' also match '/'.
+
+    Character classes follow fnmatch, and an unclosed '[' is a literal, so any user input compiles.
+    """
+    regex = ''.join(fragment for _, fragment in _glob_tokens(pattern))
+    return re.compile(regex, (re.IGNORECASE if ignore_case else 0) | re.DOTALL)
+
+
+def glob_literal_prefix(pattern):
+    """The part of a glob before its first wildcard, which every match must start with."""
+    prefix = []
+    for literal, _ in _glob_tokens(pattern):
+        if literal is None:
+            break
+        prefix.append(literal)
+    return ''.join(prefix)
+
+
+def _glob_literals(pattern):
+    """Literal runs of a glob, outside any wildcard or character class."""
+    runs, run = [], []
+    for literal, _ in _glob_tokens(pattern):
+        if literal is None:
+            if run:
+                runs.append(''.join(run))
+            run = []
+        else:
+            run.append(literal)
+    if run:
+        runs.append(''.join(run))
+    return runs
+
+
+class _SortedView:
+    """Lets bisect search the lowered keys through a sort permutation without building a sorted copy."""
+
+    def __init__(self, lowered, order):
+        self.lowered = lowered
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, position):
+        return self.lowered[self.order[position]]
+
+
+class KeyIndex:
+    """Search index over listed keys, grown page by page as the listing streams in.
+
+    A sort permutation of the lowercased keys answers prefix queries with two binary searches; keys
+    added since it was built are scanned until there are enough of them to be worth re-sorting.
+    Substring and glob queries use trigram posting lists. Each list is built by one scan the first
+    time a query needs that trigram and then kept up to date as pages arrive, so the listing itself
+    never pays for trigrams nobody searches for.
+    """
+
+    def __init__(self, max_trigrams=MAX_CACHED_TRIGRAMS):
+        self.max_trigrams = max_trigrams
+        self.clear()
+
+    def clear(self):
+        self.lowered = []
+        self.trigrams = {}
+        self._order = None
+
+    def __len__(self):
+        return len(self.lowered)
+
+    def add(self, names):
+        start = len(self.lowered)
+        lowered = self.lowered
+        lowered.extend(name.lower() for name in names)
+        for trigram, postings in self.trigrams.items():
+            postings.extend(index for index in range(start, len(lowered)) if trigram in lowered[index])
+
+    def _postings(self, trigram):
+        postings = self.trigrams.get(trigram)
+        if postings is None:
+            if len(self.trigrams) >= self.max_trigrams:
+                self.trigrams.clear()  # Keeps the per-page upkeep in add() bounded
+            postings = self.trigrams[trigram] = array('l', [index for index, key in enumerate(self.lowered) if trigram in key])
+        return postings
+
+    def prefix_matches(self, prefix):
+        """Ascending indices of the keys starting with prefix."""
+        prefix = prefix.lower()
+        lowered = self.lowered
+        if not prefix:
+            return list(range(len(lowered)))
+        sorted_count = len(self._order) if self._order is not None else 0
+        if self._order is None or len(lowered) - sorted_count > max(RESORT_MIN_TAIL, sorted_count // 4):
+            self._order = array('l', sorted(range(len(lowered)), key=lowered.__getitem__))
+            sorted_count = len(self._order)
+        view = _SortedView(lowered, self._order)
+        lo = bisect.bisect_left(view, prefix)
+        hi = bisect.bisect_left(view, prefix + '\U0010ffff', lo)
+        matches = sorted(self._order[lo:hi])
+        matches.extend(index for index in range(sorted_count, len(lowered)) if lowered[index].startswith(prefix))
+        return matches
+
+    def _candidates(self, literal, candidates):
+        """Indices that may contain literal. Narrowing searches reuse their candidates rather than touching the index."""
+        if candidates is not None:
+            return candidates
+        literal = literal.lower()
+        if len(literal) < 3:
+            return range(len(self.lowered))
+        trigrams = [literal[i:i + 3] for i in range(len(literal) - 2)]
+        known = [self.trigrams[trigram] for trigram in trigrams if trigram in self.trigrams]
+        return min(known, key=len) if known else self._postings(trigrams[0])
+
+    def substring_matches(self, text, candidates=None):
+        """Ascending indices of the keys containing text, optionally only among candidates."""
+        text = text.lower()
+        lowered = self.lowered
+        return [index for index in self._candidates(text, candidates) if text in lowered[index]]
+
+    def glob_matches(self, pattern, candidates=None):
+        regex = glob_to_regex(pattern)
+        prefix = glob_literal_prefix(pattern)
+        if candidates is not None:
+            pool = candidates
+        elif prefix:
+            pool = self.prefix_matches(prefix)
+        else:
+            literals = _glob_literals(pattern)
+            pool = self._candidates(max(literals, key=len), None) if literals else range(len(self.lowered))
+        lowered = self.lowered
+        return [index for index in pool if regex.fullmatch(lowered[index])]
+
+    def search(self, query, candidates=None):
+        if is_glob(query):
+            return self.glob_matches(query, candidates)
+        return self.substring_matches(query, candidates)
+
+
+class ListFilter:
+    """A key query (substring, or glob when it contains * ? or [) plus optional size and mtime bounds."""
+
+    def __init__(self, query='', min_size=None, max_size=None, newer_than=None, older_than=None):
+        self.query = query
+        self.min_size = min_size
+        self.max_size = max_size
+        self.newer_than = newer_than
+        self.older_than = older_than
+        self._regex = glob_to_regex(query) if is_glob(query) else None
+
+    @property
+    def active(self):
+        return bool(self.query) or any(bound is not None for bound in (self.min_size, self.max_size, self.newer_than, self.older_than))
+
+    def narrows(self, other):
+        """True if everything this filter matches is also matched by other, so other's results can be searched instead."""
+        if other is None or is_glob(self.query) or is_glob(other.query) or other.query.lower() not in self.query.lower():
+            return False
+        return (_tighter(self.min_size, other.min_size, max) and _tighter(self.max_size, other.max_size, min)
+                and _tighter(self.newer_than, other.newer_than, max) and _tighter(self.older_than, other.older_than, min))
+
+    def list_prefix(self):
+        """Extra listing prefix implied by the query, for pushing the filter down into list_objects_v2.
+
+        Globs match regardless of case but S3 prefixes do not, so only the literal head up to its
+        first cased character is pushed down: '2024/*.log' lists '2024/', 'Logs/*' lists everything.
+        """
+        head = glob_literal_prefix(self.query) if self._regex else ''
+        for i, char in enumerate(head):
+            if char.lower() != char.upper():
+                return head[:i]
+        return head
+
+    def match(self, key, size, mtime):
+        """Checks a single object, for filtering a listing as it streams past."""
+        if self._regex:
+            if not self._regex.fullmatch(key):
+                return False
+        elif self.query and self.query.lower() not in key.lower():
+            return False
+        return self._in_bounds(size, mtime)
+
+    def _in_bounds(self, size, mtime):
+        return ((self.min_size is None or size >= self.min_size) and (self.max_size is None or size <= self.max_size)
+                and (self.newer_than is None or mtime >= self.newer_than) and (self.older_than is None or mtime <= self.older_than))
+
+    def apply(self, index, sizes, mtimes, candidates=None):
+        """Ascending indices of the rows that pass, searching only candidates when given."""
+        if self.query:
+            matches = index.search(self.query, candidates)
+        else:
+            matches = range(len(index)) if candidates is None else candidates
+        if any(bound is not None for bound in (self.min_size, self.max_size, self.newer_than, self.older_than)):
+            return [i for i in matches if self._in_bounds(sizes[i], mtimes[i])]
+        return list(matches)
+
+
+def _tighter(new, old, pick):
+    # A bound is at least as tight when the old one was unset, or picking the stricter of the two gives the new one
+    return old is None or (new is not None and pick(new, old) == new)
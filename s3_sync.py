@@ -0,0 +1,266 @@
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+from s3_cache import default_cache_dir
+from s3_listing import DEFAULT_LIST_WORKERS, iter_pages
+from s3_transfer import MB, TransferSettings, download_task, upload_task
+
+HASH_BLOCK_SIZE = 1024 * 1024
+BOTO3_DEFAULT_CHUNK_SIZE = 8 * MB
+INLINE_HASH_LIMIT = 4  # Fewer files than this are hashed in-process rather than paying for worker start-up
+
+
+def file_etag(path, part_size=0):
+    """The ETag S3 would give this file: its MD5, or the multipart form md5(part md5s)-N when part_size is set."""
+    with open(path, 'rb') as f:
+        if not part_size:
+            digest = hashlib.md5()
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+            return digest.hexdigest()
+        part_digests = []
+        while True:
+            digest = hashlib.md5()
+            remaining = part_size
+            while remaining:
+                block = f.read(min(HASH_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+            if remaining == part_size:
+                break
+            part_digests.append(digest.digest())
+            if remaining:
+                break
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+
+def _hash_worker(item):
+    path, part_size = item
+    try:
+        return file_etag(path, part_size)
+    except OSError:
+        return None
+
+
+class HashCache:
+    """ETags of local files keyed by (path, part size), valid while the file's size and mtime are unchanged."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(default_cache_dir(), 'hashes.sqlite3')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS hashes (
+                    path TEXT NOT NULL,
+                    part_size INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    etag TEXT NOT NULL,
+                    PRIMARY KEY (path, part_size)
+                ) WITHOUT ROWID
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, items):
+        """Takes (path, size, mtime, part_size) tuples and returns {(path, part_size): etag} for the ones still valid."""
+        found = {}
+        with self._connect() as conn:
+            for path, size, mtime, part_size in items:
+                row = conn.execute("SELECT etag FROM hashes WHERE path=? AND part_size=? AND size=? AND mtime=?",
+                                   (path, part_size, size, mtime)).fetchone()
+                if row:
+                    found[(path, part_size)] = row[0]
+        return found
+
+    def put_many(self, entries):
+        """Takes (path, size, mtime, part_size, etag) tuples."""
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO hashes (path, part_size, size, mtime, etag) VALUES (?, ?, ?, ?, ?)",
+                             [(path, part_size, size, mtime, etag) for path, size, mtime, part_size, etag in entries])
+
+
+class SyncPlan:
+    """What a sync will do: transfer tasks for the scheduler, orphans it may delete, and how many files already match."""
+
+    def __init__(self):
+        self.tasks = []
+        self.orphans = []
+        self.unchanged = 0
+
+
+def _part_size_for(etag, size, chunk_size):
+    """Guesses the part size behind a multipart ETag, trying our own part size and boto3's default first."""
+    parts = int(etag.rsplit('-', 1)[1])
+    guess = -(-size // parts)
+    for part_size in (chunk_size, BOTO3_DEFAULT_CHUNK_SIZE, -(-guess // MB) * MB, guess):
+        if part_size and -(-size // part_size) == parts:
+            return part_size
+    return None
+
+
+def walk_files(local_dir):
+    """Yields (path, relative key, size, mtime) for every file under local_dir, using scandir's cached stat results."""
+    stack = [(local_dir, '')]
+    while stack:
+        directory, rel = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, f"{rel}{entry.name}/"))
+                elif entry.is_file():
+                    stat = entry.stat()
+                    yield entry.path, f"{rel}{entry.name}", stat.st_size, stat.st_mtime
+
+
+class SyncEngine:
+    """Diffs a local tree against a prefix by size, mtime and ETag, and plans only the transfers that differ.
+
+    Files whose size matches and whose copy is not newer than the other side's are taken as unchanged
+    without reading them. Anything else is hashed, in worker processes and through the hash cache,
+    and compared with the object's ETag, including multipart ETags.
+    """
+
+    def __init__(self, s3_client, bucket, settings=None, hash_cache=None, hash_workers=None, cancel_event=None, on_progress=None,
+                 list_workers=DEFAULT_LIST_WORKERS):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.settings = settings or TransferSettings()
+        self.hash_cache = hash_cache
+        self.hash_workers = hash_workers
+        self.cancel_event = cancel_event
+        self.on_progress = on_progress
+        self.list_workers = list_workers
+
+    def _cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def _report(self, text):
+        if self.on_progress:
+            self.on_progress(text)
+
+    def remote_index(self, prefix):
+        """{relative key: (size, mtime, etag)} for every object under prefix, skipping folder markers."""
+        index = {}
+        for page in iter_pages(self.s3_client, self.bucket, prefix, cancel_event=self.cancel_event, list_workers=self.list_workers):
+            for obj in page:
+                rel = obj['Key'][len(prefix):]
+                if rel and not rel.endswith('/'):
+                    index[rel] = (obj['Size'], obj['LastModified'].timestamp(), obj.get('ETag', '').strip('"'))
+            self._report(f"{len(index)} remote objects listed")
+        return index
+
+    def hash_files(self, items):
+        """Takes (path, size, mtime, part_size) tuples and returns {(path, part_size): etag}."""
+        hashes = self.hash_cache.get_many(items) if self.hash_cache else {}
+        missing = [item for item in items if (item[0], item[3]) not in hashes]
+        if not missing:
+            return hashes
+        self._report(f"hashing {len(missing)} files")
+        work = [(path, part_size) for path, _, _, part_size in missing]
+        if len(work) < INLINE_HASH_LIMIT:
+            results = [_hash_worker(item) for item in work]
+        else:
+            # Spawned rather than forked: forking a process that is running Tk and worker threads is unsafe
+            with ProcessPoolExecutor(max_workers=self.hash_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                results = list(executor.map(_hash_worker, work, chunksize=16))
+        fresh = []
+        for (path, size, mtime, part_size), etag in zip(missing, results):
+            if etag is not None:
+                hashes[(path, part_size)] = etag
+                fresh.append((path, size, mtime, part_size, etag))
+        if self.hash_cache and fresh:
+            self.hash_cache.put_many(fresh)
+        return hashes
+
+    def _changed_by_hash(self, candidates):
+        """Takes (path, size, mtime, remote etag, item) tuples of size-matched files and returns the items whose content differs."""
+        requests = []
+        for path, size, mtime, etag, item in candidates:
+            part_size = _part_size_for(etag, size, self.settings.chunk_size) if '-' in etag else 0
+            requests.append((path, size, mtime, part_size, etag, item))
+        hashable = [(path, size, mtime, part_size) for path, size, mtime, part_size, _, _ in requests if part_size is not None]
+        hashes = self.hash_files(hashable)
+        # Unknown part sizes and unreadable files count as changed
+        return [item for path, _, _, part_size, etag, item in requests
+                if part_size is None or hashes.get((path, part_size)) != etag]
+
+    def plan_upload(self, local_dir, prefix, delete=False):
+        """Plans uploading local_dir to prefix. Orphans are remote keys with no local file."""
+        plan = SyncPlan()
+        remote = self.remote_index(prefix)
+        candidates = []
+        for path, rel, size, mtime in walk_files(local_dir):
+            if self._cancelled():
+                return plan
+            existing = remote.pop(rel, None)
+            if existing is None or existing[0] != size:
+                plan.tasks.append((path, prefix + rel))
+            elif mtime <= existing[1]:
+                plan.unchanged += 1
+            else:
+                candidates.append((path, size, mtime, existing[2], (path, prefix + rel)))
+        changed = self._changed_by_hash(candidates)
+        plan.unchanged += len(candidates) - len(changed)
+        plan.tasks.extend(changed)
+        if delete:
+            plan.orphans = sorted(prefix + rel for rel in remote)
+        return plan
+
+    def plan_mirror(self, prefix, local_dir, delete=False):
+        """Plans downloading prefix into local_dir. Orphans are local files with no remote key."""
+        plan = SyncPlan()
+        remote = self.remote_index(prefix)
+        local_root = os.path.abspath(local_dir)
+        candidates = []
+        for rel, (size, mtime, etag) in remote.items():
+            if self._cancelled():
+                return plan
+            path = os.path.abspath(os.path.join(local_root, *rel.split('/')))
+            if not path.startswith(local_root + os.sep):
+                continue  # Keys such as '../x' must not escape the target directory
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                plan.tasks.append((prefix + rel, path, mtime))
+                continue
+            if stat.st_size != size:
+                plan.tasks.append((prefix + rel, path, mtime))
+            elif mtime <= stat.st_mtime:
+                plan.unchanged += 1
+            else:
+                candidates.append((path, size, stat.st_mtime, etag, (prefix + rel, path, mtime)))
+        changed = self._changed_by_hash(candidates)
+        plan.unchanged += len(candidates) - len(changed)
+        plan.tasks.extend(changed)
+        if delete and os.path.isdir(local_root):
+            plan.orphans = sorted(path for path, rel, _, _ in walk_files(local_root)
+                                  if rel not in remote and not path.endswith('.s3part'))
+        return plan
+
+    def upload_tasks(self, plan, journal=None, Callback=None, metrics=None):
+        for path, key in plan.tasks:
+            yield upload_task(path, self.bucket, key, settings=self.settings, journal=journal, Callback=Callback, metrics=metrics)
+
+    def mirror_tasks(self, plan, journal=None, Callback=None, metrics=None):
+        for key, path, mtime in plan.tasks:
+            yield mirror_task(self.bucket, key, path, mtime, settings=self.settings, journal=journal, Callback=Callback, metrics=metrics)
+
+
+def mirror_task(bucket, s3_key, save_path, mtime, settings=None, journal=None, Callback=None, metrics=None):
+    """A download task that creates parent folders and stamps the file with the object's mtime for the next sync."""
+    report_key, success_message, download = download_task(bucket, s3_key, save_path, settings=settings, journal=journal, Callback=Callback,
+                                                          metrics=metrics)
+
+    def run(s3_client):
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        download(s3_client)
+        os.utime(save_path, (mtime, mtime))
+    return report_key, success_message, run
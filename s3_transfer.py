@@ -0,0 +1,668 @@
+import mmap
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from collections import deque
+from contextlib import nullcontext
+from itertools import islice
+
+from s3_compress import CompressingReader, DecompressingWriter, codec_for_encoding
+
+DEFAULT_CONCURRENCY = 16
+MB = 1024 * 1024
+DEFAULT_MULTIPART_THRESHOLD = 64 * MB
+DEFAULT_CHUNK_SIZE = 16 * MB
+DEFAULT_PART_CONCURRENCY = 8
+MAX_POOL_CONNECTIONS = 256
+MAX_COPY_OBJECT_SIZE = 5 * 1024 * MB  # CopyObject's limit; bigger objects are copied part by part with UploadPartCopy
+COPY_PART_SIZE = 512 * MB  # Copied parts move no data through us, so they can be far larger than transfer parts
+COPIED_HEADERS = ('ContentType', 'ContentEncoding', 'ContentDisposition', 'ContentLanguage', 'CacheControl', 'Metadata')
+READ_SIZE = 256 * 1024  # Bytes copied from a ranged GET into the output file per read
+THROTTLE_CODES = ('SlowDown', 'Throttling', 'ThrottlingException', 'RequestLimitExceeded', 'TooManyRequestsException', '503')
+
+
+def is_throttle_error(e):
+    """True for S3 503 SlowDown style errors, including ones s3transfer has re-raised as plain text."""
+    response = getattr(e, 'response', None) or {}
+    code = response.get('Error', {}).get('Code')
+    status = response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+    if code in THROTTLE_CODES or status == 503:
+        return True
+    return any(f"({throttle_code})" in str(e) for throttle_code in THROTTLE_CODES)
+
+
+class AdaptiveLimiter:
+    """Concurrency gate that halves its limit on throttling and creeps back up after a run of successes."""
+
+    def __init__(self, max_concurrency, min_concurrency=1, increase_after=20):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = self.max_concurrency
+        self.increase_after = increase_after
+        self._active = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._active >= self.limit:
+                self._cond.wait()
+            self._active += 1
+
+    def release(self, throttled=False):
+        with self._cond:
+            self._active -= 1
+            if throttled:
+                self.limit = max(self.min_concurrency, self.limit // 2)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.increase_after and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+class BandwidthLimiter:
+    """Token bucket shared by every transfer using the same settings, so the cap applies to the link as a whole."""
+
+    def __init__(self, bytes_per_second):
+        self.rate = bytes_per_second
+        self._tokens = bytes_per_second
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate) - amount
+            self._last = now
+            deficit = -self._tokens
+        if deficit > 0:
+            time.sleep(deficit / self.rate)
+
+
+class TransferSettings:
+    """Part size, per-object concurrency and bandwidth cap for single-object transfers.
+
+    Uploads go through boto3's multipart machinery with config(); downloads use ranged_download.
+    max_bandwidth is in bytes per second across all transfers, None for unlimited.
+    """
+
+    def __init__(self, multipart_threshold=DEFAULT_MULTIPART_THRESHOLD, chunk_size=DEFAULT_CHUNK_SIZE,
+                 max_concurrency=DEFAULT_PART_CONCURRENCY, max_bandwidth=None):
+        self.multipart_threshold = max(1, multipart_threshold)
+        # S3 rejects multipart parts under 5 MiB
+        self.chunk_size = max(5 * MB, chunk_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_bandwidth = max_bandwidth or None
+        self.bandwidth_limiter = BandwidthLimiter(self.max_bandwidth) if self.max_bandwidth else None
+
+    def config(self):
+        from boto3.s3.transfer import TransferConfig
+        return TransferConfig(multipart_threshold=self.multipart_threshold, multipart_chunksize=self.chunk_size,
+                              max_concurrency=self.max_concurrency, use_threads=True)
+
+    def pool_connections(self, file_concurrency):
+        """Connections a shared client needs for file_concurrency transfers each running parts in parallel."""
+        return min(MAX_POOL_CONNECTIONS, max(1, file_concurrency) * self.max_concurrency)
+
+    def throttle(self, amount):
+        if self.bandwidth_limiter:
+            self.bandwidth_limiter.consume(amount)
+
+    def progress_callback(self, callback=None):
+        """Wraps a boto3 Callback so upload threads also wait on the bandwidth cap as they send."""
+        if not self.bandwidth_limiter:
+            return callback
+
+        def throttled(amount):
+            self.throttle(amount)
+            if callback:
+                callback(amount)
+        return throttled
+
+
+class TransferScheduler:
+    """Runs many independent transfers at once with a bounded, throttle-aware level of concurrency.
+
+    Tasks are (report_key, success_message, func) tuples. func(s3_client) does the transfer; results
+    are gathered into the same (successful list, failed dict) pair the GUI has always reported.
+    Without keep_results they are left to on_complete and run() returns them empty, so a run over
+    millions of files holds no per-file state. Throttled tasks are retried on top of botocore's own
+    few attempts, within the budget set out at RETRY_CONFIG in s3_clients.
+    """
+
+    def __init__(self, s3_client, max_concurrency=DEFAULT_CONCURRENCY, max_throttle_retries=5, cancel_event=None, on_complete=None,
+                 metrics=None, keep_results=True):
+        self.s3_client = s3_client
+        self.max_concurrency = max(1, max_concurrency)
+        self.limiter = AdaptiveLimiter(self.max_concurrency)
+        self.max_throttle_retries = max_throttle_retries
+        self.cancel_event = cancel_event
+        self.on_complete = on_complete
+        self.metrics = metrics
+        self.keep_results = keep_results
+
+    def run(self, tasks):
+        successful = []
+        failed = {}
+        succeeded_count = failed_count = 0
+        in_flight = {}
+        # Tasks are pulled lazily so a generator over a huge tree never materialises all at once
+        task_iter = iter(tasks)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="s3-transfer") as executor:
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < self.max_concurrency * 2 and not self._cancelled():
+                    try:
+                        task = next(task_iter)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    in_flight[executor.submit(self._run_task, task[2])] = task
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report_key, success_message, _ = in_flight.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        succeeded_count += 1
+                        if self.keep_results:
+                            successful.append(success_message)
+                    else:
+                        failed_count += 1
+                        if self.keep_results:
+                            failed[report_key] = str(error)
+                    if self.on_complete:
+                        self.on_complete(report_key, error, succeeded_count, failed_count)
+        return successful, failed
+
+    def run_task(self, task):
+        """Runs one task on the calling thread, under the same concurrency limit and throttle retries as run(); raises its error."""
+        return self._run_task(task[2])
+
+    def _cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def _run_task(self, func):
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                result = func(self.s3_client)
+            except Exception as e:
+                throttled = is_throttle_error(e)
+                self.limiter.release(throttled=throttled)
+                if not throttled or attempt >= self.max_throttle_retries or self._cancelled():
+                    raise
+                attempt += 1
+                if self.metrics:
+                    self.metrics.record_task_retry()
+                time.sleep(min(20.0, 0.2 * 2 ** attempt) * random.uniform(0.5, 1.0))
+                continue
+            self.limiter.release()
+            return result
+
+
+def _error_code(e):
+    return (getattr(e, 'response', None) or {}).get('Error', {}).get('Code')
+
+
+def _run_parallel(func, items, max_workers, thread_name_prefix):
+    """Runs func(item, abort_event) for every item, telling the rest to stop as soon as one raises."""
+    items = list(items)
+    if not items:
+        return
+    abort_event = threading.Event()
+    with ThreadPoolExecutor(max_workers=min(len(items), max_workers), thread_name_prefix=thread_name_prefix) as executor:
+        futures = [executor.submit(func, item, abort_event) for item in items]
+        done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        if pending:
+            # One part failed: stop the parts still streaming rather than finish a doomed transfer
+            abort_event.set()
+            for future in pending:
+                future.cancel()
+        for future in done:
+            future.result()
+
+
+def _copy_range(s3_client, bucket, key, etag, view, start, end, settings, callback, abort_event=None, base=0):
+    """Streams bytes start-end of an object into view, which begins at object offset base.
+
+    Returns False if abort_event stopped it part way.
+    """
+    if abort_event is not None and abort_event.is_set():
+        return False
+    # IfMatch makes every part fail rather than stitch together two versions of an object overwritten mid-download
+    body = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}", IfMatch=etag)['Body']
+    offset = start
+    try:
+        for chunk in iter(lambda: body.read(READ_SIZE), b''):
+            if abort_event is not None and abort_event.is_set():
+                return False
+            settings.throttle(len(chunk))
+            view[offset - base:offset - base + len(chunk)] = chunk
+            offset += len(chunk)
+            if callback:
+                callback(len(chunk))
+    finally:
+        body.close()
+    if offset != end + 1:
+        raise IOError(f"Short read for s3://{bucket}/{key} bytes {start}-{end}: got {offset - start} bytes")
+    return True
+
+
+def ranged_download(s3_client, bucket, key, save_path, settings=None, callback=None, journal=None):
+    """Downloads an object with parallel ranged GETs written straight into a preallocated, memory-mapped file.
+
+    Parts are streamed into place in READ_SIZE pieces, so memory use does not grow with the part size.
+    The object lands in save_path only once every part has arrived. With a journal, the partial file
+    is kept on failure and the next call fetches only the ranges it has not recorded yet.
+    """
+    settings = settings or TransferSettings()
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    size, etag = head['ContentLength'], head['ETag']
+    chunk_size = settings.chunk_size if size >= settings.multipart_threshold else max(size, 1)
+    ranges = [(start, min(start + chunk_size, size) - 1) for start in range(0, size, chunk_size)]
+    temp_path = f"{save_path}.s3part"
+    journal = journal if len(ranges) > 1 else None
+    journal_path = os.path.abspath(save_path)
+
+    finished = set()
+    if journal:
+        recorded = journal.find_download(bucket, key, journal_path, etag, size, chunk_size)
+        if recorded is not None and os.path.exists(temp_path) and os.path.getsize(temp_path) == size:
+            finished = recorded
+        else:
+            journal.start_download(bucket, key, journal_path, etag, size, chunk_size)
+
+    try:
+        with open(temp_path, 'r+b' if finished else 'wb+') as f:
+            if size:
+                f.truncate(size)
+                with mmap.mmap(f.fileno(), size) as view:
+                    def copy(byte_range, abort_event=None):
+                        start, end = byte_range
+                        if _copy_range(s3_client, bucket, key, etag, view, start, end, settings, callback, abort_event) and journal:
+                            # The range only counts as done once it is on disk
+                            aligned = start - start % mmap.ALLOCATIONGRANULARITY
+                            view.flush(aligned, end + 1 - aligned)
+                            journal.record_range(bucket, key, journal_path, start)
+
+                    remaining = [byte_range for byte_range in ranges if byte_range[0] not in finished]
+                    if len(remaining) == 1:
+                        copy(remaining[0])
+                    else:
+                        _run_parallel(copy, remaining, settings.max_concurrency, "s3-range")
+                    view.flush()
+        os.replace(temp_path, save_path)
+        if journal:
+            journal.finish_download(bucket, key, journal_path)
+    except BaseException:
+        if not journal:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        raise
+
+
+def stream_download(s3_client, bucket, key, stream, settings=None, callback=None, head=None, decompress=False):
+    """Writes an object to a binary stream such as stdout, in order and without touching the disk. Returns its size.
+
+    Objects under the multipart threshold are one GET copied across in READ_SIZE pieces. Larger ones
+    are fetched as ranged GETs up to max_concurrency parts ahead of the part being written, so memory
+    stays at roughly max_concurrency + 1 parts however big the object is. With decompress, an object
+    whose Content-Encoding is gzip or zstd is decoded as it is written.
+    """
+    settings = settings or TransferSettings()
+    head = head or s3_client.head_object(Bucket=bucket, Key=key)
+    size, etag = head['ContentLength'], head['ETag']
+    codec = codec_for_encoding(head.get('ContentEncoding')) if decompress else None
+    writer = DecompressingWriter(stream, codec) if codec else stream
+    if size < settings.multipart_threshold or settings.max_concurrency == 1:
+        body = s3_client.get_object(Bucket=bucket, Key=key, IfMatch=etag)['Body']
+        written = 0
+        try:
+            for chunk in iter(lambda: body.read(READ_SIZE), b''):
+                settings.throttle(len(chunk))
+                writer.write(chunk)
+                written += len(chunk)
+                if callback:
+                    callback(len(chunk))
+        finally:
+            body.close()
+        if written != size:
+            raise IOError(f"Short read for s3://{bucket}/{key}: got {written} of {size} bytes")
+        if codec:
+            writer.close()
+        stream.flush()
+        return size
+
+    ranges = ((start, min(start + settings.chunk_size, size) - 1) for start in range(0, size, settings.chunk_size))
+    abort_event = threading.Event()
+
+    def fetch(byte_range):
+        start, end = byte_range
+        buffer = bytearray(end + 1 - start)
+        _copy_range(s3_client, bucket, key, etag, memoryview(buffer), start, end, settings, callback, abort_event, base=start)
+        return buffer
+
+    with ThreadPoolExecutor(max_workers=settings.max_concurrency, thread_name_prefix="s3-range") as executor:
+        ahead = deque(executor.submit(fetch, byte_range) for byte_range in islice(ranges, settings.max_concurrency))
+        try:
+            while ahead:
+                writer.write(ahead.popleft().result())
+                byte_range = next(ranges, None)
+                if byte_range is not None:
+                    ahead.append(executor.submit(fetch, byte_range))
+        except BaseException:
+            # The reader went away or a part failed: stop the parts still streaming
+            abort_event.set()
+            for future in ahead:
+                future.cancel()
+            raise
+    if codec:
+        writer.close()
+    stream.flush()
+    return size
+
+
+def _read_full(stream, size):
+    """Reads size bytes, fewer only at the end of the stream; pipes can return short reads before then."""
+    data = stream.read(size)
+    while data and len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def stream_upload(s3_client, stream, bucket, key, settings=None, callback=None, expected_size=None, extra_args=None, compression=None,
+                  compression_level=None):
+    """Uploads everything read from a binary stream such as stdin, which need not be seekable. Returns the byte count.
+
+    A stream shorter than one part goes up as a single PUT. Anything longer becomes a multipart upload
+    whose parts are sent max_concurrency at a time while the next one is read, so memory stays at
+    roughly max_concurrency + 1 parts. A failure aborts the upload rather than leave its parts behind.
+    S3 allows 10,000 parts, so pass expected_size for streams longer than 10,000 chunk sizes.
+    extra_args, such as Metadata, go on the PUT or the multipart upload's creation.
+
+    With compression ('gzip' or 'zstd') the stream is compressed as each part is read, while the part
+    threads are still sending the earlier ones, so the CPU and network work overlap. The object gets
+    the codec as its Content-Encoding, and callback then counts the uncompressed bytes consumed.
+    """
+    settings = settings or TransferSettings()
+    extra_args = extra_args or {}
+    if compression:
+        stream = CompressingReader(stream, compression, compression_level, callback=callback)
+        callback = None
+        extra_args = dict(extra_args, ContentEncoding=compression)
+    chunk_size = max(settings.chunk_size, -(-(expected_size or 0) // 10000))
+    data = _read_full(stream, chunk_size)
+    if len(data) < chunk_size:
+        settings.throttle(len(data))
+        s3_client.put_object(Bucket=bucket, Key=key, Body=data, **extra_args)
+        if callback:
+            callback(len(data))
+        return len(data)
+
+    upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=key, **extra_args)['UploadId']
+    parts = {}
+    slots = threading.BoundedSemaphore(settings.max_concurrency)
+    sent = 0
+
+    def send(part_number, body):
+        try:
+            settings.throttle(len(body))
+            response = s3_client.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body)
+            parts[part_number] = response['ETag']
+            if callback:
+                callback(len(body))
+        finally:
+            slots.release()
+
+    try:
+        with ThreadPoolExecutor(max_workers=settings.max_concurrency, thread_name_prefix="s3-part") as executor:
+            in_flight = []
+            part_number = 0
+            while data:
+                part_number += 1
+                if part_number > 10000:
+                    raise ValueError(f"Stream is longer than 10,000 parts of {chunk_size} bytes; pass a larger expected size or chunk size")
+                # Waiting for a free slot before reading on is what bounds memory to the parts in flight
+                slots.acquire()
+                for future in [future for future in in_flight if future.done()]:
+                    in_flight.remove(future)
+                    future.result()
+                in_flight.append(executor.submit(send, part_number, data))
+                sent += len(data)
+                data = _read_full(stream, chunk_size)
+            for future in in_flight:
+                future.result()
+        s3_client.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={
+            'Parts': [{'PartNumber': number, 'ETag': parts[number]} for number in sorted(parts)]})
+    except BaseException:
+        try:
+            s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        except Exception:
+            pass  # Left for the orphaned upload cleanup
+        raise
+    return sent
+
+
+def compressed_upload(s3_client, local_path, bucket, key, codec, level=None, settings=None, callback=None):
+    """Uploads a file compressed with gzip or zstd through stream_upload, without a compressed copy on disk.
+
+    The original size is kept in uncompressed-size metadata. Returns the compressed size.
+    """
+    size = os.path.getsize(local_path)
+    with open(local_path, 'rb') as f:
+        # The file's own size bounds the compressed size closely enough to pick a part size
+        return stream_upload(s3_client, f, bucket, key, settings, callback=callback, expected_size=size,
+                             extra_args={'Metadata': {'uncompressed-size': str(size)}}, compression=codec, compression_level=level)
+
+
+def decompressing_download(s3_client, bucket, key, save_path, settings=None, callback=None, journal=None):
+    """Downloads an object, decoding it on the way to disk when its Content-Encoding is gzip or zstd.
+
+    Compressed objects go through stream_download, so decompression overlaps the ranged GETs still
+    in flight. Anything else goes through ranged_download unchanged.
+    """
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    codec = codec_for_encoding(head.get('ContentEncoding'))
+    if codec is None:
+        return ranged_download(s3_client, bucket, key, save_path, settings, callback=callback, journal=journal)
+    temp_path = f"{save_path}.s3part"
+    try:
+        with open(temp_path, 'wb') as f:
+            stream_download(s3_client, bucket, key, f, settings, callback=callback, head=head, decompress=True)
+        os.replace(temp_path, save_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _list_part_etags(s3_client, bucket, key, upload_id):
+    parts = {}
+    kwargs = dict(Bucket=bucket, Key=key, UploadId=upload_id)
+    while True:
+        response = s3_client.list_parts(**kwargs)
+        for part in response.get('Parts', []):
+            parts[part['PartNumber']] = part['ETag']
+        if not response.get('IsTruncated'):
+            return parts
+        kwargs['PartNumberMarker'] = response['NextPartNumberMarker']
+
+
+def resumable_upload(s3_client, local_path, bucket, key, settings, journal, callback=None):
+    """Multipart upload that records its upload ID and each finished part, so a re-run only sends the missing parts.
+
+    Recorded parts are checked against list_parts before being reused; if S3 no longer knows the
+    upload, or the local file changed, a fresh upload is started and the stale one aborted.
+    """
+    stat = os.stat(local_path)
+    size = stat.st_size
+    if size < settings.multipart_threshold:
+        return s3_client.upload_file(local_path, bucket, key, Config=settings.config(),
+                                     Callback=settings.progress_callback(callback))
+    # S3 allows at most 10,000 parts per upload
+    chunk_size = max(settings.chunk_size, -(-size // 10000))
+    part_count = -(-size // chunk_size)
+    journal_path = os.path.abspath(local_path)
+
+    upload_id, parts = journal.find_upload(bucket, key, journal_path, size, stat.st_mtime, chunk_size)
+    if upload_id:
+        try:
+            server_parts = _list_part_etags(s3_client, bucket, key, upload_id)
+            parts = {number: etag for number, etag in parts.items() if server_parts.get(number) == etag}
+        except Exception as e:
+            if _error_code(e) != 'NoSuchUpload':
+                raise
+            upload_id = None
+    if not upload_id:
+        stale_upload_id = journal.stale_upload_id(bucket, key, journal_path)
+        if stale_upload_id:
+            try:
+                s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=stale_upload_id)
+            except Exception:
+                pass  # Already gone, or left for the orphaned upload cleanup
+        upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=key)['UploadId']
+        journal.start_upload(bucket, key, journal_path, size, stat.st_mtime, chunk_size, upload_id)
+        parts = {}
+
+    def send(part_number, abort_event):
+        if abort_event.is_set():
+            return
+        if callback:
+            callback(0)  # Lets a cancel land before another part goes out
+        with open(local_path, 'rb') as f:
+            f.seek((part_number - 1) * chunk_size)
+            data = f.read(chunk_size)
+        settings.throttle(len(data))
+        response = s3_client.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=data)
+        journal.record_part(upload_id, part_number, response['ETag'])
+        parts[part_number] = response['ETag']
+        if callback:
+            callback(len(data))
+
+    _run_parallel(send, [number for number in range(1, part_count + 1) if number not in parts], settings.max_concurrency, "s3-part")
+    s3_client.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={
+        'Parts': [{'PartNumber': number, 'ETag': parts[number]} for number in sorted(parts)]})
+    journal.finish_upload(bucket, key, journal_path)
+
+
+def server_copy(s3_client, bucket, key, dest_bucket, dest_key, settings=None, size=None, callback=None):
+    """Copies an object inside S3, so no data passes through this machine.
+
+    Objects up to 5 GB take a single CopyObject, which keeps their metadata. Bigger ones are copied
+    with parallel UploadPartCopy requests pinned to the source's ETag, carrying its content headers
+    and metadata over to the new upload; a failure aborts that upload.
+    """
+    settings = settings or TransferSettings()
+    source = {'Bucket': bucket, 'Key': key}
+    head = None
+    if size is None:
+        head = s3_client.head_object(Bucket=bucket, Key=key)
+        size = head['ContentLength']
+    if size <= MAX_COPY_OBJECT_SIZE:
+        s3_client.copy_object(Bucket=dest_bucket, Key=dest_key, CopySource=source)
+        if callback:
+            callback(size)
+        return
+    head = head or s3_client.head_object(Bucket=bucket, Key=key)
+    # S3 allows 10,000 parts and 5 GB per copied part
+    part_size = min(MAX_COPY_OBJECT_SIZE, max(COPY_PART_SIZE, -(-size // 10000)))
+    extra_args = {name: head[name] for name in COPIED_HEADERS if head.get(name)}
+    upload_id = s3_client.create_multipart_upload(Bucket=dest_bucket, Key=dest_key, **extra_args)['UploadId']
+    parts = {}
+
+    def copy_part(part_number, abort_event):
+        if abort_event.is_set():
+            return
+        start = (part_number - 1) * part_size
+        end = min(start + part_size, size) - 1
+        response = s3_client.upload_part_copy(Bucket=dest_bucket, Key=dest_key, UploadId=upload_id, PartNumber=part_number,
+                                              CopySource=source, CopySourceRange=f"bytes={start}-{end}", CopySourceIfMatch=head['ETag'])
+        parts[part_number] = response['CopyPartResult']['ETag']
+        if callback:
+            callback(end + 1 - start)
+
+    try:
+        _run_parallel(copy_part, range(1, -(-size // part_size) + 1), settings.max_concurrency, "s3-copy")
+        s3_client.complete_multipart_upload(Bucket=dest_bucket, Key=dest_key, UploadId=upload_id, MultipartUpload={
+            'Parts': [{'PartNumber': number, 'ETag': parts[number]} for number in sorted(parts)]})
+    except BaseException:
+        try:
+            s3_client.abort_multipart_upload(Bucket=dest_bucket, Key=dest_key, UploadId=upload_id)
+        except Exception:
+            pass  # Left for the orphaned upload cleanup
+        raise
+
+
+def abort_orphaned_uploads(s3_client, bucket, prefix='', older_than=24 * 3600, journal=None, on_abort=None):
+    """Aborts multipart uploads under prefix started more than older_than seconds ago. Returns the aborted keys."""
+    cutoff = time.time() - older_than
+    aborted = []
+    kwargs = dict(Bucket=bucket, Prefix=prefix)
+    while True:
+        response = s3_client.list_multipart_uploads(**kwargs)
+        for upload in response.get('Uploads', []):
+            if upload['Initiated'].timestamp() > cutoff:
+                continue
+            s3_client.abort_multipart_upload(Bucket=bucket, Key=upload['Key'], UploadId=upload['UploadId'])
+            if journal:
+                journal.forget_upload_id(upload['UploadId'])
+            aborted.append(upload['Key'])
+            if on_abort:
+                on_abort(upload['Key'], upload['UploadId'])
+        if not response.get('IsTruncated'):
+            return aborted
+        kwargs['KeyMarker'] = response['NextKeyMarker']
+        kwargs['UploadIdMarker'] = response['NextUploadIdMarker']
+
+
+def _tracked(metrics, direction, callback):
+    return metrics.transfer(direction, callback) if metrics else nullcontext(callback)
+
+
+def upload_task(local_path, bucket, s3_key, settings=None, journal=None, Callback=None, metrics=None, compression=None,
+                compression_level=None):
+    """A scheduler task uploading one file. With compression ('gzip' or 'zstd') it is compressed on the way, and not journalled."""
+    settings = settings or TransferSettings()
+
+    def run(s3_client):
+        with _tracked(metrics, 'upload', Callback) as callback:
+            if compression:
+                return compressed_upload(s3_client, local_path, bucket, s3_key, compression, compression_level, settings, callback=callback)
+            if journal:
+                return resumable_upload(s3_client, local_path, bucket, s3_key, settings, journal, callback=callback)
+            return s3_client.upload_file(local_path, bucket, s3_key, Config=settings.config(), Callback=settings.progress_callback(callback))
+    return local_path, f"{local_path} -> s3://{bucket}/{s3_key}", run
+
+
+def copy_task(bucket, s3_key, dest_bucket, dest_key, size=None, settings=None, Callback=None):
+    """A scheduler task copying one object server side. Its report key is the source key."""
+    def run(s3_client):
+        return server_copy(s3_client, bucket, s3_key, dest_bucket, dest_key, settings, size=size, callback=Callback)
+    return s3_key, f"s3://{bucket}/{s3_key} -> s3://{dest_bucket}/{dest_key}", run
+
+
+def download_task(bucket, s3_key, save_path, report_key=None, settings=None, journal=None, Callback=None, metrics=None, decompress=False):
+    """A scheduler task downloading one object. With decompress, gzip and zstd encoded objects are saved decoded."""
+    report_key = report_key or s3_key
+
+    def run(s3_client):
+        with _tracked(metrics, 'download', Callback) as callback:
+            if decompress:
+                return decompressing_download(s3_client, bucket, s3_key, save_path, settings, callback=callback, journal=journal)
+            return ranged_download(s3_client, bucket, s3_key, save_path, settings, callback=callback, journal=journal)
+    return report_key, f"{report_key} -> {save_path}", run
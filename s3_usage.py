@@ -0,0 +1,243 @@
+import csv
+import datetime
+import gzip
+import json
+import os
+from itertools import chain
+from urllib.parse import unquote
+
+from s3_listing import DEFAULT_LIST_WORKERS, iter_pages
+
+# Field order of an inventory CSV with no manifest to name them: the fields every inventory has, as S3 writes them
+DEFAULT_INVENTORY_SCHEMA = "Bucket, Key, Size, LastModifiedDate"
+PARQUET_BATCH_ROWS = 64 * 1024
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+# How each sort orders the rows: (key, biggest or newest first)
+SORT_KEYS = {
+    'size': (lambda item: item[1].size, True),
+    'count': (lambda item: item[1].count, True),
+    'name': (lambda item: item[0], False),
+    'newest': (lambda item: item[1].newest or 0, True),
+    'oldest': (lambda item: item[1].oldest or 0, False),
+}
+
+
+class Usage:
+    """Object count, total bytes and oldest and newest modification time of everything under one prefix."""
+    __slots__ = ('count', 'size', 'oldest', 'newest')
+
+    def __init__(self):
+        self.count = 0
+        self.size = 0
+        self.oldest = None
+        self.newest = None
+
+    def add(self, size, mtime=None):
+        self.count += 1
+        self.size += size
+        if mtime is not None:
+            if self.oldest is None or mtime < self.oldest:
+                self.oldest = mtime
+            if self.newest is None or mtime > self.newest:
+                self.newest = mtime
+
+    def as_dict(self):
+        return {'objects': self.count, 'bytes': self.size, 'oldest': _isoformat(self.oldest), 'newest': _isoformat(self.newest)}
+
+
+class DiskUsage:
+    """Per-folder totals under root, aggregated from a stream of objects that are not kept.
+
+    Each object is added to every folder between root and itself, down to max_depth levels below
+    root; deeper objects count towards their deepest tracked folder. Memory grows with the number
+    of folders rather than objects, and objects may arrive in any order, as they do from an inventory.
+    """
+
+    def __init__(self, root='', max_depth=None):
+        self.root = root
+        self.max_depth = max_depth
+        self.folders = {root: Usage()}
+        self.subfolders = {root: []}
+        self.files = {}  # folder -> Usage of the objects directly in it
+
+    @property
+    def total(self):
+        return self.folders[self.root]
+
+    def add(self, key, size, mtime=None):
+        if not key.startswith(self.root):
+            return
+        self.folders[self.root].add(size, mtime)
+        folder, start, depth = self.root, len(self.root), 0
+        while True:
+            slash = key.find('/', start)
+            if slash == -1:
+                self.files.setdefault(folder, Usage()).add(size, mtime)
+                return
+            if self.max_depth is not None and depth >= self.max_depth:
+                return
+            child = key[:slash + 1]
+            usage = self.folders.get(child)
+            if usage is None:
+                usage = self.folders[child] = Usage()
+                self.subfolders[child] = []
+                self.subfolders[folder].append(child)
+            usage.add(size, mtime)
+            folder, start, depth = child, slash + 1, depth + 1
+
+    def add_page(self, page):
+        for obj in page:
+            self.add(obj['Key'], obj['Size'], obj['LastModified'].timestamp())
+
+    def children(self, folder=None, sort='size'):
+        """(prefix, Usage) for the subfolders of folder (default: root), in the given SORT_KEYS order."""
+        key, reverse = SORT_KEYS[sort]
+        folder = self.root if folder is None else folder
+        return sorted(((child, self.folders[child]) for child in self.subfolders.get(folder, ())), key=key, reverse=reverse)
+
+    def walk(self, folder=None, sort='size', depth=None):
+        """Yields (prefix, depth, Usage) for folder and its subfolders depth first, each level sorted, down to depth levels."""
+        folder = self.root if folder is None else folder
+        stack = [(folder, 0)]
+        while stack:
+            prefix, level = stack.pop()
+            yield prefix, level, self.folders[prefix]
+            if depth is None or level < depth:
+                stack.extend((child, level + 1) for child, _ in reversed(self.children(prefix, sort)))
+
+
+def scan_prefix(s3_client, bucket, prefix='', max_depth=None, list_workers=DEFAULT_LIST_WORKERS, cancel_event=None, on_page=None):
+    """Totals everything under prefix from a streamed (optionally sharded) listing. on_page(usage) follows each page."""
+    usage = DiskUsage(prefix, max_depth)
+    for page in iter_pages(s3_client, bucket, prefix, cancel_event=cancel_event, list_workers=list_workers):
+        usage.add_page(page)
+        if on_page:
+            on_page(usage)
+    return usage
+
+
+def read_inventory(path, bucket=None, prefix='', max_depth=None, schema=None, cancel_event=None, on_progress=None):
+    """Totals everything under prefix from a local S3 Inventory instead of listing the bucket.
+
+    on_progress(usage) follows every 100,000 objects.
+    """
+    usage = DiskUsage(prefix, max_depth)
+    for key, size, mtime in iter_inventory(path, bucket, schema):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        usage.add(key, size, mtime)
+        if on_progress and usage.total.count % 100_000 == 0:
+            on_progress(usage)
+    return usage
+
+
+def iter_inventory(path, bucket=None, schema=None):
+    """Yields (key, size, mtime) for the current objects in an S3 Inventory.
+
+    path is the inventory's manifest.json, whose data files are looked for next to it or in the
+    data/ folder beside its dated folder, or a single CSV (optionally gzipped) or Parquet data file.
+    A CSV without a manifest takes its fields from a header row, schema or DEFAULT_INVENTORY_SCHEMA.
+    Noncurrent versions and delete markers are skipped. Raises ValueError for an inventory of
+    another bucket than bucket.
+    """
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        _check_bucket(manifest.get('sourceBucket'), bucket)
+        fmt = manifest.get('fileFormat', 'CSV').lower()
+        for entry in manifest.get('files', []):
+            yield from _iter_data_file(_local_data_file(path, entry['key']), fmt, manifest.get('fileSchema'), bucket)
+    else:
+        yield from _iter_data_file(path, 'parquet' if path.endswith('.parquet') else 'csv', schema, bucket)
+
+
+def _local_data_file(manifest_path, key):
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    name = os.path.basename(key)
+    for candidate in (os.path.join(directory, name), os.path.join(directory, 'data', name), os.path.join(os.path.dirname(directory), 'data', name)):
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(f"Inventory data file '{name}' not found next to {manifest_path} or in a data/ folder beside it")
+
+
+def _iter_data_file(path, fmt, schema, bucket):
+    if fmt == 'csv':
+        yield from _iter_csv(path, schema, bucket)
+    elif fmt == 'parquet':
+        yield from _iter_parquet(path, bucket)
+    else:
+        raise ValueError(f"{fmt.upper()} inventories are not supported, only CSV and Parquet")
+
+
+def _iter_csv(path, schema, bucket):
+    with open(path, 'rb') as raw:
+        compressed = raw.read(2) == b'\x1f\x8b'
+    with (gzip.open(path, 'rt', encoding='utf-8', newline='') if compressed else open(path, encoding='utf-8', newline='')) as f:
+        rows = csv.reader(f)
+        fields = [field.strip() for field in (schema or DEFAULT_INVENTORY_SCHEMA).split(',')]
+        first = next(rows, None)
+        if first is not None and 'Key' in first:
+            fields = [field.strip() for field in first]
+            first = None
+        column = {field: index for index, field in enumerate(fields)}
+        if 'Key' not in column or 'Size' not in column:
+            raise ValueError(f"Inventory schema '{', '.join(fields)}' has no Key and Size fields")
+        for row in chain([first] if first else [], rows):
+            if not row:
+                continue
+            if 'Bucket' in column:
+                _check_bucket(row[column['Bucket']], bucket)
+            if 'IsLatest' in column and row[column['IsLatest']] == 'false' or \
+                    'IsDeleteMarker' in column and row[column['IsDeleteMarker']] == 'true':
+                continue
+            size = row[column['Size']]
+            mtime = _parse_timestamp(row[column['LastModifiedDate']]) if 'LastModifiedDate' in column else None
+            # CSV inventories URL-encode their keys
+            yield unquote(row[column['Key']]), int(size) if size else 0, mtime
+
+
+def _iter_parquet(path, bucket):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet inventories need the pyarrow package (pip install pyarrow)") from None
+    parquet = pq.ParquetFile(path)
+    names = set(parquet.schema_arrow.names)
+    columns = [name for name in ('bucket', 'key', 'size', 'last_modified_date', 'is_latest', 'is_delete_marker') if name in names]
+    for batch in parquet.iter_batches(batch_size=PARQUET_BATCH_ROWS, columns=columns):
+        for row in batch.to_pylist():
+            if row.get('bucket') is not None:
+                _check_bucket(row['bucket'], bucket)
+            if row.get('is_latest') is False or row.get('is_delete_marker'):
+                continue
+            mtime = row.get('last_modified_date')
+            if isinstance(mtime, datetime.datetime):
+                mtime = (mtime if mtime.tzinfo else mtime.replace(tzinfo=datetime.timezone.utc)).timestamp()
+            elif mtime is not None:
+                mtime = mtime / 1000  # Milliseconds since the epoch
+            yield row['key'], row.get('size') or 0, mtime
+
+
+def _check_bucket(found, bucket):
+    if bucket and found and found != bucket:
+        raise ValueError(f"The inventory is of bucket '{found}', not '{bucket}'")
+
+
+def _parse_timestamp(text):
+    if not text:
+        return None
+    return datetime.datetime.fromisoformat(text.replace('Z', '+00:00')).timestamp()
+
+
+def _isoformat(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat()
+
+
+def format_size(size):
+    """1536 -> '1.5 KB'."""
+    for unit in SIZE_UNITS:
+        if abs(size) < 1024 or unit == SIZE_UNITS[-1]:
+            return f"{size} B" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
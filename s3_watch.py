@@ -0,0 +1,215 @@
+import os
+import queue
+import threading
+import time
+
+from s3_sync import walk_files
+from s3_transfer import DEFAULT_CONCURRENCY, TransferScheduler, upload_task
+
+DEFAULT_DEBOUNCE = 2.0  # Seconds a file must be left alone before it is uploaded
+DEFAULT_POLL_INTERVAL = 5.0
+RETRY_DELAY = 60.0  # Seconds before a failed upload is tried again
+TICK = 0.25
+
+
+class ChangeQueue:
+    """Debounces and coalesces change notifications: a path is ready once it has not changed for debounce seconds.
+
+    Any number of changes to one path while it waits count as one. Thread safe, as notifications
+    arrive on the observer's thread.
+    """
+
+    def __init__(self, debounce=DEFAULT_DEBOUNCE):
+        self.debounce = debounce
+        self._pending = {}  # path -> time of its latest change
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, path):
+        return path in self._pending
+
+    def touch(self, path, when=None):
+        with self._lock:
+            self._pending[path] = time.time() if when is None else when
+
+    def ready(self, now=None, limit=None):
+        """Removes and returns up to limit paths that have been quiet for debounce seconds, oldest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            quiet = sorted((changed, path) for path, changed in self._pending.items() if now - changed >= self.debounce)
+            paths = [path for _, path in quiet[:limit]]
+            for path in paths:
+                del self._pending[path]
+        return paths
+
+
+class FolderWatcher:
+    """Keeps prefix up to date with local_dir, uploading files as they are created or modified until stopped.
+
+    Changes come from the watchdog package's native notifications when it is installed, or else
+    from rescanning the tree every poll_interval seconds and comparing sizes and mtimes with the
+    last uploaded ones. Bursts of writes are debounced into one upload per file, and uploads run on
+    max_concurrency threads fed from a bounded queue; files that cannot be queued yet stay pending.
+    Deleted files are left in S3, and failed uploads are retried after RETRY_DELAY seconds.
+    """
+
+    def __init__(self, engine, local_dir, prefix, max_concurrency=DEFAULT_CONCURRENCY, debounce=DEFAULT_DEBOUNCE,
+                 poll_interval=DEFAULT_POLL_INTERVAL, notify=True, journal=None, Callback=None, metrics=None, on_upload=None, on_status=None):
+        self.engine = engine
+        self.local_dir = os.path.abspath(local_dir)
+        self.prefix = prefix
+        self.max_concurrency = max(1, max_concurrency)
+        self.poll_interval = poll_interval
+        self.notify = notify
+        self.journal = journal
+        self.Callback = Callback
+        self.metrics = metrics
+        self.on_upload = on_upload
+        self.on_status = on_status
+        self.stop_event = engine.cancel_event or threading.Event()
+        self.changes = ChangeQueue(debounce)
+        self.index = {}  # path -> (size, mtime) last uploaded, or found unchanged
+        self.uploaded = 0
+        self.failed = 0
+        self._uploading = set()
+        self._lock = threading.Lock()
+        self._scheduler = TransferScheduler(engine.s3_client, self.max_concurrency, cancel_event=self.stop_event, metrics=metrics)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _status(self, text):
+        if self.on_status:
+            self.on_status(text)
+
+    def run(self, initial_sync=True):
+        """Watches until stopped, first uploading whatever changed while nobody was watching. Returns (uploaded, failed) counts."""
+        self.index = {path: (size, mtime) for path, _, size, mtime in walk_files(self.local_dir)}
+        observer = self._start_observer() if self.notify else None
+        uploads = queue.Queue(self.max_concurrency * 2)
+        workers = [threading.Thread(target=self._upload_worker, args=(uploads,), name=f"s3-watch-{i}", daemon=True)
+                   for i in range(self.max_concurrency)]
+        for worker in workers:
+            worker.start()
+        try:
+            if initial_sync:
+                plan = self.engine.plan_upload(self.local_dir, self.prefix)
+                for path, _ in plan.tasks:
+                    self.index.pop(path, None)
+                    self.changes.touch(path, 0)
+                self._status(f"{len(plan.tasks)} file(s) changed since the last sync, {plan.unchanged} unchanged")
+            self._status(f"watching {self.local_dir} " + ("for change notifications" if observer else f"every {self.poll_interval:g}s"))
+            next_poll = time.time() + self.poll_interval
+            while not self.stop_event.wait(TICK):
+                now = time.time()
+                if observer is None and now >= next_poll:
+                    self._scan()
+                    next_poll = time.time() + self.poll_interval
+                self._queue_ready(uploads, now)
+        finally:
+            self.stop_event.set()
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            # Queued files are dropped, uploads under way are left to finish (or to their Callback to abort)
+            while True:
+                try:
+                    uploads.get_nowait()
+                except queue.Empty:
+                    break
+            for _ in workers:
+                uploads.put(None)
+            for worker in workers:
+                worker.join()
+        return self.uploaded, self.failed
+
+    def _scan(self):
+        """Polling: marks files whose size or mtime differs from the index as changed."""
+        seen = set()
+        for path, _, size, mtime in walk_files(self.local_dir):
+            seen.add(path)
+            # Pending paths keep their debounce timer; one still being written is held back by its mtime instead
+            if self.index.get(path) != (size, mtime) and path not in self.changes and path not in self._uploading:
+                self.changes.touch(path)
+        with self._lock:
+            for path in self.index.keys() - seen:
+                del self.index[path]
+
+    def _queue_ready(self, uploads, now):
+        free = uploads.maxsize - uploads.qsize()
+        if free <= 0:
+            return
+        for path in self.changes.ready(now, limit=free):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.index.pop(path, None)  # Deleted (or moved away) before it could be uploaded
+                continue
+            signature = (stat.st_size, stat.st_mtime)
+            if 0 <= now - stat.st_mtime < self.changes.debounce or path in self._uploading:
+                self.changes.touch(path, now)  # Still being written, or its previous version is still uploading
+            elif self.index.get(path) != signature:
+                self._uploading.add(path)
+                uploads.put((path, signature))
+
+    def _upload_worker(self, uploads):
+        while True:
+            item = uploads.get()
+            if item is None:
+                return
+            path, signature = item
+            key = self.prefix + os.path.relpath(path, self.local_dir).replace(os.sep, '/')
+            error = None
+            try:
+                self._scheduler.run_task(upload_task(path, self.engine.bucket, key, settings=self.engine.settings, journal=self.journal,
+                                                     Callback=self.Callback, metrics=self.metrics))
+            except Exception as e:
+                error = e
+            with self._lock:
+                if error is None:
+                    self.uploaded += 1
+                    self.index[path] = signature
+                else:
+                    self.failed += 1
+            if error is not None and not self.stop_event.is_set():
+                self.changes.touch(path, time.time() + RETRY_DELAY)
+            self._uploading.discard(path)
+            if self.on_upload:
+                self.on_upload(path, key, error)
+
+    def _start_observer(self):
+        """A running watchdog observer feeding the change queue, or None when watchdog is missing or cannot watch the tree."""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            self._status("watchdog is not installed (pip install watchdog), polling for changes instead")
+            return None
+        changes = self.changes
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type not in ('created', 'modified', 'moved', 'closed'):
+                    return
+                path = getattr(event, 'dest_path', '') or event.src_path
+                if not event.is_directory:
+                    changes.touch(path)
+                elif event.event_type != 'modified':
+                    # A folder moved in arrives as one event for the folder rather than one per file
+                    try:
+                        for file_path, _, _, _ in walk_files(path):
+                            changes.touch(file_path)
+                    except OSError:
+                        pass
+
+        observer = Observer()
+        try:
+            observer.schedule(Handler(), self.local_dir, recursive=True)
+            observer.start()
+        except OSError as e:
+            # E.g. the inotify watch limit, or a file system without notifications
+            self._status(f"change notifications unavailable ({e}), polling for changes instead")
+            return None
+        return observer
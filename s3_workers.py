@@ -0,0 +1,126 @@
+import itertools
+import queue
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """A unit of background work. The worker side reports through it, the GUI side cancels through it."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, runner, title, callbacks):
+        self.id = next(Job._ids)
+        self.title = title
+        self.callbacks = callbacks
+        self._runner = runner
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def cancel_event(self):
+        return self._cancel_event
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"'{self.title}' was cancelled")
+
+    def progress(self, done, total=None, text=None):
+        self._runner._post('progress', self, (done, total, text))
+
+    def emit(self, data):
+        self._runner._post('data', self, data)
+
+
+class JobRunner:
+    """Runs jobs on a thread pool and hands their events back to the Tk thread via master.after."""
+
+    def __init__(self, master, max_workers=4, poll_interval=50, max_events_per_poll=500):
+        self.master = master
+        self.poll_interval = poll_interval
+        self.max_events_per_poll = max_events_per_poll
+        self.jobs = {}
+        self._events = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3-job")
+        self._closed = False
+        self._poll()
+
+    def submit(self, title, func, *args, on_start=None, on_progress=None, on_data=None, on_result=None, on_error=None, on_done=None):
+        """Schedules func(job, *args) on the pool. Callbacks always run on the Tk thread."""
+        job = Job(self, title, {
+            'start': on_start,
+            'progress': on_progress,
+            'data': on_data,
+            'result': on_result,
+            'error': on_error,
+            'done': on_done,
+        })
+        self.jobs[job.id] = job
+        if on_start:
+            on_start(job)
+        self._executor.submit(self._run, job, func, args)
+        return job
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            job.cancel()
+
+    def shutdown(self):
+        self._closed = True
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, func, args):
+        try:
+            result = func(job, *args)
+            self._post('result', job, result)
+        except JobCancelled:
+            pass
+        except Exception as e:
+            self._post('error', job, e)
+        finally:
+            self._post('done', job, None)
+
+    def _post(self, kind, job, payload):
+        self._events.put((kind, job, payload))
+
+    def _poll(self):
+        if self._closed:
+            return
+        for _ in range(self.max_events_per_poll):
+            try:
+                kind, job, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            self._dispatch(kind, job, payload)
+        self.master.after(self.poll_interval, self._poll)
+
+    def _dispatch(self, kind, job, payload):
+        if kind == 'done':
+            self.jobs.pop(job.id, None)
+        callback = job.callbacks.get(kind)
+        if not callback:
+            return
+        try:
+            if kind == 'progress':
+                callback(job, *payload)
+            elif kind == 'done':
+                callback(job)
+            else:
+                callback(job, payload)
+        except Exception:
+            # A broken callback must not stop the poll loop for every other job, so it is reported on stderr
+            print(f"Error in '{job.title}' {kind} handler:", file=sys.stderr)
+            traceback.print_exc()
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
+
+import s3_batch  # noqa: E402
+from s3_stub import StubS3, StubTransferSettings  # noqa: E402
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    s3 = StubS3()
+    for key in ['a/x', 'b/y']:
+        s3.put_object(Bucket='b', Key=key, Body=b'data')
+    monkeypatch.setattr(s3_batch, 'get_client', lambda *args, **kwargs: s3)
+    monkeypatch.setattr(s3_batch, '_settings', lambda args: StubTransferSettings())
+    return s3
+
+
+@pytest.mark.parametrize('argv', [['', '-r'], ['/', '-r'], ['s3://b/', '-r'], ['*'], ['**']])
+def test_rm_refuses_whole_bucket(s3, capsys, argv):
+    with pytest.raises(SystemExit):
+        s3_batch.main(['rm', 'b'] + argv)
+    assert '--all' in capsys.readouterr().err
+    assert sorted(s3._keys('b')) == ['a/x', 'b/y']
+
+
+def test_rm_whole_bucket_with_all(s3):
+    assert s3_batch.main(['rm', 'b', '', '-r', '--all']) == s3_batch.EXIT_OK
+    assert not list(s3._keys('b'))
+
+
+def test_rm_folder_is_allowed(s3):
+    assert s3_batch.main(['rm', 'b', 'a', '-r']) == s3_batch.EXIT_OK
+    assert sorted(s3._keys('b')) == ['b/y']
@@ -0,0 +1,53 @@
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
+
+import s3_batch  # noqa: E402
+from s3_copy import copy_keys  # noqa: E402
+from s3_stub import StubS3, StubTransferSettings  # noqa: E402
+
+
+def _stub(keys):
+    s3 = StubS3()
+    for key in keys:
+        s3.put_object(Bucket='b', Key=key, Body=b'data')
+    return s3
+
+
+def _run_batch(monkeypatch, capsys, s3, argv):
+    monkeypatch.setattr(s3_batch, 'get_client', lambda *args, **kwargs: s3)
+    monkeypatch.setattr(s3_batch, '_settings', lambda args: StubTransferSettings())
+    status = s3_batch.main(argv)
+    return status, [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_cp_overlapping_patterns(monkeypatch, capsys):
+    s3 = _stub(['a/x1', 'a/x2'])
+    status, records = _run_batch(monkeypatch, capsys, s3, ['cp', 'b', 'a/x*', 'a/*1', 'd/'])
+    assert status == s3_batch.EXIT_OK
+    assert sorted(record['key'] for record in records) == ['a/x1', 'a/x1', 'a/x2']
+    assert all(record['status'] == 'ok' for record in records)
+    assert sorted(s3._keys('b')) == ['a/x1', 'a/x2', 'd/x1', 'd/x2']
+
+
+def test_mv_overlapping_patterns(monkeypatch, capsys):
+    s3 = _stub(['a/x1', 'a/x2'])
+    status, records = _run_batch(monkeypatch, capsys, s3, ['mv', 'b', 'a/x*', 'a/*1', 'd/'])
+    assert status == s3_batch.EXIT_OK
+    assert sorted(record['key'] for record in records if record['op'] == 'rm') == ['a/x1', 'a/x2']
+    assert sorted(s3._keys('b')) == ['d/x1', 'd/x2']
+
+
+def test_move_same_source_to_two_destinations():
+    s3 = _stub(['f/x'])
+    completed, batches = [], []
+    result = copy_keys(s3, 'b', [('f/x', 'g/f/x', None), ('f/x', 'g/x', None)], 'b', 2, StubTransferSettings(), move=True,
+                       on_complete=lambda index, error, succeeded, failed: completed.append((index, error)),
+                       on_batch=lambda keys, errors: batches.append((list(keys), errors)))
+    assert sorted(completed) == [(0, None), (1, None)]
+    assert batches == [(['f/x'], {})]
+    assert result == (2, 0, 1)
+    assert sorted(s3._keys('b')) == ['g/f/x', 'g/x']
@@ -0,0 +1,24 @@
+import fnmatch
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from s3_search import ListFilter, glob_literal_prefix, glob_to_regex  # noqa: E402
+
+
+@pytest.mark.parametrize('pattern', ['a[!]', 'a[!]x]', 'a[^b]', 'a[', '[]]', '[!]]', 'a[z-a]', 'a[b-]', 'a[\\]', '[&&]', 'x[!'])
+def test_glob_brackets_match_fnmatch(pattern):
+    ours = glob_to_regex(pattern, ignore_case=False)
+    expected = re.compile(fnmatch.translate(pattern))
+    for key in ['a', 'a]', 'a^', 'ab', 'ax', 'a[', 'a[!]', 'a\\', ']', '!', '&', 'x[!', 'a-']:
+        assert bool(ours.fullmatch(key)) == bool(expected.match(key)), key
+
+
+def test_unclosed_bracket_is_literal():
+    assert ListFilter('logs[').match('logs[', 1, 0)
+    assert glob_literal_prefix('2024/[!]x]*') == '2024/'
+    assert glob_literal_prefix('a[') == 'a['